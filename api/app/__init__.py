@@ -1,26 +1,60 @@
 import os
-from flask import Flask
-from flask_cors import CORS
+from typing import TYPE_CHECKING
 
 from .config import Settings
-from .services.db import engine
-from .models.models import Base
 
-def create_app() -> Flask:
+if TYPE_CHECKING:
+    from flask import Flask    # imported in create_app: ETL entry points never need Flask
+
+def create_app(start_background: bool = True) -> "Flask":
+    from flask import Flask
+    from flask_cors import CORS
+
     app = Flask(__name__)
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev-secret")
 
     # CORS: allow your front-end origin (set CLIENT_ORIGIN in .env later)
-    CORS(app, resources={r"/*": {"origins": os.getenv("CLIENT_ORIGIN", "*")}})
+    CORS(
+        app,
+        resources={r"/*": {"origins": os.getenv("CLIENT_ORIGIN", "*")}},
+        expose_headers=["ETag", "X-Cache"],
+    )
 
     # Register blueprints
     from .routes.health import health_bp
     from .routes.search import search_bp
+    from .routes.suggest import suggest_bp
+    from .routes.rank import rank_bp
+    from .routes.bulk import bulk_bp
+    from .routes.metrics import metrics_bp
     app.register_blueprint(health_bp)
     app.register_blueprint(search_bp)
+    app.register_blueprint(suggest_bp)
+    app.register_blueprint(rank_bp)
+    app.register_blueprint(bulk_bp)
+    app.register_blueprint(metrics_bp)
+
+    # Latency / query-count / rows histograms for every request
+    from .services.instrumentation import init_app as init_instrumentation
+    init_instrumentation(app)
+
+    # Schema provisioning normally runs once per deploy (python -m app.migrate);
+    # AUTO_MIGRATE=1 opts into the old create-on-boot behaviour for local dev
+    settings = Settings()
+    if settings.AUTO_MIGRATE and not settings.SNAPSHOT_PATH:   # snapshots are read-only
+        from .migrate import migrate
+        migrate()
+
+    # Cap API queries only once startup DDL is done
+    from .services.db import limit_statement_time
+    limit_statement_time(settings.DB_STATEMENT_TIMEOUT_MS)
 
-    # Create tables (okay for MVP; migrate with Alembic later)
-    with app.app_context():
-        Base.metadata.create_all(bind=engine)
+    # Build in-memory snapshots (rank index, suggest catalog) before serving,
+    # then pick up ETL reloads without querying on the request path.
+    # Under a preloading server the poller is started per worker after fork.
+    from .services.dataset import refresh_all, start_poller
+    refresh_all()
+    if start_background:
+        start_poller(settings.DATASET_POLL_SECONDS)
 
     return app
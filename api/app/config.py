@@ -7,3 +7,40 @@ class Settings:
         "DATABASE_URL",
         "postgresql+psycopg://airisk:airisk@db:5432/airisk"
     )
+
+    # Run create_all + search indexes when the app boots. Off by default:
+    # deployments run `python -m app.migrate` once; set 1 for local development.
+    AUTO_MIGRATE: bool = os.getenv("AUTO_MIGRATE", "0").lower() in ("1", "true", "yes")
+
+    # How often API workers check dataset_version for ETL reloads (0 disables)
+    DATASET_POLL_SECONDS: float = float(os.getenv("DATASET_POLL_SECONDS", "10"))
+
+    # /api/search result cache: in-process LRU entries, optional Redis tier
+    RESULT_CACHE_SIZE: int = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+    RESULT_CACHE_TTL: int = int(os.getenv("RESULT_CACHE_TTL", "3600"))
+    REDIS_URL: str = os.getenv("REDIS_URL", "")
+
+    # SQLAlchemy connection pool (per worker process). Keep
+    # DB_POOL_SIZE + DB_MAX_OVERFLOW >= GUNICORN_THREADS so threads never
+    # queue for a connection, and workers * that sum under Postgres max_connections.
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "1").lower() not in ("0", "false", "no")
+    # Postgres statement_timeout for API queries, in milliseconds (0 = no limit).
+    # ETL and migrations never get it.
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))
+
+    # Serve reads from a published SQLite snapshot instead of DATABASE_URL
+    # (see app.etl.publish_snapshot). Empty = use the database.
+    SNAPSHOT_PATH: str = os.getenv("SNAPSHOT_PATH", "")
+    SNAPSHOT_MMAP_BYTES: int = int(os.getenv("SNAPSHOT_MMAP_BYTES", str(256 * 1024 * 1024)))
+
+    # Request instrumentation (/metrics) and the opt-in per-request sampling
+    # profiler: with PROFILE_ENABLED=1, send "X-Profile: 1" (or ?_profile=1)
+    # and the collapsed stacks are written under PROFILE_DIR.
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+    PROFILE_ENABLED: bool = os.getenv("PROFILE_ENABLED", "0").lower() in ("1", "true", "yes")
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "/tmp/api-profiles")
+    PROFILE_INTERVAL_MS: float = float(os.getenv("PROFILE_INTERVAL_MS", "2"))
@@ -0,0 +1,88 @@
+# bulk.py
+"""Set-based load helpers shared by the ingest scripts."""
+from sqlalchemy import and_, bindparam, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def insert_for(dialect_name: str):
+    """Dialect insert() that supports ON CONFLICT, or None if the dialect has none."""
+    if dialect_name == "postgresql":
+        return postgresql.insert
+    if dialect_name == "sqlite":
+        return sqlite.insert
+    return None
+
+
+def merge_rows(session, table, batches, key_cols, cols) -> int:
+    """Per-row UPDATE, then INSERT when nothing matched: works on any dialect, just slower."""
+    where = and_(*(table.c[k] == bindparam(f"k_{k}") for k in key_cols))
+    update = table.update().where(where).values({c: bindparam(f"v_{c}") for c in cols if c not in key_cols})
+    loaded = 0
+    for batch in batches:
+        for data in batch:
+            params = {f"k_{k}": data.get(k) for k in key_cols}
+            params.update({f"v_{c}": data.get(c) for c in cols if c not in key_cols})
+            if session.execute(update, params).rowcount == 0:
+                session.execute(table.insert().values({c: data.get(c) for c in cols}))
+            loaded += 1
+    return loaded
+
+
+def upsert_batches(session, table, batches, key_cols, cols) -> int:
+    """
+    INSERT ... ON CONFLICT (key_cols) DO UPDATE, one statement per batch of
+    dicts; dialects without ON CONFLICT fall back to merge_rows().
+    """
+    insert = insert_for(session.get_bind().dialect.name)
+    if insert is None:
+        return merge_rows(session, table, batches, key_cols, cols)
+
+    loaded = 0
+    for batch in batches:
+        if not batch:
+            continue
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c[k] for k in key_cols],
+            set_={c: stmt.excluded[c] for c in cols if c not in key_cols},
+        )
+        session.execute(stmt, batch)
+        loaded += len(batch)
+    return loaded
+
+
+def copy_merge(session, table_name: str, batches, key_cols, cols) -> int:
+    """
+    Postgres only: COPY rows into a temp copy of `table_name`, then merge them
+    with a single INSERT ... SELECT ... ON CONFLICT DO UPDATE.
+    """
+    stage = f"{table_name}_stage"
+    col_list = ", ".join(cols)
+    keys = ", ".join(key_cols)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in cols if c not in key_cols)
+
+    session.execute(text(
+        f"CREATE TEMP TABLE {stage} (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP"
+    ))
+    # Input order, filled in by COPY (which leaves the column out)
+    session.execute(text(f"ALTER TABLE {stage} ADD COLUMN _seq bigint GENERATED ALWAYS AS IDENTITY"))
+    raw = session.connection().connection.dbapi_connection
+
+    loaded = 0
+    with raw.cursor() as cur:
+        with cur.copy(f"COPY {stage} ({col_list}) FROM STDIN") as copy:
+            for batch in batches:
+                for data in batch:
+                    copy.write_row(tuple(data.get(c) for c in cols))
+                loaded += len(batch)
+
+    # DISTINCT ON: a key repeated in the input must not hit the same row twice;
+    # the last occurrence wins, as it does in upsert_batches()
+    on_conflict = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+    session.execute(text(f"""
+        INSERT INTO {table_name} ({col_list})
+        SELECT DISTINCT ON ({keys}) {col_list} FROM {stage}
+        ORDER BY {keys}, _seq DESC
+        ON CONFLICT ({keys}) {on_conflict}
+    """))
+    return loaded
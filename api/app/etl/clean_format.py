@@ -0,0 +1,99 @@
+# clean_format.py
+"""
+Hand-off format between the clean and ingest stages.
+
+- .parquet            typed, compressed; read with memory_map and record batches
+- .arrow / .feather   Arrow IPC file, uncompressed; memory-mapped zero-copy reads
+- .csv                plain export, parsed with csv.DictReader
+
+The Arrow schema follows the NriCounty model, so numbers keep their types
+across the hand-off instead of round-tripping through text.
+"""
+from pathlib import Path
+import csv
+
+from sqlalchemy import Float, String
+
+from app.models.models import NriCounty
+
+FORMATS = {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow", ".csv": "csv"}
+SUFFIXES = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv"}
+
+
+def format_of(path: Path) -> str:
+    fmt = FORMATS.get(Path(path).suffix.lower())
+    if fmt is None:
+        raise ValueError(f"Unknown clean-data format for {path}; expected one of {sorted(FORMATS)}")
+    return fmt
+
+
+def arrow_schema(columns):
+    """Arrow schema for the given clean columns: NriCounty types first, strings otherwise."""
+    import pyarrow as pa
+
+    model_cols = NriCounty.__table__.columns
+    fields = []
+    for name in columns:
+        col = model_cols.get(name)
+        if col is not None and isinstance(col.type, Float):
+            fields.append(pa.field(name, pa.float64()))
+        elif col is not None and isinstance(col.type, String):
+            fields.append(pa.field(name, pa.string()))
+        else:
+            fields.append(pa.field(name, pa.float64() if name.endswith("_score") else pa.string()))
+    return pa.schema(fields)
+
+
+def write_clean(frame, path: Path) -> Path:
+    """Write a cleaned DataFrame in the format implied by the path suffix."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fmt = format_of(path)
+    # Every format is written next to the target and renamed into place, so
+    # an ingest running meanwhile reads the old file or the new one
+    tmp = path.with_name(path.name + ".tmp")
+    if fmt == "csv":
+        frame.to_csv(tmp, index=False)
+        tmp.replace(path)
+        return path
+
+    import pyarrow as pa
+    table = pa.Table.from_pandas(frame, schema=arrow_schema(frame.columns), preserve_index=False)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, tmp)
+    else:
+        with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=65_536)
+    tmp.replace(path)
+    return path
+
+
+def _batch_rows(batch):
+    # Column-wise conversion is much cheaper than RecordBatch.to_pylist()
+    cols = batch.to_pydict()
+    names = list(cols)
+    for values in zip(*cols.values()):
+        yield dict(zip(names, values))
+
+
+def iter_rows(path: Path, batch_size: int = 10_000):
+    """Yield clean rows as dicts, reading `batch_size` rows at a time."""
+    path = Path(path)
+    fmt = format_of(path)
+    if fmt == "csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+        return
+
+    import pyarrow as pa
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=batch_size)
+        for batch in batches:
+            yield from _batch_rows(batch)
+    else:
+        with pa.memory_map(str(path), "r") as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield from _batch_rows(reader.get_batch(i))
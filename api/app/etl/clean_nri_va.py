@@ -1,7 +1,16 @@
 # clean_nri_va.py
 from pathlib import Path
+from typing import TYPE_CHECKING
+import csv
 import os
-import pandas as pd
+from functools import partial
+
+from app.etl.clean_format import SUFFIXES, write_clean
+from app.etl.manifest import INCREMENTAL, Manifest
+from app.services.states import ABBR_TO_FIPS, STATE_KEYS
+
+if TYPE_CHECKING:
+    import pandas as pd    # imported lazily: only the clean step needs it
 
 
 # ---------- Path helpers ----------
@@ -59,41 +68,110 @@ def get_out_path() -> Path:
     return (repo_root() / "data" / "clean" / "nri_va_clean.csv").resolve()
 
 
-RAW_PATH: Path = get_raw_path()
-OUT_PATH: Path = get_out_path()
+def get_tract_out_path() -> Path:
+    """NRI_TRACT_CLEAN_CSV, else nri_tract_clean.csv next to the county output."""
+    env_path = os.environ.get("NRI_TRACT_CLEAN_CSV")
+    return Path(env_path or get_out_path().with_name("nri_tract_clean.csv")).resolve()
 
 
-# ---------- IO helpers ----------
-def load_any(path: Path) -> pd.DataFrame:
-    path_str = str(path)
-    if path_str.lower().endswith((".xlsx", ".xls")):
-        return pd.read_excel(path_str)
-    return pd.read_csv(path_str)
 
 
 # ---------- Config ----------
 CANDIDATES = {
     "county_fips": ["COUNTYFIPS", "CountyFIPS", "FIPS", "GEOID", "County FIPS", "CountyFips"],
     "county":      ["COUNTY", "County", "County Name", "COUNTY_NAME"],
-    "state":       ["STATE", "State", "STATEABBR", "State Abbr", "STATE_ABBR"],
+    "state":       ["STATEABBRV", "STATE", "State", "STATEABBR", "State Abbr", "STATE_ABBR"],
     "risk_score":  ["RISK_SCORE", "RiskScore", "Risk Score", "RISK SCORE"],
 
+    # Optional identifiers (national exports); used to build FIPS without lookups
+    "stco_fips":   ["STCOFIPS", "STCO_FIPS"],
+    "state_fips":  ["STATEFIPS", "STATE_FIPS"],
+    "tract_fips":  ["TRACTFIPS", "TRACT_FIPS"],
+
     # Optional fields
     "sovi_score":        ["SOVI_SCORE", "SOVI Score", "SOVI"],
     "resilience_score":  ["RESL_SCORE", "RESILIENCE_SCORE", "RESL Score", "RESL"],
 
     # Optional hazard scores
-    "flood_score":       ["RFLD_RISK_SCORE", "CFLD_RISK_SCORE", "FLD_RISK_SCORE", "RFLD_RISKSCORE"],
-    "heat_score":        ["HWAV_RISK_SCORE", "HEAT_RISK_SCORE", "HWAV_RISKSCORE"],
-    "wildfire_score":    ["WFIR_RISK_SCORE", "WFIR_RISKSCORE"],
-    "tornado_score":     ["TRND_RISK_SCORE", "TORN_RISK_SCORE", "TRND_RISKSCORE"],
-    "winter_score":      ["WNTR_RISK_SCORE", "WINTER_RISK_SCORE", "WNTR_RISKSCORE"],
-    "hurricane_score":   ["HRCN_RISK_SCORE", "HURR_RISK_SCORE", "HRCN_RISKSCORE"],
+    # (FEMA's own export names them <HAZARD>_RISKS)
+    "flood_score":       ["RFLD_RISK_SCORE", "CFLD_RISK_SCORE", "FLD_RISK_SCORE", "RFLD_RISKSCORE", "RFLD_RISKS"],
+    "heat_score":        ["HWAV_RISK_SCORE", "HEAT_RISK_SCORE", "HWAV_RISKSCORE", "HWAV_RISKS"],
+    "wildfire_score":    ["WFIR_RISK_SCORE", "WFIR_RISKSCORE", "WFIR_RISKS"],
+    "tornado_score":     ["TRND_RISK_SCORE", "TORN_RISK_SCORE", "TRND_RISKSCORE", "TRND_RISKS"],
+    "winter_score":      ["WNTR_RISK_SCORE", "WINTER_RISK_SCORE", "WNTR_RISKSCORE", "WNTW_RISKS"],
+    "hurricane_score":   ["HRCN_RISK_SCORE", "HURR_RISK_SCORE", "HRCN_RISKSCORE", "HRCN_RISKS"],
+
+    # Optional expected annual loss: composite score, total $, per-hazard total $
+    "eal_score":         ["EAL_SCORE"],
+    "eal_total":         ["EAL_VALT"],
+    "flood_eal":         ["RFLD_EALT"],
+    "heat_eal":          ["HWAV_EALT"],
+    "wildfire_eal":      ["WFIR_EALT"],
+    "tornado_eal":       ["TRND_EALT"],
+    "winter_eal":        ["WNTW_EALT", "WNTR_EALT"],
+    "hurricane_eal":     ["HRCN_EALT"],
 }
 
-STATE_TO_FIPS = {
-    "VA": "51", "VIRGINIA": "51",
-}
+# Helper identifiers that never reach the clean output
+ID_HELPERS = ("stco_fips", "state_fips")
+
+# State abbreviation or full name (upper-cased) -> 2-digit state FIPS
+STATE_TO_FIPS = {key: ABBR_TO_FIPS[abbr] for key, abbr in STATE_KEYS.items()}
+
+NUMERIC_COLS = [
+    "risk_score", "sovi_score", "resilience_score",
+    "flood_score", "heat_score", "wildfire_score",
+    "tornado_score", "winter_score", "hurricane_score",
+    "eal_score", "eal_total", "flood_eal", "heat_eal",
+    "wildfire_eal", "tornado_eal", "winter_eal", "hurricane_eal",
+]
+
+# Read as text so FIPS codes keep their leading zeros
+TEXT_KEYS = ("county_fips", "county", "state", "stco_fips", "state_fips", "tract_fips")
+
+
+# ---------- IO helpers ----------
+def is_excel(path: Path) -> bool:
+    return str(path).lower().endswith((".xlsx", ".xls"))
+
+
+def read_header(path: Path) -> list:
+    """Column names only; no data rows are parsed."""
+    if is_excel(path):
+        import pandas as pd
+        return [str(c) for c in pd.read_excel(str(path), nrows=0).columns]
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return next(csv.reader(f), [])
+
+
+def resolve_columns(header) -> dict:
+    """Canonical key -> source column for every CANDIDATES entry present in `header`."""
+    mapping = {key: _pick(header, opts) for key, opts in CANDIDATES.items()}
+    return {k: v for k, v in mapping.items() if v is not None}
+
+
+def load_any(path: Path) -> "pd.DataFrame":
+    """
+    Read only the columns CANDIDATES maps (a national export has ~465, we keep
+    ~25), with identifiers as text and scores as float64 from the start.
+    """
+    import pandas as pd
+
+    mapping = resolve_columns(read_header(path))
+    usecols = list(dict.fromkeys(mapping.values()))
+    dtype = {col: (str if key in TEXT_KEYS else "float64") for key, col in mapping.items()}
+    if is_excel(path):
+        reader = pd.read_excel
+    else:
+        # "pyarrow" parses ~3x faster but peaks higher in memory than "c"
+        engine = os.environ.get("NRI_CSV_ENGINE", "c")
+        reader = partial(pd.read_csv, engine=engine)
+    try:
+        return reader(str(path), usecols=usecols, dtype=dtype)
+    except ValueError:
+        # Stray text in a numeric column: read scores as text, clean_frame coerces them
+        text_only = {col: str for col, t in dtype.items() if t is str}
+        return reader(str(path), usecols=usecols, dtype=text_only)
 
 
 # ---------- ETL ----------
@@ -111,14 +189,18 @@ def _pick(colnames, options):
     return None
 
 
-def run():
-    if not RAW_PATH.exists():
-        raise FileNotFoundError(
-            f"Raw NRI file not found at {RAW_PATH}. "
-            "Ensure Docker mounts ./data → /data or the local path exists."
-        )
+def _digits(col: "pd.Series") -> "pd.Series":
+    """Numeric-looking codes as strings: 51001.0 -> '51001'."""
+    return col.astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+
+
+def clean_frame(df: "pd.DataFrame"):
+    """
+    Map, normalize and build FIPS for one NRI export with vectorized string ops.
+    Returns (level, frame) where level is "county" or "tract".
+    """
+    import pandas as pd
 
-    df = load_any(RAW_PATH)
     cols = list(df.columns)
 
     # Map canonical names -> actual columns
@@ -126,6 +208,8 @@ def run():
 
     # Required columns
     required = ["county_fips", "county", "state", "risk_score"]
+    if mapping.get("tract_fips") or mapping.get("stco_fips"):
+        required.remove("county_fips")   # derived from tract/STCO codes
     missing = [k for k in required if mapping.get(k) is None]
     if missing:
         raise KeyError(f"Missing required columns {missing}. Found headers: {cols}")
@@ -135,39 +219,118 @@ def run():
     slim = df[[mapping[k] for k in keep_keys]].copy()
     slim.columns = keep_keys
 
-    # Normalize
+    # Normalize; state becomes the 2-letter abbreviation when we know it
     slim["county"] = slim["county"].astype(str).str.strip()
-    slim["state"] = slim["state"].astype(str).str.strip()
+    state_raw = slim["state"].astype(str).str.strip()
+    slim["state"] = state_raw.str.upper().map(STATE_KEYS).fillna(state_raw)
 
     # Build full 5-digit FIPS: state(2) + county(3)
-    def _mk_full_fips(row):
-        raw = str(row["county_fips"]).replace(".0", "").strip()
-        county3 = raw[-3:].zfill(3)
-        state_key = str(row["state"]).strip()
-        state_fips = STATE_TO_FIPS.get(state_key) or STATE_TO_FIPS.get(state_key.upper())
-        if not state_fips:
-            return raw.zfill(5)
-        return f"{state_fips}{county3}"
-
-    slim["county_fips"] = slim.apply(_mk_full_fips, axis=1)
+    if "tract_fips" in slim.columns:
+        slim["tract_fips"] = _digits(slim["tract_fips"]).str.zfill(11)
+    if "stco_fips" in slim.columns:
+        full = _digits(slim["stco_fips"]).str.zfill(5)
+    elif "tract_fips" in slim.columns:
+        full = slim["tract_fips"].str[:5]
+    else:
+        raw = _digits(slim["county_fips"])
+        county3 = raw.str[-3:].str.zfill(3)
+        if "state_fips" in slim.columns:
+            state_fips = _digits(slim["state_fips"]).str.zfill(2)
+        else:
+            state_fips = slim["state"].str.upper().map(STATE_TO_FIPS)
+        full = (state_fips + county3).where(state_fips.notna(), raw.str.zfill(5))
+    slim["county_fips"] = full
+
+    slim = slim.drop(columns=[c for c in ID_HELPERS if c in slim.columns])
 
     # Coerce numerics if present
-    numeric_cols = [
-        "risk_score", "sovi_score", "resilience_score",
-        "flood_score", "heat_score", "wildfire_score",
-        "tornado_score", "winter_score", "hurricane_score",
-    ]
-    for c in numeric_cols:
+    for c in NUMERIC_COLS:
         if c in slim.columns:
             slim[c] = pd.to_numeric(slim[c], errors="coerce")
 
-    # Write
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    slim.to_csv(OUT_PATH, index=False)
-    print(
-        f"Cleaned NRI VA → {OUT_PATH.resolve()} "
-        f"with {len(slim)} rows; columns: {list(slim.columns)}"
-    )
+    level = "tract" if "tract_fips" in slim.columns else "county"
+    return level, slim
+
+
+def write_partitions(frame: "pd.DataFrame", level: str, root: Path):
+    """<root>/<level>/state=<ABBR>.csv, one file per state."""
+    out_dir = root / level
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for state, part in frame.groupby("state", sort=True):
+        write_clean(part, out_dir / f"state={state}.csv")
+
+
+def get_input_paths() -> list:
+    """Exports listed in NRI_RAW_PATHS (os.pathsep-separated), else get_raw_path()."""
+    extra = os.environ.get("NRI_RAW_PATHS", "")
+    paths = [Path(p).resolve() for p in extra.split(os.pathsep) if p.strip()]
+    return paths or [get_raw_path()]
+
+
+def get_out_formats() -> list:
+    """NRI_CLEAN_FORMATS, e.g. 'parquet,csv' (first one is what ingest prefers)."""
+    raw = os.environ.get("NRI_CLEAN_FORMATS", "parquet,csv")
+    formats = [f.strip().lower() for f in raw.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in SUFFIXES]
+    if unknown:
+        raise ValueError(f"Unknown clean formats {unknown}; expected some of {sorted(SUFFIXES)}")
+    return formats or ["csv"]
+
+
+STAGE = "clean_nri_va"
+
+
+def run(paths=None, incremental: bool = None):
+    paths = [Path(p) for p in (paths or get_input_paths())]
+    for path in paths:
+        if not path.exists():
+            raise FileNotFoundError(
+                f"Raw NRI file not found at {path}. "
+                "Ensure Docker mounts ./data → /data or the local path exists."
+            )
+
+    # Same raw files (by content) and untouched outputs: nothing to redo
+    incremental = INCREMENTAL if incremental is None else incremental
+    manifest = Manifest.load()
+    inputs = manifest.fingerprints(STAGE, paths)
+    config = {"formats": get_out_formats(), "partitions": os.environ.get("NRI_CLEAN_PARTITION_DIR") or None}
+    if incremental and manifest.stage(STAGE).get("config") == config and manifest.unchanged(STAGE, inputs):
+        print(f"[clean] inputs unchanged since {manifest.stage(STAGE)['finished_at']}; skipping")
+        return []
+
+    import pandas as pd
+
+    # County and tract exports can be mixed; each level is cleaned in one pass
+    frames = {"county": [], "tract": []}
+    for path in paths:
+        level, slim = clean_frame(load_any(path))
+        frames[level].append(slim)
+
+    partition_root = os.environ.get("NRI_CLEAN_PARTITION_DIR")
+    outputs = {"county": get_out_path(), "tract": get_tract_out_path()}
+    all_written = []
+    for level, parts in frames.items():
+        if not parts:
+            continue
+        slim = pd.concat(parts, ignore_index=True)
+
+        # Write (typed columnar file for ingest; CSV as an export)
+        written = [
+            write_clean(slim, outputs[level].with_suffix(SUFFIXES[fmt]))
+            for fmt in get_out_formats()
+        ]
+        all_written += written
+        if partition_root:
+            write_partitions(slim, level, Path(partition_root))
+        print(
+            f"Cleaned NRI {level} → {', '.join(str(p) for p in written)} "
+            f"with {len(slim)} rows across {slim['state'].nunique()} states; "
+            f"columns: {list(slim.columns)}"
+        )
+
+    manifest.record(STAGE, inputs, all_written, config=config)
+    manifest.save()
+    return all_written
 
 
 if __name__ == "__main__":
@@ -2,9 +2,20 @@
 from pathlib import Path
 import os
 import re
-import pandas as pd
-from sqlalchemy import text
+from typing import TYPE_CHECKING
+from sqlalchemy import delete, inspect, text
+from app.etl.bulk import copy_merge, upsert_batches
+from app.etl.manifest import INCREMENTAL, Manifest, row_hash
+from app.models.models import AcsIndicator
 from app.services.db import SessionLocal
+from app.services.dataset import bump_version, get_version
+from app.migrate import migrate
+
+if TYPE_CHECKING:
+    import pandas as pd    # imported lazily inside the functions that read data
+
+# Dataset name bumped after each load (nri_county itself is no longer touched)
+ACS_DATASET = "acs_indicator"
 
 # ---------------- Path helpers ----------------
 def repo_root() -> Path:
@@ -39,18 +50,70 @@ def get_input_path() -> Path:
         return Path(envp).resolve()
     return default_data_path()
 
-INPUT_PATH = get_input_path()
+def get_vintage(path: Path) -> int:
+    """
+    Priority:
+      1) ACS5_VINTAGE env var
+      2) first 4-digit year in the file name (cdc_svi_acs5_2024_... -> 2024)
+    """
+    envv = os.environ.get("ACS5_VINTAGE")
+    if envv:
+        return int(envv)
+    m = re.search(r"(?<!\d)(19|20)\d{2}(?!\d)", path.name)
+    if not m:
+        raise ValueError(f"Cannot infer ACS vintage from {path.name}; set ACS5_VINTAGE")
+    return int(m.group(0))
+
+# Rows per INSERT/COPY batch when loading the long indicator table
+LOAD_BATCH = int(os.environ.get("ACS5_LOAD_BATCH", "10000"))
+INDICATOR_COLS = ["county_fips", "indicator", "vintage", "value"]
+INDICATOR_KEY = ["county_fips", "indicator", "vintage"]
 
-# Staging table for ACS; override via env if you like
-STAGE_TABLE = os.environ.get("ACS5_VA_STAGE", "acs5_va_stage")
+# Rows per chunk in streaming mode; peak memory scales with this, not file size
+CHUNK_ROWS = int(os.environ.get("ACS5_CHUNK_ROWS", "5000"))
 
 # ---------------- IO helpers ----------------
-def load_any(path: Path) -> pd.DataFrame:
+def load_any(path: Path) -> "pd.DataFrame":
+    import pandas as pd
+
     s = str(path)
     if s.lower().endswith((".xlsx", ".xls")):
         return pd.read_excel(s)        # first sheet by default
     return pd.read_csv(s)
 
+def iter_chunks(path: Path, chunk_rows: int = CHUNK_ROWS):
+    """
+    Yield the first sheet (or CSV) as DataFrames of at most `chunk_rows` rows.
+    .xlsx is streamed with openpyxl read-only mode; CSV with pandas chunksize.
+    """
+    import pandas as pd
+
+    s = str(path)
+    if not s.lower().endswith(".xlsx"):
+        if s.lower().endswith(".xls"):
+            yield load_any(path)       # legacy .xls has no streaming reader
+            return
+        yield from pd.read_csv(s, chunksize=chunk_rows)
+        return
+
+    from openpyxl import load_workbook
+    wb = load_workbook(s, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = [str(h) if h is not None else f"unnamed_{i}" for i, h in enumerate(next(rows, ()))]
+        buf = []
+        for row in rows:
+            if row is None or all(v is None for v in row):
+                continue
+            buf.append(row)
+            if len(buf) >= chunk_rows:
+                yield pd.DataFrame(buf, columns=header)
+                buf = []
+        if buf:
+            yield pd.DataFrame(buf, columns=header)
+    finally:
+        wb.close()
+
 # ---------------- Normalization ----------------
 IDENT_RENAMES = {
     "FIPS": "county_fips",
@@ -74,17 +137,19 @@ def clean_county_name(name: str) -> str:
     s = re.sub(r"^(City of)\s+", "", s, flags=re.IGNORECASE).strip()
     return s
 
-def _pick_series(df: pd.DataFrame, name: str) -> pd.Series:
+def _pick_series(df: "pd.DataFrame", name: str) -> "pd.Series":
     """
     Return a single Series even if df[name] is duplicated (DataFrame).
     Keeps the first duplicated column.
     """
+    import pandas as pd
+
     col = df[name]
     if isinstance(col, pd.DataFrame):
         col = col.iloc[:, 0]
     return col
 
-def normalize_and_slice(df: pd.DataFrame):
+def normalize_and_slice(df: "pd.DataFrame"):
     """
     - Rename identifiers
     - De-duplicate same-named columns
@@ -92,6 +157,8 @@ def normalize_and_slice(df: pd.DataFrame):
     - Identify 'AREA_SQMI' (case-insensitive) and return columns from it to the end
     - Build staged DataFrame with county_fips + acs_*[AREA_SQMI..end]
     """
+    import pandas as pd
+
     # 1) rename IDs; lower-case all others
     cols_norm = {}
     for c in df.columns:
@@ -137,7 +204,8 @@ def normalize_and_slice(df: pd.DataFrame):
     for c in extras:
         if c == "county_fips":
             continue
-        df[c] = pd.to_numeric(df[c], errors="coerce")
+        # always float so every chunk maps to the same SQL column type
+        df[c] = pd.to_numeric(df[c], errors="coerce").astype("float64")
 
     # 6) build staged frame and prefix with acs_
     sliced = df[extras].copy()
@@ -146,58 +214,153 @@ def normalize_and_slice(df: pd.DataFrame):
 
     return df, sliced
 
+def to_long(df_stage: "pd.DataFrame", vintage: int, keep_missing: bool = False) -> "pd.DataFrame":
+    """
+    county_fips + acs_* wide frame -> (county_fips, indicator, vintage, value) rows.
+    keep_missing: emit NaN values (as NULL) so an upsert clears values that went missing.
+    """
+    long = df_stage.melt(id_vars="county_fips", var_name="indicator", value_name="value")
+    if keep_missing:
+        long["value"] = long["value"].astype(object).where(long["value"].notna(), None)
+    else:
+        long = long.dropna(subset=["value"])
+    long["indicator"] = long["indicator"].str.removeprefix("acs_")
+    long["vintage"] = vintage
+    return long[INDICATOR_COLS]
+
+def iter_indicator_batches(path: Path, vintage: int, stats: dict, known: dict = None):
+    """
+    Normalize each input chunk and yield lists of indicator rows (dicts).
+    With `known` (county_fips -> row hash from the last run) only counties whose
+    row changed are emitted; stats["hashes"] collects every county's hash.
+    """
+    hashes = stats.setdefault("hashes", {})
+    for chunk in iter_chunks(path):
+        _, df_stage = normalize_and_slice(chunk)
+        if "indicators" not in stats:
+            stats["indicators"] = df_stage.shape[1] - 1
+            print(f"[acs5] cleaned county names; loading {stats['indicators']} ACS indicators starting at AREA_SQMI")
+        stats["counties"] = stats.get("counties", 0) + len(df_stage)
+
+        columns = tuple(df_stage.columns)
+        row_hashes = [row_hash((columns, *row)) for row in df_stage.itertuples(index=False, name=None)]
+        hashes.update(zip(df_stage["county_fips"], row_hashes))
+        if known is not None:
+            changed = [known.get(f) != h for f, h in zip(df_stage["county_fips"], row_hashes)]
+            df_stage = df_stage[changed]
+            stats["changed"] = stats.get("changed", 0) + len(df_stage)
+        long = to_long(df_stage, vintage, keep_missing=known is not None)
+        for start in range(0, len(long), LOAD_BATCH):
+            yield long.iloc[start:start + LOAD_BATCH].to_dict("records")
+
 # ---------------- Main ----------------
-def run():
-    if not INPUT_PATH.exists():
+STAGE = "ingest_acs5_va"
+
+def run(vintage: int = None, incremental: bool = None):
+    migrate()
+    input_path = get_input_path()
+    if not input_path.exists():
         raise FileNotFoundError(
-            f"Input not found at {INPUT_PATH}\n"
+            f"Input not found at {input_path}\n"
             "Set ACS5_VA_PATH to override, or place the file at:\n"
             "  - Docker: /data/raw/cdc_svi_acs5_2024_va_county.xlsx\n"
             "  - Local:  <repo>/data/raw/cdc_svi_acs5_2024_va_county.xlsx"
         )
 
-    print(f"[acs5] reading {INPUT_PATH}")
-    raw = load_any(INPUT_PATH)
-    df_full, df_stage = normalize_and_slice(raw)
-
-    print(f"[acs5] cleaned county names; staging {df_stage.shape[1]-1} ACS columns starting at AREA_SQMI")
+    vintage = vintage or get_vintage(input_path)
+    incremental = INCREMENTAL if incremental is None else incremental
+    manifest = Manifest.load()
+    inputs = manifest.fingerprints(STAGE, [input_path])
+    prev = manifest.stage(STAGE)
 
+    table = AcsIndicator.__table__
     session = SessionLocal()
     try:
-        engine = session.get_bind()
+        dialect = session.get_bind().dialect.name
+
+        # Row hashes from the last run are only trusted if nothing else has
+        # loaded acs_indicator since, and they describe the same vintage
+        in_sync = (incremental and prev.get("vintage") == vintage
+                   and prev.get("version") == get_version(session, ACS_DATASET))
+        if in_sync and manifest.unchanged(STAGE, inputs):
+            print(f"[acs5] {input_path} (vintage {vintage}) unchanged since {prev['finished_at']}; skipping")
+            return 0
+
+        known = prev.get("rows", {}) if in_sync else None
+        print(f"[acs5] streaming {input_path} (vintage {vintage}) in chunks of {CHUNK_ROWS} rows"
+              + (" (changed counties only)" if known is not None else ""))
+
+        # Full run: replace just this vintage; other vintages stay untouched
+        if known is None:
+            session.execute(delete(AcsIndicator).where(AcsIndicator.vintage == vintage))
+
+        stats = {}
+        batches = iter_indicator_batches(input_path, vintage, stats, known)
+        if dialect == "postgresql":
+            loaded = copy_merge(session, table.name, batches, INDICATOR_KEY, INDICATOR_COLS)
+        else:
+            loaded = upsert_batches(session, table, batches, INDICATOR_KEY, INDICATOR_COLS)
+
+        if not stats.get("counties"):
+            raise ValueError(f"No rows found in {input_path}")
+
+        changed = stats["counties"] if known is None else stats.get("changed", 0)
+        removed = sorted(set(known or ()) - stats["hashes"].keys())
+        if known is not None:
+            # Incremental upserts carry NULLs for values that went missing; drop
+            # them, and the counties that are no longer in the file
+            session.execute(delete(AcsIndicator).where(
+                AcsIndicator.vintage == vintage, AcsIndicator.value.is_(None)))
+            for start in range(0, len(removed), LOAD_BATCH):
+                session.execute(delete(AcsIndicator).where(
+                    AcsIndicator.vintage == vintage, AcsIndicator.county_fips.in_(removed[start:start + LOAD_BATCH])))
+
+        if not changed and not removed:
+            session.rollback()
+            version = get_version(session, ACS_DATASET)
+            print(f"[acs5] {stats['counties']} counties match acs_indicator (vintage {vintage}); nothing to load")
+        else:
+            version = bump_version(session, ACS_DATASET)
+            session.commit()
+            print(
+                f"[acs5] loaded {loaded} indicator values for {changed} of {stats['counties']} counties "
+                f"x {stats['indicators']} indicators into {table.name} "
+                f"({len(removed)} counties removed; vintage {vintage}; {ACS_DATASET} version {version})"
+            )
 
-        # 1) write the staged ACS columns (county_fips + acs_* columns)
-        df_stage.to_sql(STAGE_TABLE, engine, if_exists="replace", index=False)
+        manifest.record(STAGE, inputs, vintage=vintage, version=version, rows=stats["hashes"])
+        manifest.save()
+        return loaded
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
 
+def drop_legacy_columns() -> list:
+    """Drop the acs_* columns older runs added to nri_county."""
+    session = SessionLocal()
+    try:
+        engine = session.get_bind()
+        legacy = [c["name"] for c in inspect(engine).get_columns("nri_county")
+                  if c["name"].startswith("acs_")]
         with engine.begin() as conn:
-            # index stage for fast join
-            conn.execute(text(f'CREATE INDEX IF NOT EXISTS idx_{STAGE_TABLE}_fips ON "{STAGE_TABLE}"(county_fips);'))
-
-            # 2) add missing columns into nri_county for each acs_* column, pick a reasonable type
-            acs_cols = [c for c in df_stage.columns if c != "county_fips"]
-
-            for c in acs_cols:
-                dtype = str(df_stage[c].dtype)
-                if dtype.startswith("Int"):
-                    sqltype = "BIGINT"
-                elif dtype.startswith(("float", "Float")):
-                    sqltype = "NUMERIC"
-                else:
-                    sqltype = "NUMERIC"
-                conn.execute(text(f'ALTER TABLE nri_county ADD COLUMN IF NOT EXISTS "{c}" {sqltype};'))
-
-            # 3) update nri_county by join on county_fips
-            set_clause = ", ".join([f'"{c}" = s."{c}"' for c in acs_cols])
-            conn.execute(text(f'''
-                UPDATE nri_county n
-                SET {set_clause}
-                FROM "{STAGE_TABLE}" s
-                WHERE s.county_fips = n.county_fips;
-            '''))
-
-        print(f"[acs5] merged {len(df_stage)} rows into nri_county (added/updated {len(acs_cols)} acs_* columns)")
+            for c in legacy:
+                conn.execute(text(f'ALTER TABLE nri_county DROP COLUMN "{c}"'))
+        print(f"[acs5] dropped {len(legacy)} legacy acs_* columns from nri_county")
+        return legacy
     finally:
         session.close()
 
 if __name__ == "__main__":
-    run()
+    import argparse
+    ap = argparse.ArgumentParser(description="Load ACS/SVI indicators into acs_indicator")
+    ap.add_argument("--vintage", type=int, help="override ACS5_VINTAGE / file-name year")
+    ap.add_argument("--drop-legacy-columns", action="store_true",
+                    help="drop acs_* columns that older runs added to nri_county")
+    ap.add_argument("--full", action="store_true", help="reload the whole vintage even if the input is unchanged")
+    args = ap.parse_args()
+    if args.drop_legacy_columns:
+        drop_legacy_columns()
+    else:
+        run(args.vintage, incremental=False if args.full else None)
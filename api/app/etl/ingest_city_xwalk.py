@@ -0,0 +1,170 @@
+# ingest_city_xwalk.py
+"""
+Load the Census place -> county relationship file into city_county_xwalk.
+
+    python -m app.etl.ingest_city_xwalk [--path PATH]
+
+Input: national_place_by_county2020.txt (pipe-delimited STATE|STATEFP|
+COUNTYFP|COUNTYNAME|PLACEFP|PLACENS|PLACENAME|TYPE|...), or any CSV / .xlsx
+with city, state and 5-digit county_fips columns. Place names lose their
+legal suffix ("Alexandria city" -> "Alexandria", "Reston CDP" -> "Reston").
+A place split across counties keeps one row: the county holding the largest
+part when the file has an area/weight column, else the first one listed.
+
+Every state present in the file is replaced as a whole; rows for other
+states are left alone. Postgres loads through COPY.
+"""
+from pathlib import Path
+import os
+import re
+import time
+from sqlalchemy import delete
+from app.etl.bulk import copy_merge, upsert_batches
+from app.etl.ingest_acs5_va import clean_county_name
+from app.etl.ingest_geo_xwalk import iter_records, pick_columns
+from app.models.models import CityCountyXwalk, NriCounty
+from app.services.db import SessionLocal
+from app.services.dataset import CITY_DATASET, bump_version, invalidate_all
+from app.services.states import FIPS_TO_ABBR, to_abbr
+from app.migrate import migrate
+
+LOAD_BATCH = int(os.environ.get("CITY_XWALK_BATCH", "5000"))
+XWALK_COLS = ["city", "state", "county", "county_fips"]
+XWALK_KEY = ["city", "state"]
+
+CANDIDATES = {
+    "city":        ["PLACENAME", "NAME", "city"],
+    "state":       ["STATE", "USPS", "state"],
+    "state_fips":  ["STATEFP"],
+    "county_fp":   ["COUNTYFP"],
+    "county_fips": ["county_fips", "GEOID_COUNTY_20", "STCOFIPS"],
+    "county":      ["COUNTYNAME", "county"],
+    "weight":      ["AREALAND_PART", "weight"],
+}
+
+# Census legal/statistical area suffixes ("Nashville-Davidson metropolitan government (balance)").
+# Case-sensitive: Census writes descriptors in lowercase ("Alexandria city"), so a
+# capitalized word is part of the name ("Carson City", "Dodge City") and stays.
+PLACE_SUFFIX = re.compile(
+    r"\s+(city and borough|consolidated government|metropolitan government|unified government|"
+    r"metro township|urban county|municipality|comunidad|zona urbana|city|town|township|village|"
+    r"borough|CDP)(\s*\(balance\))?$"
+)
+
+# -------- path helpers --------
+def repo_root() -> Path:
+    p = Path(__file__).resolve()
+    for up in (2, 3, 4):
+        try_root = p.parents[up]
+        if (try_root / "data").exists():
+            return try_root
+    return p.parents[3]
+
+def in_docker() -> bool:
+    return Path("/.dockerenv").exists()
+
+def get_input_path() -> Path:
+    """
+    Priority:
+      1) CITY_XWALK_PATH env var
+      2) national_place_by_county2020.txt under /data/raw (Docker) or <repo>/data/raw (local)
+    """
+    env_path = os.environ.get("CITY_XWALK_PATH")
+    if env_path:
+        return Path(env_path).resolve()
+    raw_dir = Path("/data/raw") if in_docker() else (repo_root() / "data" / "raw").resolve()
+    return raw_dir / "national_place_by_county2020.txt"
+
+# -------- normalization --------
+def clean_place_name(name: str) -> str:
+    s = re.sub(r"\s+", " ", str(name or "")).strip()
+    return PLACE_SUFFIX.sub("", s).strip()
+
+def _weight(v) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return 0.0
+
+def xwalk_rows(path: Path, counties: dict) -> list:
+    """One dict per (city, state), in XWALK_COLS; see the module docstring for dedup rules."""
+    records = iter_records(path)
+    first = next(records, None)
+    if first is None:
+        return []
+    m = pick_columns(first.keys(), CANDIDATES, path, required="city")
+    if "county_fips" not in m and not ("state_fips" in m and "county_fp" in m):
+        raise KeyError(f"No county FIPS (county_fips, or STATEFP + COUNTYFP) in {path}")
+
+    best = {}   # (city, state) -> (weight, row)
+    for rec in ([first], records):
+        for r in rec:
+            if "county_fips" in m:
+                fips = str(r[m["county_fips"]] or "").strip().zfill(5)
+            else:
+                fips = str(r[m["state_fips"]]).strip().zfill(2) + str(r[m["county_fp"]]).strip().zfill(3)
+            city = clean_place_name(r[m["city"]])
+            if not city or not fips.isdigit() or len(fips) != 5:
+                continue
+            state = to_abbr(str(r.get(m.get("state"), "") or "")) or FIPS_TO_ABBR.get(fips[:2], "")
+            county = counties.get(fips) or clean_county_name(r.get(m.get("county"), "") or "")
+            weight = _weight(r.get(m.get("weight")))
+            key = (city[:100], state)
+            if key not in best or weight > best[key][0]:
+                best[key] = (weight, {"city": key[0], "state": state,
+                                      "county": (county or "")[:100], "county_fips": fips})
+    return [row for _, row in best.values()]
+
+# -------- main --------
+def run(path: Path = None):
+    migrate()
+    input_path = Path(path) if path else get_input_path()
+    if not input_path.exists():
+        raise FileNotFoundError(
+            f"Place-county file not found at {input_path}. Set CITY_XWALK_PATH, or place "
+            "national_place_by_county2020.txt under /data/raw (Docker) or <repo>/data/raw (local)."
+        )
+
+    table = CityCountyXwalk.__table__
+    session = SessionLocal()
+    started = time.perf_counter()
+    try:
+        counties = dict(session.query(NriCounty.county_fips, NriCounty.county).all())
+        rows = xwalk_rows(input_path, counties)
+        if not rows:
+            raise ValueError(f"No places found in {input_path}")
+        states = sorted({r["state"] for r in rows})
+
+        # Replace the states this file covers; other states' rows are untouched
+        session.execute(delete(CityCountyXwalk).where(CityCountyXwalk.state.in_(states)))
+        batches = (rows[i:i + LOAD_BATCH] for i in range(0, len(rows), LOAD_BATCH))
+        if session.get_bind().dialect.name == "postgresql":
+            loaded = copy_merge(session, table.name, batches, XWALK_KEY, XWALK_COLS)
+        else:
+            loaded = upsert_batches(session, table, batches, XWALK_KEY, XWALK_COLS)
+
+        version = bump_version(session, CITY_DATASET)
+        session.commit()
+        invalidate_all()
+
+        elapsed = time.perf_counter() - started
+        print(
+            f"[city] loaded {loaded} places in {len(states)} states from {input_path} "
+            f"in {elapsed:.2f}s ({CITY_DATASET} version {version})"
+        )
+        if os.environ.get("SNAPSHOT_PUBLISH_PATH"):
+            from app.etl.publish_snapshot import publish
+            publish()
+        return loaded
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Load Census place -> county pairs into city_county_xwalk")
+    ap.add_argument("--path", help="relationship file (default: CITY_XWALK_PATH or data/raw/...)")
+    args = ap.parse_args()
+    run(args.path)
@@ -0,0 +1,289 @@
+# ingest_geo_xwalk.py
+"""
+Load ZIP -> county and tract -> county crosswalks into geo_unit.
+
+    python -m app.etl.ingest_geo_xwalk [--zip PATH] [--tract PATH]
+
+ZIP input: HUD USPS ZIP_COUNTY (ZIP, COUNTY, RES_RATIO, USPS_ZIP_PREF_CITY,
+USPS_ZIP_PREF_STATE) or the Census ZCTA-county relationship file
+(GEOID_ZCTA5_20, GEOID_COUNTY_20, AREALAND_PART), as .csv/.txt or .xlsx.
+Tract input: anything with a tract GEOID column: the clean NRI tract
+export (default), or a Census tract gazetteer / relationship file.
+
+Rows are synced by (geo_type, code, county_fips): unchanged rows keep their
+id, so metrics.geo_id references survive reloads.
+"""
+from pathlib import Path
+import csv
+import os
+import re
+import time
+from sqlalchemy import bindparam, delete, select, update
+from app.etl.clean_nri_va import get_tract_out_path
+from app.models.models import GeoUnit, NriCounty
+from app.services.db import SessionLocal
+from app.services.dataset import GEO_DATASET, bump_version, invalidate_all
+from app.services.states import FIPS_TO_ABBR
+from app.migrate import migrate
+
+LOAD_BATCH = int(os.environ.get("GEO_XWALK_BATCH", "5000"))
+
+# Source header candidates per field (first present wins)
+ZIP_CANDIDATES = {
+    "code":        ["ZIP", "ZCTA5", "GEOID_ZCTA5_20", "zip"],
+    "county_fips": ["COUNTY", "GEOID_COUNTY_20", "STCOFIPS", "county_fips"],
+    "weight":      ["RES_RATIO", "TOT_RATIO", "AREALAND_PART", "weight"],
+    "name":        ["USPS_ZIP_PREF_CITY", "CITY", "name"],
+    "state":       ["USPS_ZIP_PREF_STATE", "STATE", "state"],
+}
+TRACT_CANDIDATES = {
+    "code":        ["tract_fips", "TRACTFIPS", "GEOID_TRACT_20", "GEOID"],
+    "state":       ["state", "STATEABBRV", "USPS"],
+}
+
+# -------- path helpers --------
+def repo_root() -> Path:
+    p = Path(__file__).resolve()
+    for up in (2, 3, 4):
+        try_root = p.parents[up]
+        if (try_root / "data").exists():
+            return try_root
+    return p.parents[3]
+
+def in_docker() -> bool:
+    return Path("/.dockerenv").exists()
+
+def get_zip_path() -> Path:
+    """
+    Priority:
+      1) ZIP_COUNTY_PATH env var
+      2) ZIP_COUNTY.xlsx, else ZIP_COUNTY.csv, under /data/raw (Docker) or <repo>/data/raw (local)
+    """
+    env_path = os.environ.get("ZIP_COUNTY_PATH")
+    if env_path:
+        return Path(env_path).resolve()
+    raw_dir = Path("/data/raw") if in_docker() else (repo_root() / "data" / "raw").resolve()
+    for name in ("ZIP_COUNTY.xlsx", "ZIP_COUNTY.csv"):
+        if (raw_dir / name).exists():
+            return raw_dir / name
+    return raw_dir / "ZIP_COUNTY.csv"
+
+def get_tract_path() -> Path:
+    """
+    Priority:
+      1) TRACT_XWALK_PATH env var
+      2) the clean NRI tract export (NRI_TRACT_CLEAN_CSV / nri_tract_clean.csv)
+    """
+    env_path = os.environ.get("TRACT_XWALK_PATH")
+    if env_path:
+        return Path(env_path).resolve()
+    return get_tract_out_path()
+
+# -------- readers --------
+def _cell(v) -> str:
+    """Spreadsheet cell as text; whole-number floats lose their ".0" (20147.0 -> "20147")."""
+    if v is None:
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+def iter_records(path: Path):
+    """
+    Yield dict rows from .xlsx (streamed, first sheet) or delimited text (, | or tab).
+    Every value is a string, so codes are never parsed as numbers.
+    """
+    if str(path).lower().endswith(".xlsx"):
+        from openpyxl import load_workbook
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = wb.worksheets[0].iter_rows(values_only=True)
+            header = [str(h).strip() if h is not None else "" for h in next(rows, ())]
+            for row in rows:
+                if row and any(v is not None for v in row):
+                    yield {h: _cell(v) for h, v in zip(header, row)}
+        finally:
+            wb.close()
+        return
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        first = f.readline()
+        f.seek(0)
+        delimiter = max(",|\t", key=first.count)
+        yield from csv.DictReader(f, delimiter=delimiter)
+
+def pick_columns(header, candidates: dict, path: Path, required: str = "code") -> dict:
+    """field -> source column (first candidate present); `required` must be found."""
+    by_lower = {h.lower(): h for h in header}
+    mapping = {}
+    for field, names in candidates.items():
+        for n in names:
+            if n.lower() in by_lower:
+                mapping[field] = by_lower[n.lower()]
+                break
+    if required not in mapping:
+        raise KeyError(f"No {required} column ({candidates[required]}) in {path}; found {list(header)}")
+    return mapping
+
+TRAILING_ZERO = re.compile(r"\.0+$")
+
+def _digits(v, width: int) -> str:
+    """Code text -> zero-padded digits ("1234" -> "01234"), or "" if it isn't numeric."""
+    s = TRAILING_ZERO.sub("", str(v or "").strip())
+    return s.zfill(width) if s.isdigit() else ""
+
+def _float(v):
+    try:
+        return float(v) if v not in ("", None) else None
+    except ValueError:
+        return None
+
+def zip_rows(path: Path, counties: dict):
+    """Crosswalk pairs as geo_unit dicts; one per (ZIP, county)."""
+    records = iter_records(path)
+    first = next(records, None)
+    if first is None:
+        return
+    m = pick_columns(first.keys(), ZIP_CANDIDATES, path)
+    if "county_fips" not in m:
+        raise KeyError(f"No county column ({ZIP_CANDIDATES['county_fips']}) in {path}")
+    for rec in ([first], records):
+        for r in rec:
+            code, fips = _digits(r[m["code"]], 5), _digits(r[m["county_fips"]], 5)
+            if not code or not fips:
+                continue
+            county, state = counties.get(fips, ("", FIPS_TO_ABBR.get(fips[:2], "")))
+            yield {
+                "geo_type": "ZIP", "code": code, "county_fips": fips,
+                "weight": _float(r.get(m.get("weight"), "")),
+                "name": (r.get(m.get("name"), "") or code).strip().title()[:128],
+                "state": ((r.get(m.get("state"), "") or state).strip().upper())[:2],
+                "county": county[:64],
+            }
+
+def tract_name(code: str) -> str:
+    """'51059480102' -> 'Census Tract 4801.02'; '...480100' -> 'Census Tract 4801'."""
+    base, suffix = int(code[5:9]), code[9:]
+    return f"Census Tract {base}" if suffix == "00" else f"Census Tract {base}.{suffix}"
+
+def tract_rows(path: Path, counties: dict):
+    """One geo_unit dict per tract; the county is the GEOID's first 5 digits."""
+    records = iter_records(path)
+    first = next(records, None)
+    if first is None:
+        return
+    m = pick_columns(first.keys(), TRACT_CANDIDATES, path)
+    for rec in ([first], records):
+        for r in rec:
+            code = _digits(r[m["code"]], 11)
+            if len(code) != 11:
+                continue
+            fips = code[:5]
+            county, state = counties.get(fips, ("", FIPS_TO_ABBR.get(fips[:2], "")))
+            yield {
+                "geo_type": "TRACT", "code": code, "county_fips": fips, "weight": 1.0,
+                "name": tract_name(code),
+                "state": ((r.get(m.get("state"), "") or state).strip().upper())[:2],
+                "county": county[:64],
+            }
+
+# -------- load --------
+SYNC_COLS = ("name", "state", "county", "weight")
+
+def _batches(items: list, size: int = LOAD_BATCH):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def sync_geo_type(session, geo_type: str, rows) -> dict:
+    """
+    Make geo_unit's `geo_type` rows equal `rows`: insert new (code, county)
+    pairs, update changed ones in place, delete the ones no longer present.
+    """
+    existing = {
+        (code, fips): (gid, (name, state, county, weight))
+        for gid, code, fips, name, state, county, weight in session.execute(
+            select(GeoUnit.id, GeoUnit.code, GeoUnit.county_fips, *(getattr(GeoUnit, c) for c in SYNC_COLS))
+            .where(GeoUnit.geo_type == geo_type)
+        )
+    }
+
+    inserts, updates, seen = [], [], set()
+    for r in rows:
+        key = (r["code"], r["county_fips"])
+        if key in seen:
+            continue
+        seen.add(key)
+        old = existing.get(key)
+        if old is None:
+            inserts.append(r)
+        elif old[1] != tuple(r[c] for c in SYNC_COLS):
+            updates.append({"gid": old[0], **{c: r[c] for c in SYNC_COLS}})
+    stale = [gid for key, (gid, _) in existing.items() if key not in seen]
+
+    table = GeoUnit.__table__
+    for batch in _batches(inserts):
+        session.execute(table.insert(), batch)
+    upd = update(table).where(table.c.id == bindparam("gid")).values({c: bindparam(c) for c in SYNC_COLS})
+    for batch in _batches(updates):
+        session.execute(upd, batch)
+    for batch in _batches(stale):
+        session.execute(delete(table).where(table.c.id.in_(batch)))
+
+    return {"inserted": len(inserts), "updated": len(updates), "deleted": len(stale), "total": len(seen)}
+
+def run(zip_path: Path = None, tract_path: Path = None):
+    migrate()
+    sources = []
+    zip_path = Path(zip_path) if zip_path else get_zip_path()
+    tract_path = Path(tract_path) if tract_path else get_tract_path()
+    if zip_path.exists():
+        sources.append(("ZIP", zip_path, zip_rows))
+    if tract_path.exists():
+        sources.append(("TRACT", tract_path, tract_rows))
+    if not sources:
+        raise FileNotFoundError(
+            f"No crosswalk input found (ZIP: {zip_path}, tract: {tract_path}). "
+            "Set ZIP_COUNTY_PATH / TRACT_XWALK_PATH, or place ZIP_COUNTY.xlsx|csv "
+            "under /data/raw (Docker) or <repo>/data/raw (local)."
+        )
+
+    session = SessionLocal()
+    started = time.perf_counter()
+    try:
+        counties = {
+            fips: (county, state)
+            for fips, county, state in session.execute(
+                select(NriCounty.county_fips, NriCounty.county, NriCounty.state)
+            )
+        }
+        results = {}
+        for geo_type, path, reader in sources:
+            results[geo_type] = sync_geo_type(session, geo_type, reader(path, counties))
+            print(f"[geo] {geo_type} from {path}: {results[geo_type]}")
+
+        changed = any(r["inserted"] or r["updated"] or r["deleted"] for r in results.values())
+        version = bump_version(session, GEO_DATASET) if changed else None
+        session.commit()
+        if changed:
+            invalidate_all()
+
+        elapsed = time.perf_counter() - started
+        status = f"{GEO_DATASET} version {version}" if changed else "no changes"
+        print(f"[geo] crosswalks loaded in {elapsed:.2f}s ({status})")
+        if changed and os.environ.get("SNAPSHOT_PUBLISH_PATH"):
+            from app.etl.publish_snapshot import publish
+            publish()
+        return results
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Load ZIP/tract -> county crosswalks into geo_unit")
+    ap.add_argument("--zip", help="ZIP-county file (default: ZIP_COUNTY_PATH or data/raw/ZIP_COUNTY.*)")
+    ap.add_argument("--tract", help="tract file (default: TRACT_XWALK_PATH or the clean NRI tract export)")
+    args = ap.parse_args()
+    run(args.zip, args.tract)
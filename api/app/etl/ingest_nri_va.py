@@ -1,45 +1,51 @@
 # ingest_nri_va.py
 from pathlib import Path
-import os, csv
+import os, time
+from sqlalchemy import func, select
+from app.etl import swap
+from app.etl.bulk import copy_merge, insert_for, upsert_batches
+from app.etl.clean_format import SUFFIXES, iter_rows
+from app.etl.clean_nri_va import get_out_formats, get_out_path
+from app.etl.manifest import INCREMENTAL, Manifest, row_hash
 from app.services.db import SessionLocal
 from app.models.models import NriCounty
+from app.services.dataset import bump_version, get_version, invalidate_all, mark_states_changed
+from app.services.states import STATE_KEYS
+from app.migrate import migrate
 
 # -------- path helpers --------
-def repo_root() -> Path:
-    p = Path(__file__).resolve()
-    for up in (2, 3, 4):
-        try_root = p.parents[up]
-        if (try_root / "data").exists():
-            return try_root
-    return p.parents[3]
-
-def in_docker() -> bool:
-    return Path("/.dockerenv").exists()
-
-def get_csv_path() -> Path:
-    env_path = os.environ.get("NRI_VA_CLEAN_CSV")
+def get_clean_path() -> Path:
+    """
+    Priority:
+      1) NRI_VA_CLEAN env var (.parquet / .arrow / .csv), used as given
+      2) what clean_nri_va wrote: its output path (NRI_VA_CLEAN_CSV, else
+         nri_va_clean.csv under /data/clean or <repo>/data/clean) with the
+         suffix of the first NRI_CLEAN_FORMATS entry that exists; files in
+         formats no longer configured are only used if none does (newest first)
+    """
+    env_path = os.environ.get("NRI_VA_CLEAN")
     if env_path:
-        p = Path(env_path).resolve()
-        if p.exists():
-            return p
-        return p
-    if in_docker():
-        return Path("/data/clean/nri_va_clean.csv")
-    return (repo_root() / "data" / "clean" / "nri_va_clean.csv").resolve()
-
-CSV_PATH = get_csv_path()
+        return Path(env_path).resolve()
+    base = get_out_path()
+    configured = [base.with_suffix(SUFFIXES[f]) for f in get_out_formats()]
+    for path in configured:
+        if path.exists():
+            return path
+    stale = [p for p in (base.with_suffix(s) for s in SUFFIXES.values()) if p.exists()]
+    if stale:
+        return max(stale, key=lambda p: p.stat().st_mtime_ns)
+    return configured[0]
 
 FIELDS = [
     "county_fips","county","state","risk_score","flood_score","heat_score",
     "wildfire_score","tornado_score","winter_score","hurricane_score",
-    "sovi_score","resilience_score"
+    "sovi_score","resilience_score",
+    "eal_score","eal_total","flood_eal","heat_eal",
+    "wildfire_eal","tornado_eal","winter_eal","hurricane_eal"
 ]
 
-STATE_ABBR = {
-    "VA": "VA",
-    "VIRGINIA": "VA",
-    # add more if you ingest other states
-}
+# Any state/territory abbreviation or full name (upper-cased) -> abbreviation
+STATE_ABBR = STATE_KEYS
 
 def _coerce_row(row: dict) -> dict:
     data = {k: row.get(k) for k in FIELDS if k in row}
@@ -69,36 +75,195 @@ def _coerce_row(row: dict) -> dict:
 
     return data
 
-def run():
-    if not CSV_PATH.exists():
+# -------- load modes --------
+# upsert: batched INSERT ... ON CONFLICT DO UPDATE (default)
+# copy:   Postgres COPY into a temp staging table, then one merge statement
+# orm:    legacy per-row session.get() path, kept for parity checks
+# swap:   Postgres only: COPY into nri_county__next, index and validate it, then
+#         rename it into place; the old table stays as nri_county__prev for
+#         --rollback. Replaces the whole table (counties missing from the file go).
+INGEST_MODE = os.environ.get("NRI_INGEST_MODE", "upsert").lower()
+BATCH_SIZE = int(os.environ.get("NRI_INGEST_BATCH", "1000"))
+
+def iter_batches(reader, size: int):
+    """Coerced rows in batches; duplicate FIPS inside a batch keep the last row."""
+    batch = {}
+    for row in reader:
+        data = _coerce_row(row)
+        key = data.get("county_fips")
+        if not key:
+            continue
+        batch[key] = data
+        if len(batch) >= size:
+            yield list(batch.values())
+            batch = {}
+    if batch:
+        yield list(batch.values())
+
+def load_upsert(session, batches) -> int:
+    if insert_for(session.get_bind().dialect.name) is None:
+        return load_orm(session, batches)
+    return upsert_batches(session, NriCounty.__table__, batches, ["county_fips"], FIELDS)
+
+def load_copy(session, batches) -> int:
+    if session.get_bind().dialect.name != "postgresql":
+        return load_upsert(session, batches)
+    return copy_merge(session, NriCounty.__tablename__, batches, ["county_fips"], FIELDS)
+
+def load_orm(session, batches) -> int:
+    ingested = 0
+    for batch in batches:
+        for data in batch:
+            obj = session.get(NriCounty, data["county_fips"])
+            if obj:
+                for k, v in data.items():
+                    setattr(obj, k, v)
+            else:
+                session.add(NriCounty(**data))
+            ingested += 1
+    return ingested
+
+def load_swap(session, batches) -> int:
+    if not swap.supported(session):
+        print("[ingest] swap mode needs Postgres; loading in place via upsert")
+        return load_upsert(session, batches)
+
+    table = NriCounty.__tablename__
+    keys = set()
+
+    def tracked():
+        for batch in batches:
+            keys.update(r["county_fips"] for r in batch)
+            yield batch
+
+    swap.create_shadow(session, table, ["county_fips"])
+    loaded = copy_merge(session, table + swap.NEXT, tracked(), ["county_fips"], FIELDS)
+    swap.build_indexes(session, table)
+    swap.validate(session, table, len(keys))
+    swap.swap_in(session, table)
+    return loaded
+
+LOADERS = {"upsert": load_upsert, "copy": load_copy, "orm": load_orm, "swap": load_swap}
+
+def diff_batches(batches, known: dict, hashes: dict, states: set):
+    """
+    Keep only rows whose hash differs from `known` (county_fips -> hash).
+    Every row's hash lands in `hashes`; each changed row's state FIPS in `states`.
+    """
+    for batch in batches:
+        changed = []
+        for data in batch:
+            fips = data["county_fips"]
+            hashes[fips] = h = row_hash(data.get(k) for k in FIELDS)
+            if known.get(fips) != h:
+                changed.append(data)
+                states.add(fips[:2])
+        if changed:
+            yield changed
+
+def _live_states(session) -> set:
+    return set(session.execute(select(func.substr(NriCounty.county_fips, 1, 2)).distinct()).scalars())
+
+STAGE = "ingest_nri_va"
+
+def run(mode: str = None, batch_size: int = None, incremental: bool = None):
+    migrate()
+    clean_path = get_clean_path()
+    if not clean_path.exists():
         raise FileNotFoundError(
-            f"Clean CSV not found at {CSV_PATH}. "
-            "Set NRI_VA_CLEAN_CSV or ensure the file exists "
+            f"Clean NRI file not found at {clean_path}. "
+            "Run app.etl.clean_nri_va, set NRI_VA_CLEAN, or ensure the file exists "
             "at /data/clean (Docker) or <repo>/data/clean (local)."
         )
 
+    mode = (mode or INGEST_MODE).lower()
+    if mode not in LOADERS:
+        raise ValueError(f"Unknown ingest mode {mode!r}; expected one of {sorted(LOADERS)}")
+    batch_size = batch_size or BATCH_SIZE
+    incremental = INCREMENTAL if incremental is None else incremental
+
+    manifest = Manifest.load()
+    inputs = manifest.fingerprints(STAGE, [clean_path])
+    prev = manifest.stage(STAGE)
+
+    session = SessionLocal()
+    started = time.perf_counter()
+    try:
+        # The recorded row hashes only describe the table if nothing else
+        # loaded it since (another mode, a rollback, a restored database)
+        in_sync = incremental and prev.get("version") == get_version(session)
+        if in_sync and manifest.unchanged(STAGE, inputs):
+            print(f"[ingest] {clean_path} unchanged since {prev['finished_at']}; skipping")
+            return 0
+
+        # swap rebuilds the whole table, so every row is loaded
+        known = prev.get("rows", {}) if in_sync and mode != "swap" else {}
+        hashes, states = {}, set()
+        if mode == "swap":
+            states |= _live_states(session)     # counties missing from the file go away
+
+        rows = iter_rows(clean_path, batch_size)
+        batches = diff_batches(iter_batches(rows, batch_size), known, hashes, states)
+        ingested = LOADERS[mode](session, batches)
+
+        if not ingested:
+            session.rollback()
+            manifest.record(STAGE, inputs, version=get_version(session), rows=hashes)
+            manifest.save()
+            print(f"[ingest] {len(hashes)} rows in {clean_path} match nri_county; nothing to load")
+            return 0
+
+        from app.services.stats import recompute_stats    # numpy; not needed when skipping
+
+        version = bump_version(session)
+        mark_states_changed(session, states, version)
+        recompute_stats(session, version)
+        session.commit()
+        invalidate_all()
+        manifest.record(STAGE, inputs, version=version, rows=hashes)
+        manifest.save()
+
+        elapsed = time.perf_counter() - started
+        total = session.execute(select(func.count()).select_from(NriCounty)).scalar_one()
+        rate = ingested / elapsed if elapsed > 0 else float("inf")
+        print(
+            f"[ingest] {ingested} of {len(hashes)} rows ingested from {clean_path} via {mode} "
+            f"(batch {batch_size}) in {elapsed:.2f}s ({rate:,.0f} rows/s); "
+            f"nri_county now has {total} rows (dataset version {version}; "
+            f"changed states: {', '.join(sorted(states)) or 'none'})"
+        )
+        if os.environ.get("SNAPSHOT_PUBLISH_PATH"):
+            from app.etl.publish_snapshot import publish
+            publish()
+        return ingested
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+def rollback():
+    """Put nri_county__prev back in place (the replaced table becomes __prev)."""
     session = SessionLocal()
-    ingested = 0
     try:
-        with open(CSV_PATH, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                data = _coerce_row(row)
-                key = data.get("county_fips")
-                if not key:
-                    continue
-
-                obj = session.get(NriCounty, key)
-                if obj:
-                    for k, v in data.items():
-                        setattr(obj, k, v)
-                else:
-                    obj = NriCounty(**data)
-                    session.add(obj)
-                ingested += 1
+        if not swap.supported(session):
+            raise swap.SwapError("Rollback needs Postgres and a previous swap-mode load")
+        from app.services.stats import recompute_stats
 
+        states = _live_states(session)
+        swap.rollback(session, NriCounty.__tablename__)
+        version = bump_version(session)
+        mark_states_changed(session, states | _live_states(session), version)
+        recompute_stats(session, version)
         session.commit()
-        print(f"[ingest] {ingested} rows ingested from {CSV_PATH}")
+        invalidate_all()
+
+        total = session.execute(select(func.count()).select_from(NriCounty)).scalar_one()
+        print(f"[ingest] rolled back to the previous nri_county ({total} rows, dataset version {version})")
+        if os.environ.get("SNAPSHOT_PUBLISH_PATH"):
+            from app.etl.publish_snapshot import publish
+            publish()
+        return total
     except Exception:
         session.rollback()
         raise
@@ -106,4 +271,14 @@ def run():
         session.close()
 
 if __name__ == "__main__":
-    run()
+    import argparse
+    ap = argparse.ArgumentParser(description="Load the clean NRI file into nri_county")
+    ap.add_argument("--mode", choices=sorted(LOADERS), help="load mode (default: NRI_INGEST_MODE or upsert)")
+    ap.add_argument("--rollback", action="store_true",
+                    help="swap the previous table back in (after a swap-mode load)")
+    ap.add_argument("--full", action="store_true", help="reload every row even if the input is unchanged")
+    args = ap.parse_args()
+    if args.rollback:
+        rollback()
+    else:
+        run(args.mode, incremental=False if args.full else None)
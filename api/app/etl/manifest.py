@@ -0,0 +1,130 @@
+# manifest.py
+"""
+Run manifest for incremental ETL: what each stage last read, wrote and loaded.
+
+    {"stages": {"<stage>": {"inputs":  {path: {size, mtime_ns, sha256}},
+                            "outputs": {path: {size, mtime_ns, sha256}},
+                            "version": <dataset version after the run>,
+                            "rows":    {key: row hash}, ...}}}
+
+A stage is skipped when its inputs hash the same as last time and its
+outputs are still the files it wrote. Files whose size and mtime are
+unchanged keep their recorded hash instead of being read again, so a
+no-change check costs one stat() per file. Set ETL_INCREMENTAL=0 (or pass
+incremental=False) to force full runs.
+"""
+from pathlib import Path
+import hashlib
+import json
+import os
+import time
+
+INCREMENTAL = os.environ.get("ETL_INCREMENTAL", "1") == "1"
+HASH_CHUNK = 1 << 20
+
+
+# -------- path helpers --------
+def repo_root() -> Path:
+    p = Path(__file__).resolve()
+    for up in (2, 3, 4):
+        try_root = p.parents[up]
+        if (try_root / "data").exists():
+            return try_root
+    return p.parents[3]
+
+def in_docker() -> bool:
+    return Path("/.dockerenv").exists()
+
+def get_manifest_path() -> Path:
+    """
+    Priority:
+      1) ETL_MANIFEST_PATH env var
+      2) /data/etl_manifest.json (Docker) or <repo>/data/etl_manifest.json (local)
+    """
+    env_path = os.environ.get("ETL_MANIFEST_PATH")
+    if env_path:
+        return Path(env_path).resolve()
+    root = Path("/data") if in_docker() else repo_root() / "data"
+    return (root / "etl_manifest.json").resolve()
+
+
+# -------- hashing --------
+def file_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK):
+            h.update(chunk)
+    return h.hexdigest()
+
+def row_hash(values) -> str:
+    """Stable 64-bit hash of a row's values (repr keeps float precision and None)."""
+    return hashlib.blake2b(repr(tuple(values)).encode(), digest_size=8).hexdigest()
+
+def fingerprint(path: Path, known: dict = None) -> dict:
+    """{size, mtime_ns, sha256}; reuses `known`'s hash if size and mtime still match."""
+    st = Path(path).stat()
+    fp = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if known and known.get("size") == fp["size"] and known.get("mtime_ns") == fp["mtime_ns"]:
+        fp["sha256"] = known["sha256"]
+    else:
+        fp["sha256"] = file_hash(path)
+    return fp
+
+
+class Manifest:
+    def __init__(self, path: Path, data: dict):
+        self.path = path
+        self.data = data
+
+    @classmethod
+    def load(cls, path: Path = None) -> "Manifest":
+        path = Path(path or get_manifest_path())
+        try:
+            data = json.loads(path.read_text())
+        except (FileNotFoundError, ValueError):
+            data = {}
+        data.setdefault("stages", {})
+        return cls(path, data)
+
+    def stage(self, name: str) -> dict:
+        return self.data["stages"].get(name, {})
+
+    def fingerprints(self, name: str, paths, kind: str = "inputs") -> dict:
+        """Current fingerprints of `paths`, reusing hashes this stage recorded."""
+        known = self.stage(name).get(kind, {})
+        return {str(p): fingerprint(p, known.get(str(p))) for p in paths}
+
+    @staticmethod
+    def _same(a: dict, b: dict) -> bool:
+        return a.keys() == b.keys() and all(a[k]["sha256"] == b[k]["sha256"] for k in a)
+
+    def unchanged(self, name: str, inputs: dict, outputs=()) -> bool:
+        """True if `inputs` match the last run and every output it wrote is still there, as written."""
+        prev = self.stage(name)
+        if not prev or not self._same(prev.get("inputs", {}), inputs):
+            return False
+        recorded = prev.get("outputs", {})
+        if {str(p) for p in outputs} - recorded.keys():
+            return False
+        for path, fp in recorded.items():
+            if not Path(path).exists():
+                return False
+            st = Path(path).stat()
+            if (st.st_size, st.st_mtime_ns) != (fp["size"], fp["mtime_ns"]):
+                return False
+        return True
+
+    def record(self, name: str, inputs: dict, outputs=(), **extra):
+        self.data["stages"][name] = {
+            "inputs": inputs,
+            "outputs": {str(p): fingerprint(p) for p in outputs},
+            "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            **extra,
+        }
+
+    def save(self):
+        """Atomic write: readers see the old manifest or the new one."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self.data, separators=(",", ":")))
+        os.replace(tmp, self.path)
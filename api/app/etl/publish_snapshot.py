@@ -0,0 +1,146 @@
+# publish_snapshot.py
+"""
+Publish the read-only tables behind the search API as one SQLite file.
+
+    python -m app.etl.publish_snapshot [--out PATH]
+
+The file is built next to its destination, indexed, ANALYZEd and VACUUMed,
+then moved into place with os.replace(), so readers see either the old
+snapshot or the new one, never a partial file. API replicas started with
+SNAPSHOT_PATH=<same path> serve from it with no database connection and
+pick up a newly published file on their next dataset poll.
+"""
+from pathlib import Path
+import os
+import time
+
+from sqlalchemy import create_engine, func, select, text
+
+from app.models.models import (
+    Base, CityCountyXwalk, DatasetVersion, GeoUnit, Metrics, NriCounty, ScoreStat,
+)
+from app.services.dataset import NRI_DATASET, get_version
+from app.services.db import SessionLocal
+from app.services.search_index import ensure_search_indexes
+
+# Everything the API reads; acs_indicator is ETL-only and stays out
+SNAPSHOT_TABLES = [NriCounty, CityCountyXwalk, ScoreStat, DatasetVersion, GeoUnit, Metrics]
+COPY_BATCH = int(os.environ.get("SNAPSHOT_COPY_BATCH", "5000"))
+
+# Serve /api/search's scoping and ordering from an index
+SNAPSHOT_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_nri_county_risk ON nri_county (risk_score, county_fips)",
+    "CREATE INDEX IF NOT EXISTS ix_nri_county_state_risk ON nri_county (state, risk_score, county_fips)",
+]
+
+
+# -------- path helpers --------
+def repo_root() -> Path:
+    p = Path(__file__).resolve()
+    for up in (2, 3, 4):
+        try_root = p.parents[up]
+        if (try_root / "data").exists():
+            return try_root
+    return p.parents[3]
+
+def in_docker() -> bool:
+    return Path("/.dockerenv").exists()
+
+def get_snapshot_path() -> Path:
+    """
+    Priority:
+      1) SNAPSHOT_PUBLISH_PATH env var
+      2) /data/snapshot/nri_snapshot.sqlite (Docker) or <repo>/data/snapshot/... (local)
+    """
+    env_path = os.environ.get("SNAPSHOT_PUBLISH_PATH")
+    if env_path:
+        return Path(env_path).resolve()
+    root = Path("/data") if in_docker() else repo_root() / "data"
+    return (root / "snapshot" / "nri_snapshot.sqlite").resolve()
+
+
+def _copy_table(src_session, dst_conn, table) -> int:
+    copied = 0
+    result = src_session.execute(select(table).execution_options(yield_per=COPY_BATCH))
+    for part in result.partitions():
+        dst_conn.execute(table.insert(), [dict(r._mapping) for r in part])
+        copied += len(part)
+    return copied
+
+
+def build_snapshot(src_session, path: Path) -> dict:
+    """Write every SNAPSHOT_TABLES row into a fresh SQLite file at `path`."""
+    if path.exists():
+        path.unlink()
+    dst = create_engine(f"sqlite+pysqlite:///{path}")
+    try:
+        tables = [m.__table__ for m in SNAPSHOT_TABLES]
+        Base.metadata.create_all(dst, tables=tables)
+        counts = {}
+        with dst.begin() as conn:
+            conn.execute(text("PRAGMA journal_mode=OFF"))   # scratch file until published
+            for table in tables:
+                counts[table.name] = _copy_table(src_session, conn, table)
+
+        ensure_search_indexes(dst)
+        with dst.begin() as conn:
+            for stmt in SNAPSHOT_INDEXES:
+                conn.execute(text(stmt))
+            conn.execute(text("ANALYZE"))
+            conn.execute(text(f"PRAGMA user_version={get_version(src_session)}"))
+        with dst.connect() as conn:
+            conn.execute(text("VACUUM"))
+        return counts
+    finally:
+        dst.dispose()
+
+
+def publish(out: Path = None) -> Path:
+    """Build the snapshot beside `out`, verify it, then atomically swap it in."""
+    out = Path(out or get_snapshot_path())
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+
+    started = time.perf_counter()
+    session = SessionLocal()
+    try:
+        # One consistent read, so every table comes from the same load
+        if session.get_bind().dialect.name == "postgresql":
+            session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        version = get_version(session)
+        counts = build_snapshot(session, tmp)
+    except Exception:
+        tmp.unlink(missing_ok=True)
+        raise
+    finally:
+        session.close()
+
+    check = create_engine(f"sqlite+pysqlite:///{tmp}")
+    try:
+        with check.connect() as conn:
+            n = conn.execute(select(func.count()).select_from(NriCounty.__table__)).scalar_one()
+            ok = conn.execute(text("PRAGMA integrity_check")).scalar_one()
+    finally:
+        check.dispose()
+    if n != counts["nri_county"] or ok != "ok":
+        tmp.unlink(missing_ok=True)
+        raise RuntimeError(f"Snapshot check failed ({n} rows, integrity {ok!r}); {out} left unchanged")
+
+    with open(tmp, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, out)
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"[snapshot] published {out} ({out.stat().st_size / 1e6:.1f} MB, "
+        f"{NRI_DATASET} version {version}) in {elapsed:.2f}s; rows: {counts}"
+    )
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Publish the API's read-only SQLite snapshot")
+    ap.add_argument("--out", help="destination file (default: SNAPSHOT_PUBLISH_PATH or data/snapshot)")
+    args = ap.parse_args()
+    publish(args.out)
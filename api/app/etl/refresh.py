@@ -0,0 +1,42 @@
+# refresh.py
+"""
+Bring the database up to date with the raw files in one process:
+
+    python -m app.etl.refresh [--full]
+
+Runs clean_nri_va -> ingest_nri_va -> ingest_acs5_va. Each stage checks the
+ETL manifest first (see app.etl.manifest), so a refresh with no new data
+costs one stat() per file and one version read per table, and a refresh
+after a small edit re-loads only the rows that changed. Running the stages
+here rather than as separate commands also pays the import cost once.
+"""
+import time
+
+
+def run(full: bool = False) -> dict:
+    from app.etl import clean_nri_va, ingest_acs5_va, ingest_nri_va
+
+    incremental = False if full else None
+    stages = [
+        ("clean", lambda: len(clean_nri_va.run(incremental=incremental))),
+        ("ingest_nri", lambda: ingest_nri_va.run(incremental=incremental)),
+        ("ingest_acs", lambda: ingest_acs5_va.run(incremental=incremental)),
+    ]
+    started = time.perf_counter()
+    results = {}
+    for name, stage in stages:
+        t0 = time.perf_counter()
+        results[name] = {"rows": stage(), "seconds": round(time.perf_counter() - t0, 3)}
+
+    elapsed = time.perf_counter() - started
+    summary = ", ".join(f"{name} {r['rows']} in {r['seconds']:.2f}s" for name, r in results.items())
+    print(f"[refresh] {summary}; total {elapsed:.2f}s")
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Clean and load NRI + ACS data, skipping unchanged inputs")
+    ap.add_argument("--full", action="store_true", help="ignore the manifest and redo every stage")
+    args = ap.parse_args()
+    run(full=args.full)
@@ -0,0 +1,143 @@
+# swap.py
+"""
+Postgres shadow-table reloads: load `<table>__next`, index and validate it,
+then swap it in by renaming, so readers never wait on the load itself.
+
+    <table>         live
+    <table>__next   being loaded (only inside the load transaction)
+    <table>__prev   the previous live table, kept for rollback()
+
+Indexes and the primary key follow the same suffixes (ix_nri_county_state,
+ix_nri_county_state__next, ...), so after a swap the live table's index
+names are exactly what migrate() expects.
+"""
+import os
+import re
+
+from sqlalchemy import inspect, text
+
+NEXT, PREV, TMP = "__next", "__prev", "__tmp"
+
+# The renames wait at most this long for in-flight reads to finish, then fail
+# the run instead of queueing every new reader behind the swap
+LOCK_TIMEOUT = os.environ.get("SWAP_LOCK_TIMEOUT", "5s")
+# Refuse a swap that would shrink the table below this fraction of the live rows
+MIN_RATIO = float(os.environ.get("SWAP_MIN_RATIO", "0.9"))
+
+INDEX_DEF = re.compile(r"^(CREATE (?:UNIQUE )?INDEX )(\S+)( ON (?:ONLY )?)(\S+)(.*)$", re.DOTALL)
+
+
+class SwapError(RuntimeError):
+    pass
+
+
+def supported(session) -> bool:
+    return session.get_bind().dialect.name == "postgresql"
+
+
+def _indexes(session, table: str) -> list:
+    """(name, definition) of every non-constraint index on `table`."""
+    return session.execute(text("""
+        SELECT i.indexname, i.indexdef FROM pg_indexes i
+        WHERE i.schemaname = current_schema() AND i.tablename = :t
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conname = i.indexname)
+    """), {"t": table}).all()
+
+
+def _pk_name(session, table: str):
+    return inspect(session.connection()).get_pk_constraint(table).get("name")
+
+
+def _exists(session, table: str) -> bool:
+    return inspect(session.connection()).has_table(table)
+
+
+def _count(session, table: str) -> int:
+    return session.execute(text(f'SELECT count(*) FROM "{table}"')).scalar_one()
+
+
+def _base(name: str) -> str:
+    for suffix in (NEXT, PREV, TMP):
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return name
+
+
+def create_shadow(session, table: str, pk_cols: list) -> str:
+    """Empty `<table>__next` with the live columns, defaults and primary key (no other indexes yet)."""
+    shadow = table + NEXT
+    pk = _pk_name(session, table) or f"{table}_pkey"
+    session.execute(text(f'DROP TABLE IF EXISTS "{shadow}"'))
+    session.execute(text(f'CREATE TABLE "{shadow}" (LIKE "{table}" INCLUDING DEFAULTS)'))
+    session.execute(text(
+        f'ALTER TABLE "{shadow}" ADD CONSTRAINT "{pk}{NEXT}" PRIMARY KEY ({", ".join(pk_cols)})'
+    ))
+    return shadow
+
+
+def build_indexes(session, table: str) -> list:
+    """Recreate the live table's secondary indexes on the loaded shadow."""
+    shadow = table + NEXT
+    made = []
+    for name, ddl in _indexes(session, table):
+        m = INDEX_DEF.match(ddl)
+        if not m:
+            raise SwapError(f"Cannot parse index definition: {ddl}")
+        target = m.group(4).rsplit(".", 1)
+        target[-1] = f'"{shadow}"'
+        session.execute(text(f'{m.group(1)}"{name}{NEXT}"{m.group(3)}{".".join(target)}{m.group(5)}'))
+        made.append(name + NEXT)
+    session.execute(text(f'ANALYZE "{shadow}"'))
+    return made
+
+
+def validate(session, table: str, expected: int, min_ratio: float = MIN_RATIO) -> int:
+    """Shadow must hold exactly `expected` rows and not shrink far below the live table."""
+    shadow = table + NEXT
+    n, live = _count(session, shadow), _count(session, table)
+    if n != expected:
+        raise SwapError(f"{shadow} has {n} rows, expected {expected}; {table} left unchanged")
+    if live and n < live * min_ratio:
+        raise SwapError(
+            f"{shadow} has {n} rows vs {live} live (< {min_ratio:.0%}); {table} left unchanged "
+            "(lower SWAP_MIN_RATIO to allow it)"
+        )
+    return n
+
+
+def _rename(session, src: str, dst: str):
+    """Rename table src -> dst along with its primary key and indexes (suffix scheme above)."""
+    src_suffix, dst_suffix = src[len(_base(src)):], dst[len(_base(dst)):]
+
+    def renamed(name):
+        base = name[: -len(src_suffix)] if src_suffix and name.endswith(src_suffix) else name
+        return base + dst_suffix
+
+    pk = _pk_name(session, src)
+    indexes = [name for name, _ in _indexes(session, src)]
+    session.execute(text(f'ALTER TABLE "{src}" RENAME TO "{dst}"'))
+    if pk:
+        session.execute(text(f'ALTER TABLE "{dst}" RENAME CONSTRAINT "{pk}" TO "{renamed(pk)}"'))
+    for name in indexes:
+        session.execute(text(f'ALTER INDEX "{name}" RENAME TO "{renamed(name)}"'))
+
+
+def swap_in(session, table: str):
+    """
+    live -> __prev, __next -> live, inside the caller's transaction. The
+    renames take a brief exclusive lock; readers queue only until commit.
+    """
+    session.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+    session.execute(text(f'DROP TABLE IF EXISTS "{table}{PREV}"'))
+    _rename(session, table, table + PREV)
+    _rename(session, table + NEXT, table)
+
+
+def rollback(session, table: str):
+    """Swap `<table>__prev` back in; the table it replaces becomes __prev (roll forward again)."""
+    if not _exists(session, table + PREV):
+        raise SwapError(f"No {table}{PREV} to roll back to")
+    session.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+    _rename(session, table, table + TMP)
+    _rename(session, table + PREV, table)
+    _rename(session, table + TMP, table + PREV)
@@ -0,0 +1,94 @@
+# migrate.py
+"""
+Schema provisioning, kept off the API's boot path.
+
+    python -m app.migrate
+
+Creates missing tables, adds nullable columns that newer models define to
+tables created by older versions, rebuilds tables whose primary key changed,
+and builds the search indexes. Safe to run repeatedly; the
+ETL entry points call it too. The API only does this itself when
+AUTO_MIGRATE=1 (opt-in, for local development).
+"""
+import logging
+
+from sqlalchemy import inspect, select, text
+
+from app.models.models import Base
+from app.services import db
+from app.services.search_index import ensure_search_indexes
+
+log = logging.getLogger(__name__)
+
+
+def add_missing_columns(bind) -> list:
+    """ALTER TABLE ... ADD COLUMN for nullable model columns an existing table lacks."""
+    insp = inspect(bind)
+    added = []
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not insp.has_table(table.name):
+                continue
+            existing = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in existing or not col.nullable:
+                    continue
+                ddl = col.type.compile(dialect=bind.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{col.name}" {ddl}'))
+                added.append(f"{table.name}.{col.name}")
+    return added
+
+
+# Small tables whose primary key may be rebuilt automatically. Anything else
+# (nri_county, acs_indicator, ...) needs a deliberate, hand-written migration.
+REKEY_TABLES = {"city_county_xwalk"}
+
+
+def rekey_tables(bind) -> list:
+    """
+    Rebuild tables in REKEY_TABLES whose primary key differs from the model's
+    (e.g. city_county_xwalk going from (city) to (city, state)), keeping their
+    rows. Only for widened keys on small tables: rows are copied through memory.
+    """
+    insp = inspect(bind)
+    rebuilt = []
+    for table in Base.metadata.sorted_tables:
+        if not insp.has_table(table.name):
+            continue
+        current = insp.get_pk_constraint(table.name).get("constrained_columns") or []
+        wanted = [c.name for c in table.primary_key.columns]
+        if sorted(current) == sorted(wanted):
+            continue
+        if table.name not in REKEY_TABLES:
+            log.warning("%s primary key is (%s), model wants (%s); not rebuilt automatically, "
+                        "migrate it by hand", table.name, ", ".join(current), ", ".join(wanted))
+            continue
+        with bind.begin() as conn:
+            existing = {c["name"] for c in insp.get_columns(table.name)}
+            cols = [c for c in table.columns if c.name in existing]
+            rows = [dict(r._mapping) for r in conn.execute(select(*cols))]
+            table.drop(conn)
+            table.create(conn)
+            if rows:
+                conn.execute(table.insert(), rows)
+        rebuilt.append(f"{table.name} ({', '.join(current)}) -> ({', '.join(wanted)})")
+    return rebuilt
+
+
+def migrate(bind=None) -> list:
+    bind = bind or db.engine     # looked up per call: the engine can be rebound
+    Base.metadata.create_all(bind=bind)
+    added = add_missing_columns(bind)
+    if added:
+        log.info("added columns: %s", ", ".join(added))
+    rebuilt = rekey_tables(bind)
+    if rebuilt:
+        log.warning("rebuilt with new primary key: %s", "; ".join(rebuilt))
+    return ensure_search_indexes(bind)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="[migrate] %(levelname)s %(message)s")
+    stmts = migrate()
+    print(f"[migrate] schema up to date on {db.engine.url.render_as_string(hide_password=True)} "
+          f"({len(stmts)} index statements applied)")
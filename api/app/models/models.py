@@ -1,5 +1,6 @@
+from datetime import datetime
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import String, Float, Integer
+from sqlalchemy import String, Float, Integer, DateTime, Index, func
 
 class Base(DeclarativeBase):
     pass
@@ -12,6 +13,10 @@ class GeoUnit(Base):
     name: Mapped[str] = mapped_column(String(128))
     state: Mapped[str] = mapped_column(String(2))
     county: Mapped[str] = mapped_column(String(64))
+    # One row per (geo_type, code, county_fips): a ZIP that spans counties has
+    # several rows; weight is its share of addresses in that county (tracts: 1.0)
+    county_fips: Mapped[str] = mapped_column(String(5), nullable=True)
+    weight: Mapped[float] = mapped_column(Float, nullable=True)
 
 class Metrics(Base):
     __tablename__ = "metrics"
@@ -42,11 +47,59 @@ class NriCounty(Base):
     sovi_score: Mapped[float] = mapped_column(Float, nullable=True)
     resilience_score: Mapped[float] = mapped_column(Float, nullable=True)
 
+    # Expected annual loss (optional in the export): EAL_SCORE, EAL_VALT ($),
+    # and per-hazard <HAZARD>_EALT ($)
+    eal_score: Mapped[float] = mapped_column(Float, nullable=True)
+    eal_total: Mapped[float] = mapped_column(Float, nullable=True)
+    flood_eal: Mapped[float] = mapped_column(Float, nullable=True)
+    heat_eal: Mapped[float] = mapped_column(Float, nullable=True)
+    wildfire_eal: Mapped[float] = mapped_column(Float, nullable=True)
+    tornado_eal: Mapped[float] = mapped_column(Float, nullable=True)
+    winter_eal: Mapped[float] = mapped_column(Float, nullable=True)
+    hurricane_eal: Mapped[float] = mapped_column(Float, nullable=True)
+
 
 class CityCountyXwalk(Base):
     __tablename__ = "city_county_xwalk"
-    # One row per (city, state)
+    # One row per (city, state): same-named cities in different states coexist
     city: Mapped[str] = mapped_column(String(100), primary_key=True)
-    state: Mapped[str] = mapped_column(String(20), index=True)
+    state: Mapped[str] = mapped_column(String(20), primary_key=True, index=True)
     county: Mapped[str] = mapped_column(String(100), index=True)
     county_fips: Mapped[str] = mapped_column(String(5), index=True)
+
+
+class AcsIndicator(Base):
+    __tablename__ = "acs_indicator"
+    # Long format: one row per (county, ACS/SVI indicator, vintage year)
+    county_fips: Mapped[str] = mapped_column(String(5), primary_key=True)
+    indicator: Mapped[str] = mapped_column(String(64), primary_key=True)   # e.g. "e_totpop"
+    vintage: Mapped[int] = mapped_column(Integer, primary_key=True)         # e.g. 2024
+    value: Mapped[float] = mapped_column(Float, nullable=True)
+
+    __table_args__ = (
+        Index("ix_acs_indicator_vintage_indicator", "vintage", "indicator"),
+    )
+
+
+class ScoreStat(Base):
+    __tablename__ = "score_stat"
+    # Distribution summary of one score column, per state (FIPS) and nationally ("US")
+    source: Mapped[str] = mapped_column(String(32), primary_key=True)     # "nri_county" | "metrics"
+    scope: Mapped[str] = mapped_column(String(8), primary_key=True)       # "51", "US"
+    column: Mapped[str] = mapped_column(String(64), primary_key=True)     # "flood_score"
+    dataset_version: Mapped[int] = mapped_column(Integer)
+    n: Mapped[int] = mapped_column(Integer)
+    p10: Mapped[float] = mapped_column(Float, nullable=True)
+    p50: Mapped[float] = mapped_column(Float, nullable=True)
+    p90: Mapped[float] = mapped_column(Float, nullable=True)
+    min: Mapped[float] = mapped_column(Float, nullable=True)
+    max: Mapped[float] = mapped_column(Float, nullable=True)
+    mean: Mapped[float] = mapped_column(Float, nullable=True)
+
+
+class DatasetVersion(Base):
+    __tablename__ = "dataset_version"
+    # One row per dataset (e.g., "nri_county"); bumped by the ETL after each load
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
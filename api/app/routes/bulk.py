@@ -0,0 +1,165 @@
+import gzip
+import math
+import re
+import zlib
+
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from app.routes.search import normalize_state, normalize_q
+from app.services.catalog import get_catalog
+from app.services.county_columns import get_county_columns
+from app.services.geo_index import get_geo_index
+from app.services.instrumentation import record_rows
+from app.services.rank_index import get_rank_index
+from app.services.states import to_abbr
+
+bulk_bp = Blueprint("bulk", __name__)
+
+MAX_BULK_ITEMS = 50_000
+FIPS_RE = re.compile(r"\d{5}")
+
+
+class Resolver:
+    """
+    Resolves FIPS codes, ZIPs, tract GEOIDs and place names against the
+    in-memory snapshots. Five digits are a county FIPS when such a county is
+    loaded, else a ZIP. Results are memoized per request, so repeated inputs
+    cost one dict hit.
+    """
+
+    def __init__(self, state_code=None, fips_prefix=None):
+        self.cols = get_county_columns()
+        self.catalog = get_catalog()
+        self.ranks = get_rank_index()
+        self.geo = get_geo_index()
+        self.risk_col = self.cols.columns.index("risk_score")
+        self.state_code, self.fips_prefix = state_code, fips_prefix
+        self._memo = {}
+
+    def _scope_for(self, raw: str):
+        """A trailing ', VA' / ', Virginia' overrides the request-level state."""
+        parts = [p.strip() for p in raw.split(",")]
+        if len(parts) > 1 and to_abbr(parts[-1]):
+            return normalize_state(parts[-1])
+        return self.state_code, self.fips_prefix
+
+    def _match(self, raw: str):
+        """Returns (county_fips, match_type, candidates) or (None, None, [])."""
+        if FIPS_RE.fullmatch(raw) and raw in self.cols.row_of:
+            return raw, "fips", []
+        geo = self.geo.resolve(raw)
+        if geo is not None:
+            kind, fips = geo
+            return (fips[0], kind, fips[1:]) if fips else (None, None, [])
+
+        state_code, fips_prefix = self._scope_for(raw)
+        q = normalize_q(raw)
+        if not q:
+            return None, None, []
+
+        hits = self.catalog.lookup_exact(q, state_code, fips_prefix)
+        if hits:
+            fips = list(dict.fromkeys(h["county_fips"] for h in hits))
+            return fips[0], hits[0]["kind"], fips[1:]
+
+        # No exact name: best prefix/trigram suggestion
+        best = self.catalog.search(q, state_code=state_code, fips_prefix=fips_prefix, limit=1)
+        if best:
+            return best[0]["county_fips"], f"{best[0]['kind']}_fuzzy", []
+        return None, None, []
+
+    def resolve(self, item) -> dict:
+        raw = str(item if item is not None else "").strip()
+        key = raw.lower()
+        if key not in self._memo:
+            self._memo[key] = self._result(raw)
+        return {"input": item, **self._memo[key]}
+
+    def _result(self, raw: str) -> dict:
+        fips, match_type, others = self._match(raw)
+        row = self.cols.row_of.get(fips) if fips else None
+        if row is None:
+            return {"status": "not_found"}
+
+        risk = self.cols.matrix[row, self.risk_col]
+        risk = None if math.isnan(risk) else float(risk)
+        state_rank, _ = self.ranks.lookup(fips, fips_prefix=fips[:2])   # rank within its state
+        out = {
+            "status": "ok",
+            "match": match_type,
+            "geo_id": fips,
+            "name": f"{self.cols.county[row]}, {self.cols.state[row]}",
+            "fema_risk_score": risk,
+            "overall_score": None if risk is None else round(100.0 - risk, 1),
+            "state_rank": state_rank,
+        }
+        if others:
+            out["other_matches"] = others
+        return out
+
+
+def _gzip_ok() -> bool:
+    return "gzip" in (request.headers.get("Accept-Encoding") or "").lower()
+
+
+def _stream(resolver, items, use_gzip):
+    dumps = current_app.json.dumps
+
+    def lines():
+        for item in items:
+            yield (dumps(resolver.resolve(item)) + "\n").encode("utf-8")
+
+    def gzipped():
+        z = zlib.compressobj(6, zlib.DEFLATED, 31)   # wbits 31 => gzip container
+        buf = []
+        for chunk in lines():
+            buf.append(chunk)
+            if len(buf) >= 1000:
+                yield z.compress(b"".join(buf))
+                buf = []
+        yield z.compress(b"".join(buf)) + z.flush()
+
+    resp = Response(stream_with_context(gzipped() if use_gzip else lines()),
+                    mimetype="application/x-ndjson")
+    if use_gzip:
+        resp.headers["Content-Encoding"] = "gzip"
+    resp.headers["Vary"] = "Accept-Encoding"
+    return resp
+
+
+# Thousands of FIPS codes / place names in one request, resolved in memory
+@bulk_bp.route("/api/bulk", methods=["POST"])
+def bulk():
+    """
+    Request body: {items: ["51059", "22101", "51059480102", "Reston, VA", ...], state?, stream?}
+    Returns one result per input, in input order ({items: [...]} or NDJSON).
+    Responses are gzip-compressed when the client sends Accept-Encoding: gzip.
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get("items")
+    if not isinstance(items, list):
+        return jsonify({"code": "BAD_REQUEST", "message": "items must be a list"}), 400
+    if len(items) > MAX_BULK_ITEMS:
+        return jsonify({"code": "TOO_MANY_ITEMS",
+                        "message": f"At most {MAX_BULK_ITEMS} items per request"}), 413
+
+    state_code, fips_prefix = normalize_state((data.get("state") or "").strip())
+    resolver = Resolver(state_code, fips_prefix)
+    use_gzip = _gzip_ok()
+    record_rows(len(items))
+
+    streaming = data.get("stream") or request.accept_mimetypes.best == "application/x-ndjson"
+    if streaming:
+        return _stream(resolver, items, use_gzip)
+
+    results = [resolver.resolve(item) for item in items]
+    body = current_app.json.dumps({
+        "items": results,
+        "resolved": sum(1 for r in results if r["status"] == "ok"),
+    }).encode("utf-8")
+
+    resp = Response(body, mimetype="application/json")
+    if use_gzip:
+        resp.set_data(gzip.compress(body, compresslevel=6))
+        resp.headers["Content-Encoding"] = "gzip"
+    resp.headers["Vary"] = "Accept-Encoding"
+    return resp
@@ -1,7 +1,9 @@
 from flask import Blueprint, jsonify
+from app.services.cache import search_cache
+from app.services.db import pool_status
 
 health_bp = Blueprint("health", __name__)
 
 @health_bp.get("/healthz")
 def healthz():
-    return jsonify(status="ok")
+    return jsonify(status="ok", cache=search_cache.stats(), db_pool=pool_status())
@@ -0,0 +1,9 @@
+from flask import Blueprint, Response
+from app.services.instrumentation import render_metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+# Prometheus scrape target (per worker process)
+@metrics_bp.get("/metrics")
+def metrics():
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
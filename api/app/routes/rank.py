@@ -0,0 +1,64 @@
+import math
+
+from flask import Blueprint, request, jsonify
+from app.routes.search import normalize_state
+from app.services.county_columns import get_county_columns
+from app.services.instrumentation import record_rows
+from app.services.scoring import parse_weights
+
+rank_bp = Blueprint("rank", __name__)
+
+DEFAULT_K = 25
+MAX_K = 500
+
+
+def _num(v):
+    return None if v is None or math.isnan(v) else round(float(v), 1)
+
+
+# Top-K by the caller's own hazard weighting, served from the columnar snapshot
+@rank_bp.route("/api/rank", methods=["POST"])
+def rank():
+    """
+    Request body: {state, weights: {flood: 2, heat: 1, ...}, k?, order?: "safest"|"riskiest"}
+    Hazard scores are normalized nationally (p10..p90 -> 0..100, resilience
+    inverted) and combined as a weighted mean; lower composite risk ranks first.
+    """
+    data = request.get_json(silent=True) or {}
+
+    cols = get_county_columns()
+    try:
+        weights = parse_weights(data.get("weights"), cols.columns)
+        k = data.get("k")
+        k = DEFAULT_K if k is None else int(k)
+        if k < 1:
+            raise ValueError("k must be >= 1")
+    except (TypeError, ValueError) as e:
+        return jsonify({"code": "BAD_REQUEST", "message": str(e)}), 400
+    k = min(k, MAX_K)
+    riskiest = (data.get("order") or "safest").lower() == "riskiest"
+
+    state_code, fips_prefix = normalize_state((data.get("state") or "").strip())
+    mask = cols.scope_mask(state_code, fips_prefix)
+
+    rows, composite = cols.top_k(weights, k, mask, riskiest=riskiest)
+
+    weighted = [c for c, w in zip(cols.columns, weights) if w > 0]
+    results = []
+    for i, (row, comp) in enumerate(zip(rows, composite), start=1):
+        risk = _num(comp)
+        results.append({
+            "geo_id": cols.fips[row],
+            "name": f"{cols.county[row]}, {cols.state[row]}",
+            "composite_risk": risk,
+            "overall_score": None if risk is None else round(100.0 - risk, 1),
+            "hazards": {c: _num(cols.normalized[row, cols.columns.index(c)]) for c in weighted},
+            "rank": i,
+        })
+
+    record_rows(len(results))
+    return jsonify({
+        "items": results,
+        "total": int(mask.sum()),
+        "weights": {c: float(w) for c, w in zip(cols.columns, weights) if w > 0},
+    }), 200
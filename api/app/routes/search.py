@@ -1,183 +1,341 @@
-from flask import Blueprint, request, jsonify
-from sqlalchemy import func, or_
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import TimeoutError as PoolTimeout
 from app.services.db import SessionLocal
-from app.models.models import NriCounty, CityCountyXwalk
+from app.models.models import NriCounty
+from app.services.rank_index import get_rank_index
+from app.services.geo_index import TRACT_RE, ZIP_RE, get_geo_index
+from app.services.city_index import get_city_index
+from app.services.dataset import CITY_DATASET, GEO_DATASET, known_version, state_version
+from app.services.cache import search_cache
+from app.services.instrumentation import finish_stream, record_rows, start_stream
+from app.services.states import ABBR_TO_FIPS, STATE_KEYS, to_abbr
+import base64
+import hashlib
+import json
 import re
-import traceback
 
 search_bp = Blueprint("search", __name__)
 
-# Support both code and name; expand as you add states
-STATE_TO_FIPS = {"VA": "51"}
-STATE_WORDS = {"virginia", "va"}
-NOISE_WORDS = {"county", "city", "parish", "borough", "va", "virginia"}
+# Support both code and name for every state/territory
+STATE_TO_FIPS = ABBR_TO_FIPS
+STATE_WORDS = {k.lower() for k in STATE_KEYS}
+# Generic place descriptors only; states are handled as a trailing ", VA" part
+NOISE_WORDS = {"county", "city", "parish", "borough"}
 
 
 
 
-# Virginia = VA
+# Virginia = VA (any state or territory, by code or full name)
 def normalize_state(raw):
     if not raw:
         return None, None
     s = raw.strip()
-    # accept 'VA' or 'Virginia'
-    if len(s) == 2:
-        code = s.upper()
+    code = to_abbr(s)
+    if code:
         return code, STATE_TO_FIPS.get(code)
-    # full name
-    name = s.lower()
-    if name == "virginia":
-        return "VA", STATE_TO_FIPS["VA"]
     return s.upper(), None  # unknown code; will fallback to state name match
 
 
 
 # X, VA = X
 def normalize_q(raw: str) -> str:
-    """'Charlotte, Virginia' -> 'charlotte'; strip common suffixes."""
+    """
+    'Charlotte, Virginia' -> 'charlotte'; strip common suffixes.
+    A state is only dropped as a trailing comma part ('Washington' stays
+    'washington'), and a non-empty query never normalizes to "".
+    """
     if not raw:
         return ""
     s = raw.strip().lower()
     parts = [p.strip() for p in re.split(r"[,/]+", s) if p.strip()]
-    if parts and parts[-1] in STATE_WORDS:
+    if len(parts) > 1 and parts[-1] in STATE_WORDS:
         parts = parts[:-1]
     s = " ".join(parts)
-    tokens = [t for t in re.split(r"\s+", s) if t and t not in NOISE_WORDS]
-    return " ".join(tokens)
+    # Parentheses split too: a picked suggestion "Fairfax (city), VA" -> "fairfax"
+    tokens = [t for t in re.split(r"[\s()]+", s) if t and t not in NOISE_WORDS]
+    return " ".join(tokens) or " ".join(s.split())
 
 
-'''
-# Checks if the zip code is 5 digits or not 
+# Checks if the query is a ZIP (or ZIP+4) / census tract GEOID
 def is_zip(txt: str) -> bool:
-    return bool(re.fullmatch(r"\d{5}", (txt or "").strip()))
-'''
+    return bool(ZIP_RE.fullmatch((txt or "").strip()))
+
+
+def is_tract(txt: str) -> bool:
+    return bool(TRACT_RE.fullmatch((txt or "").strip()))
 
-# If the search x is contained within anny county or city, theyll be displayed 
-def build_name_filters(norm: str):
+
+# If the search x is contained within any county or city, they'll be displayed.
+# County names are matched in SQL (LIKE, served by the lower()/trigram indexes);
+# city names are resolved to county FIPS by the in-memory city index, so the
+# query never touches city_county_xwalk.
+def build_name_filters(norm: str, session=None):
     if not norm:
         return None
     first = norm.split()[0]
     prefix = f"{first}%"
     contains = f"%{norm}%"
-    return or_(
-        func.lower(NriCounty.county).like(prefix),
-        func.lower(NriCounty.county).like(contains),
-        func.lower(CityCountyXwalk.city).like(prefix),
-        func.lower(CityCountyXwalk.city).like(contains),
-    )
+    county_name = func.lower(NriCounty.county)
+    conds = [county_name.like(prefix), county_name.like(contains)]
+    city_fips = get_city_index(session).match(norm)
+    if city_fips:
+        conds.append(NriCounty.county_fips.in_(city_fips))
+    return or_(*conds)
+
 
-# --- add this helper near the top of the file ---
-def build_state_rank_map(session, state_code, fips_prefix):
+def cached_json(body: bytes, etag: str, cache_status: str) -> Response:
     """
-    Returns (rank_map, total):
-      rank_map[county_fips] = dense rank (1 = lowest risk)
-      total = number of counties considered
+    JSON response with an ETag; 304 if the client already holds this payload.
+    Only GET/HEAD may answer 304 (RFC 9110 13.1.2); a POST ignores If-None-Match.
     """
-    # Scope by state (prefer FIPS)
-    base = session.query(NriCounty.county_fips, NriCounty.risk_score)
+    if request.method in ("GET", "HEAD") and request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(body, status=200, mimetype="application/json")
+    resp.set_etag(etag)
+    resp.headers["X-Cache"] = cache_status
+    return resp
+
+
+MAX_PAGE_SIZE = 500
+STREAM_BATCH = 1000
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def query_tag(state_code, fips_prefix, q_norm, limit) -> str:
+    """Short fingerprint of the query a cursor belongs to."""
+    raw = "|".join("" if p is None else str(p) for p in (state_code, fips_prefix, q_norm, limit))
+    return hashlib.blake2b(raw.encode(), digest_size=6).hexdigest()
+
+
+# Opaque keyset cursor: last (risk_score, county_fips) returned + rows so far,
+# tagged with the query that produced it
+def encode_cursor(risk, fips, count, tag) -> str:
+    raw = json.dumps({"r": risk, "f": fips, "n": count, "q": tag}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, tag: str):
+    try:
+        pad = "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(token + pad))
+        risk, fips, count, owner = data["r"], str(data["f"]), int(data["n"]), data["q"]
+    except Exception:
+        raise BadRequest("Invalid cursor")
+    if owner != tag:
+        raise BadRequest("Cursor does not belong to this query (state, q and limit must match)")
+    return risk, fips, count
+
+
+def parse_limit(raw):
+    if raw in (None, ""):
+        return None
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        raise BadRequest("limit must be an integer")
+    if limit < 1:
+        raise BadRequest("limit must be >= 1")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def base_query(session, state_code, fips_prefix, q_norm):
+    """Filtered, ordered projection of nri_county: lowest risk first, FIPS as tiebreak."""
+    qry = session.query(
+        NriCounty.county_fips, NriCounty.county, NriCounty.state, NriCounty.risk_score
+    )
+
+    # Scope: VA via FIPS prefix if available; else try state column
     if fips_prefix:
-        base = base.filter(NriCounty.county_fips.like(fips_prefix + "%"))
+        qry = qry.filter(NriCounty.county_fips.like(fips_prefix + "%"))
     elif state_code:
-        base = base.filter(func.lower(NriCounty.state).like(f"%{state_code.lower()}%"))
+        # allow both 'VA' and 'Virginia' style values
+        qry = qry.filter(func.lower(NriCounty.state).like(f"%{state_code.lower()}%"))
 
-    rows = base.all()
-    # Sort by ascending risk (lower risk is better). Push None to the end.
-    rows_sorted = sorted(
-        rows,
-        key=lambda r: (r.risk_score is None, float(r.risk_score) if r.risk_score is not None else 0.0)
-    )
+    # ZIP / tract: the counties it falls in, resolved in memory (no name match)
+    if is_zip(q_norm) or is_tract(q_norm):
+        _, fips = get_geo_index(session).resolve(q_norm)
+        qry = qry.filter(NriCounty.county_fips.in_(fips))
+    # If q provided, allow match by county OR via city crosswalk
+    elif q_norm:
+        matched = build_name_filters(q_norm, session)
+        if matched is not None:
+            qry = qry.filter(matched)
+
+    # Lower risk is better => higher overall_score first; unscored rows last
+    return qry.order_by(NriCounty.risk_score.asc().nulls_last(), NriCounty.county_fips.asc())
 
-    rank_map = {}
-    rank = 0
-    prev = None
-    for r in rows_sorted:
-        # dense-rank: same risk score => same rank
-        curr = None if r.risk_score is None else float(r.risk_score)
-        if curr != prev:
-            rank += 1
-            prev = curr
-        rank_map[r.county_fips] = rank
-    return rank_map, len(rows_sorted)
 
+def after_cursor(qry, risk, fips):
+    """Keyset predicate matching the ORDER BY in base_query (NULL risks sort last)."""
+    if risk is None:
+        return qry.filter(NriCounty.risk_score.is_(None), NriCounty.county_fips > fips)
+    return qry.filter(or_(
+        NriCounty.risk_score > risk,
+        and_(NriCounty.risk_score == risk, NriCounty.county_fips > fips),
+        NriCounty.risk_score.is_(None),
+    ))
 
-@search_bp.route("/api/search", methods=["POST"])
+
+def format_row(r, rank, rank_index, state_code, fips_prefix) -> dict:
+    try:
+        risk = float(r.risk_score) if r.risk_score is not None else None
+    except Exception:
+        risk = None
+
+    overall = None if risk is None else round(100.0 - risk, 1)
+    sr, _ = rank_index.lookup(r.county_fips, state_code, fips_prefix)
+
+    return {
+        "geo_id": r.county_fips,
+        "name": f"{r.county}, {r.state}",
+        # keep both keys for compatibility with your UI/history
+        "fema_risk_score": risk,
+        "fema_risk_rating": risk,
+        "state_rank": sr,          # rank among all counties in the state
+        "overall_score": overall,
+        "rank": rank,
+    }
+
+
+def wants_stream(data) -> bool:
+    # GET sends every parameter as a string ("stream=1")
+    if str(data.get("stream") or "").lower() not in ("", "0", "false", "no"):
+        return True
+    if (data.get("format") or "").lower() == "ndjson":
+        return True
+    return request.accept_mimetypes.best == "application/x-ndjson"
+
+
+def stream_ndjson(state_code, fips_prefix, q_norm):
+    """One JSON object per line, fetched in batches; memory stays flat for any result size."""
+    dumps = current_app.json.dumps
+    start_stream()
+
+    def generate():
+        s = SessionLocal()
+        sent = 0
+        try:
+            rank_index = get_rank_index(s)
+            qry = base_query(s, state_code, fips_prefix, q_norm).yield_per(STREAM_BATCH)
+            for i, r in enumerate(qry, start=1):
+                yield dumps(format_row(r, i, rank_index, state_code, fips_prefix)) + "\n"
+                sent = i
+        finally:
+            s.close()
+            finish_stream(sent)
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@search_bp.route("/api/search", methods=["GET", "POST"])
 def search():
-    data = request.get_json(silent=True) or {}
+    """
+    POST body or GET query string: {state, q, limit?, page?, cursor?, stream?|format:"ndjson"}
+
+    - no limit/cursor: full result list (legacy array response)
+    - limit (and cursor from the previous page, or page for offset paging):
+      {"items": [...], "next_cursor": str|null}
+    - stream / Accept: application/x-ndjson: every match as NDJSON, uncached
+
+    Responses carry an ETag; a GET with a matching If-None-Match gets 304.
+    """
+    if request.method == "GET":
+        data = request.args.to_dict()
+    else:
+        data = request.get_json(silent=True) or {}
 
     # Inputs
     state_in = (data.get("state") or "").strip()
     q_raw    = (data.get("q") or "").strip()
-    limit_in = data.get("limit", None)   # None => no cap
-    page_in  = data.get("page", 1)
+    cursor   = (data.get("cursor") or "").strip() or None
 
     # Normalize inputs
     state_code, fips_prefix = normalize_state(state_in)
     q_norm = normalize_q(q_raw)
 
+    try:
+        limit = parse_limit(data.get("limit"))
+        page = max(int(data.get("page") or 1), 1)
+        paged = limit is not None or cursor is not None
+        if paged and limit is None:
+            limit = MAX_PAGE_SIZE
+        tag = query_tag(state_code, fips_prefix, q_norm, limit)
+        keyset = decode_cursor(cursor, tag) if cursor else None
+    except (BadRequest, TypeError, ValueError) as e:
+        return jsonify({"code": "BAD_REQUEST", "message": str(e)}), 400
+
+    if wants_stream(data):
+        return stream_ndjson(state_code, fips_prefix, q_norm)
+
+    # Same normalized query + same dataset versions => same payload. A query
+    # scoped to one state only sees that state's rows, so it keys on the
+    # state's version and survives reloads that changed other states.
+    cache_key = search_cache.make_key(
+        state_code, fips_prefix, q_norm, page, limit, cursor,
+        known_version(GEO_DATASET), known_version(CITY_DATASET),
+        version=state_version(fips_prefix) if fips_prefix else None)
+    hit = search_cache.get(cache_key)
+    if hit is not None:
+        body, etag, rows = hit
+        if rows is not None:
+            record_rows(rows)
+        return cached_json(body, etag, cache_status="HIT")
+
     s = SessionLocal()
     try:
-        # Base query: VA via FIPS prefix if available; else try state column
-        qry = s.query(NriCounty)
+        qry = base_query(s, state_code, fips_prefix, q_norm)
+
+        # Keyset pagination; plain page numbers fall back to OFFSET
+        offset = 0
+        if keyset is not None:
+            risk, fips, offset = keyset
+            qry = after_cursor(qry, risk, fips)
+        elif paged and page > 1:
+            offset = (page - 1) * limit
+            qry = qry.offset(offset)
+        if paged:
+            qry = qry.limit(limit + 1)   # one extra row tells us if there is a next page
 
-        if fips_prefix:
-            qry = qry.filter(NriCounty.county_fips.like(fips_prefix + "%"))
-        else:
-            # Fallback: try matching the state column (handles 'Virginia' stored as text)
-            if state_code:
-                # allow both 'VA' and 'Virginia' style values
-                qry = qry.filter(func.lower(NriCounty.state).like(f"%{state_code.lower()}%"))
-
-        # If q provided, allow match by county OR via city crosswalk
-        if q_norm:
-            # join xwalk (left) to enable city-based filtering
-            qry = qry.outerjoin(
-                CityCountyXwalk,
-                (CityCountyXwalk.county_fips == NriCounty.county_fips)
-                # If your xwalk also stores state, you can add: & (CityCountyXwalk.state.ilike("%virginia%")) for safety
-            )
-            flt = build_name_filters(q_norm)
-            if flt is not None:
-                qry = qry.filter(flt)
-
-        # Sort by lowest FEMA/NRI risk first (lower risk is better)
-        qry = qry.order_by(NriCounty.risk_score.asc())        
         rows = qry.all()
-        
-        
-        # Format response + scores
-        results = []
-        for r in rows:
-            try:
-                risk = float(r.risk_score) if r.risk_score is not None else None
-            except Exception:
-                risk = None
-
-            overall = None if risk is None else round(100.0 - risk, 1)
-            
-            
-            state_rank_map, state_total = build_state_rank_map(s, state_code, fips_prefix)
-            sr = state_rank_map.get(r.county_fips)
-            
-            results.append({
-                "geo_id": r.county_fips,
-                "name": f"{r.county}, {r.state}",
-                # keep both keys for compatibility with your UI/history
-                "fema_risk_score": risk,
-                "fema_risk_rating": risk,
-                "state_rank": sr,          # NEW: rank among all counties in the state
-                "overall_score": overall,
-            })
-
-        # Rank (higher overall is better)
-        results.sort(key=lambda x: (x["overall_score"] is not None, x["overall_score"]), reverse=True)
-        for i, r in enumerate(results, start=1):
-            r["rank"] = i
-
-        return jsonify(results), 200
+        has_more = paged and len(rows) > limit
+        if has_more:
+            rows = rows[:limit]
+
+        # Dense state ranks come from the precomputed index (O(1) per row)
+        rank_index = get_rank_index(s)
+        results = [
+            format_row(r, offset + i, rank_index, state_code, fips_prefix)
+            for i, r in enumerate(rows, start=1)
+        ]
 
+        record_rows(len(results))
+
+        if paged:
+            last = rows[-1] if rows else None
+            payload = {
+                "items": results,
+                "next_cursor": encode_cursor(last.risk_score, last.county_fips, offset + len(rows), tag) if has_more else None,
+            }
+        else:
+            payload = results
+
+        body = current_app.json.dumps(payload).encode("utf-8")
+        etag = search_cache.set(cache_key, body, rows=len(results))
+        return cached_json(body, etag, cache_status="MISS")
+
+    except PoolTimeout:
+        # Every pooled connection stayed busy for DB_POOL_TIMEOUT: shed load
+        # rather than queueing more threads behind the database
+        resp = jsonify({"code": "DB_BUSY", "message": "Database is busy, retry shortly"})
+        resp.headers["Retry-After"] = "1"
+        return resp, 503
     except Exception as e:
-        traceback.print_exc()
+        current_app.logger.exception("search failed (state=%r, q=%r)", state_in, q_raw)
         return jsonify({"code": "SERVER_ERROR", "message": str(e)}), 500
     finally:
         s.close()
-
@@ -1,15 +1,26 @@
-@app.route("/api/suggest")
+from flask import Blueprint, request, jsonify
+from app.routes.search import normalize_state, normalize_q
+from app.services.catalog import get_catalog
+from app.services.instrumentation import record_rows
+
+suggest_bp = Blueprint("suggest", __name__)
+
+MAX_SUGGESTIONS = 20
+
+
+# Served entirely from the in-memory catalog; no DB round trip per keystroke
+@suggest_bp.get("/api/suggest")
 def suggest():
-    q = request.args.get("q", "")
+    q = normalize_q(request.args.get("q", ""))
     if len(q) < 2:
         return jsonify([])
 
-    like_pattern = f"%{q}%"
-    matches = (
-        db.session.query(CityCounty.county)
-        .filter(CityCounty.county.ilike(like_pattern))
-        .distinct()
-        .limit(5)
-        .all()
-    )
-    return jsonify([m[0] for m in matches])
+    state_code, fips_prefix = normalize_state(request.args.get("state", ""))
+    try:
+        limit = max(1, min(int(request.args.get("limit", 7)), MAX_SUGGESTIONS))
+    except ValueError:
+        limit = 7
+
+    matches = get_catalog().search(q, state_code=state_code, fips_prefix=fips_prefix, limit=limit)
+    record_rows(len(matches))
+    return jsonify(matches)
@@ -0,0 +1,129 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from app.config import Settings
+from app.services.dataset import known_version
+
+
+class LRUCache:
+    """Small thread-safe LRU used as the in-process tier."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ResultCache:
+    """
+    Two-tier cache for serialized API responses: in-process LRU, then Redis
+    (only if REDIS_URL is set). Keys embed the dataset version, so entries from
+    before an ETL reload are simply never read again (Redis expires them by TTL).
+    """
+
+    def __init__(self, maxsize: int, redis_url: str = "", ttl: int = 3600, prefix: str = "search"):
+        self.local = LRUCache(maxsize)
+        self.ttl = ttl
+        self.prefix = prefix
+        self._redis_url = redis_url
+        self._redis = None
+        self._lock = threading.Lock()
+        self.counters = {"hits_local": 0, "hits_redis": 0, "misses": 0, "redis_errors": 0}
+
+    def _client(self):
+        if not self._redis_url:
+            return None
+        if self._redis is None:
+            import redis  # optional tier; only needed when REDIS_URL is set
+            self._redis = redis.Redis.from_url(self._redis_url, socket_timeout=0.25)
+        return self._redis
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def make_key(self, *parts, version: int = None) -> str:
+        """`version` overrides the dataset version (e.g. a per-state version for scoped queries)."""
+        raw = "|".join("" if p is None else str(p) for p in parts)
+        return f"{self.prefix}:v{known_version() if version is None else version}:{raw}"
+
+    @staticmethod
+    def etag_for(body: bytes) -> str:
+        return hashlib.sha1(body).hexdigest()
+
+    def get(self, key):
+        """Returns (body, etag, rows) or None; rows is what set() was given (None if unknown)."""
+        hit = self.local.get(key)
+        if hit is not None:
+            self._count("hits_local")
+            return hit
+        try:
+            client = self._client()
+            body, rows = client.mget([key, f"{key}:rows"]) if client is not None else (None, None)
+        except Exception:
+            self._count("redis_errors")
+            body = None
+        if body is not None:
+            hit = (body, self.etag_for(body), int(rows) if rows is not None else None)
+            self.local.set(key, hit)
+            self._count("hits_redis")
+            return hit
+        self._count("misses")
+        return None
+
+    def set(self, key, body: bytes, rows: int = None) -> str:
+        """`rows` (result rows in body) is handed back on hits, for the rows metric."""
+        etag = self.etag_for(body)
+        self.local.set(key, (body, etag, rows))
+        try:
+            client = self._client()
+            if client is not None:
+                with client.pipeline(transaction=False) as pipe:
+                    pipe.set(key, body, ex=self.ttl)
+                    if rows is not None:
+                        pipe.set(f"{key}:rows", rows, ex=self.ttl)
+                    pipe.execute()
+        except Exception:
+            self._count("redis_errors")
+        return etag
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self.counters)
+        lookups = out["hits_local"] + out["hits_redis"] + out["misses"]
+        out["hit_rate"] = round((lookups - out["misses"]) / lookups, 4) if lookups else 0.0
+        out["local_size"] = len(self.local)
+        out["dataset_version"] = known_version()
+        return out
+
+
+_settings = Settings()
+search_cache = ResultCache(
+    maxsize=_settings.RESULT_CACHE_SIZE,
+    redis_url=_settings.REDIS_URL,
+    ttl=_settings.RESULT_CACHE_TTL,
+)
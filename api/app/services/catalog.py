@@ -0,0 +1,156 @@
+from bisect import bisect_left
+from collections import Counter
+
+from sqlalchemy import select
+
+from app.models.models import NriCounty, CityCountyXwalk
+from app.services.dataset import CITY_DATASET, NRI_DATASET, VersionedSnapshot, register
+
+# Match tiers (lower sorts first)
+FULL_PREFIX, WORD_PREFIX, SUBSTRING, FUZZY = 0, 1, 2, 3
+KIND_ORDER = {"county": 0, "city": 1}
+
+
+def trigrams(s: str) -> set:
+    """Padded character trigrams: 'fax' -> {'  f', ' fa', 'fax', 'ax '}."""
+    padded = f"  {s} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CountyCatalog:
+    """
+    Autocomplete over county and city names, fully in memory.
+
+    - prefix index: sorted (key, entry_id) pairs for every word suffix of a name,
+      so "beach" finds "Virginia Beach"; a bisect gives the matching range
+    - trigram index: trigram -> entry ids, used for substring and typo matches
+    """
+
+    def __init__(self, entries: list):
+        # entry: dict(label, kind, county_fips, state, key)
+        self.entries = entries
+        self.trigram_index = {}
+        self.exact = {}     # normalized name -> entry ids (bulk lookups)
+
+        pairs = []
+        for i, e in enumerate(entries):
+            self.exact.setdefault(e["key"], []).append(i)
+            words = e["key"].split()
+            for w in range(len(words)):
+                pairs.append((" ".join(words[w:]), i))
+            for g in trigrams(e["key"]):
+                self.trigram_index.setdefault(g, []).append(i)
+        pairs.sort()
+        self.prefix_keys = [p[0] for p in pairs]
+        self.prefix_ids = [p[1] for p in pairs]
+
+    @classmethod
+    def build(cls, session) -> "CountyCatalog":
+        # imported here: routes.search owns the query normalization rules
+        from app.routes.search import normalize_q
+
+        entries = []
+        seen = set()
+        counties = session.execute(
+            select(NriCounty.county_fips, NriCounty.county, NriCounty.state)
+        ).all()
+        # A county and an independent city can share a name (Fairfax, Richmond,
+        # Roanoke in VA); Census codes independent cities 510-840
+        clashes = Counter((county, state) for _, county, state in counties)
+        for fips, county, state in counties:
+            key = normalize_q(county)
+            if not key:
+                continue
+            name = county
+            if clashes[(county, state)] > 1:
+                name = f"{county} ({'city' if fips[2:] >= '500' else 'county'})"
+            entries.append({"label": f"{name}, {state}", "kind": "county",
+                            "county_fips": fips, "state": state, "key": key})
+
+        for city, state, fips in session.execute(
+            select(CityCountyXwalk.city, CityCountyXwalk.state, CityCountyXwalk.county_fips)
+        ):
+            key = normalize_q(city)
+            if not key or (key, fips) in seen:
+                continue
+            seen.add((key, fips))
+            entries.append({"label": f"{city}, {state}", "kind": "city",
+                            "county_fips": fips, "state": state, "key": key})
+        return cls(entries)
+
+    @staticmethod
+    def _in_scope(e, state_code, fips_prefix):
+        if fips_prefix:
+            return (e["county_fips"] or "").startswith(fips_prefix)
+        if state_code:
+            return (e["state"] or "").upper() == state_code
+        return True
+
+    def lookup_exact(self, q: str, state_code=None, fips_prefix=None) -> list:
+        """Entries whose normalized name equals q, counties before cities."""
+        hits = [self.entries[i] for i in self.exact.get(q, ())
+                if self._in_scope(self.entries[i], state_code, fips_prefix)]
+        return sorted(hits, key=lambda e: KIND_ORDER.get(e["kind"], 9))
+
+    def _prefix_hits(self, q):
+        i = bisect_left(self.prefix_keys, q)
+        keys, ids = self.prefix_keys, self.prefix_ids
+        while i < len(keys) and keys[i].startswith(q):
+            yield ids[i], keys[i] == self.entries[ids[i]]["key"]
+            i += 1
+
+    def search(self, q: str, state_code=None, fips_prefix=None, limit: int = 7) -> list:
+        """q must already be normalized (see search.normalize_q)."""
+        if not q:
+            return []
+        best = {}   # entry_id -> (tier, similarity)
+
+        for i, whole in self._prefix_hits(q):
+            if not self._in_scope(self.entries[i], state_code, fips_prefix):
+                continue
+            tier = FULL_PREFIX if whole else WORD_PREFIX
+            if tier < best.get(i, (FUZZY + 1,))[0]:
+                best[i] = (tier, 1.0)
+
+        # Substring / fuzzy candidates from shared trigrams (only if prefixes ran short)
+        if len(best) < limit:
+            q_grams = trigrams(q)
+            counts = {}
+            for g in q_grams:
+                for i in self.trigram_index.get(g, ()):
+                    counts[i] = counts.get(i, 0) + 1
+            for i, n in counts.items():
+                if i in best or not self._in_scope(self.entries[i], state_code, fips_prefix):
+                    continue
+                sim = n / len(q_grams)
+                if q in self.entries[i]["key"]:
+                    best[i] = (SUBSTRING, sim)
+                elif sim >= 0.5:
+                    best[i] = (FUZZY, sim)
+
+        ranked = sorted(
+            best,
+            key=lambda i: (best[i][0], -best[i][1], KIND_ORDER.get(self.entries[i]["kind"], 9),
+                           len(self.entries[i]["key"]), self.entries[i]["label"]),
+        )
+
+        out, seen = [], set()
+        for i in ranked:
+            e = self.entries[i]
+            if (e["label"], e["county_fips"]) in seen:
+                continue
+            seen.add((e["label"], e["county_fips"]))
+            out.append({"label": e["label"], "name": e["label"],
+                        "kind": e["kind"], "county_fips": e["county_fips"]})
+            if len(out) >= limit:
+                break
+        return out
+
+
+catalog_snapshot = register(
+    VersionedSnapshot("county_catalog", CountyCatalog.build, dataset=(NRI_DATASET, CITY_DATASET))
+)
+
+
+def get_catalog(session=None) -> CountyCatalog:
+    return catalog_snapshot.get(session)
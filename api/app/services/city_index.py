@@ -0,0 +1,82 @@
+from bisect import bisect_left, bisect_right
+
+from sqlalchemy import select
+
+from app.models.models import CityCountyXwalk
+from app.services.dataset import CITY_DATASET, VersionedSnapshot, register
+
+
+class CityIndex:
+    """
+    City name -> county FIPS, fully in memory.
+
+    - fips_of: normalized name -> tuple of county FIPS (one per state the
+      name occurs in), an O(1) hash hit for exact names
+    - keys / blob: the same names sorted, and joined by newlines, so a prefix
+      is a bisect and a substring is a str.find over one string; ~30k
+      places are scanned in tens of microseconds
+    """
+
+    def __init__(self, fips_of: dict):
+        self.fips_of = fips_of
+        self.keys = sorted(fips_of)
+        self.blob = "\n" + "\n".join(self.keys) + "\n"
+        self.offsets = []       # blob offset of each key's first character
+        pos = 1
+        for k in self.keys:
+            self.offsets.append(pos)
+            pos += len(k) + 1
+
+    @classmethod
+    def build(cls, session) -> "CityIndex":
+        # imported here: routes.search owns the query normalization rules
+        from app.routes.search import normalize_q
+
+        fips_of = {}
+        for city, fips in session.execute(select(CityCountyXwalk.city, CityCountyXwalk.county_fips)):
+            key = normalize_q(city)
+            if key and fips:
+                fips_of.setdefault(key, []).append(fips)
+        return cls({k: tuple(dict.fromkeys(v)) for k, v in fips_of.items()})
+
+    def lookup(self, q: str) -> tuple:
+        """County FIPS of cities whose normalized name is exactly q."""
+        return self.fips_of.get(q, ())
+
+    def _prefixed(self, prefix: str):
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_right(self.keys, prefix + "￿")
+        return self.keys[lo:hi]
+
+    def _containing(self, q: str):
+        if "\n" in q:
+            return
+        blob, start = self.blob, 0
+        while True:
+            i = blob.find(q, start)
+            if i < 0:
+                return
+            k = bisect_right(self.offsets, i) - 1
+            yield self.keys[k]
+            start = self.offsets[k] + len(self.keys[k]) + 1    # next key
+
+    def match(self, q: str) -> list:
+        """
+        County FIPS of cities matching like /api/search's name filter: the
+        name starts with q's first word, or contains q anywhere.
+        """
+        if not q:
+            return []
+        out = {}
+        for key in self._prefixed(q.split()[0]):
+            out.update(dict.fromkeys(self.fips_of[key]))
+        for key in self._containing(q):
+            out.update(dict.fromkeys(self.fips_of[key]))
+        return list(out)
+
+
+city_snapshot = register(VersionedSnapshot("city_index", CityIndex.build, dataset=CITY_DATASET))
+
+
+def get_city_index(session=None) -> CityIndex:
+    return city_snapshot.get(session)
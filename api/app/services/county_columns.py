@@ -0,0 +1,100 @@
+import numpy as np
+from sqlalchemy import select
+
+from app.models.models import NriCounty
+from app.services.dataset import VersionedSnapshot, register
+from app.services.scoring import (
+    SCORE_COLUMNS, column_percentiles, composite_scores, inverse_mask, normalize_matrix, score_matrix,
+)
+
+
+class CountyColumns:
+    """
+    Columnar copy of nri_county: one array per identifier plus an (N, K)
+    float64 matrix of SCORE_COLUMNS (NaN where missing). National p10/p90
+    are computed once per build so scoring is a single vectorized pass.
+    """
+
+    def __init__(self, fips, county, state, matrix, columns=SCORE_COLUMNS):
+        self.fips = np.asarray(fips, dtype=object)
+        self.county = np.asarray(county, dtype=object)
+        self.state = np.asarray(state, dtype=object)
+        self.matrix = matrix
+        self.columns = list(columns)
+        self.state_fips = np.array([(f or "")[:2] for f in self.fips], dtype=object)
+        self.row_of = {f: i for i, f in enumerate(self.fips)}
+        self.p10, self.p90 = column_percentiles(matrix)
+
+        # Precomputed per dataset version: every column normalized against the
+        # national p10/p90, and per-column row orders (ascending, NaN last)
+        self.normalized = normalize_matrix(matrix, self.p10, self.p90, inverse_mask(self.columns))
+        self.order = {
+            c: np.argsort(np.where(np.isnan(self.normalized[:, k]), np.inf, self.normalized[:, k]), kind="stable")
+            for k, c in enumerate(self.columns)
+        }
+
+    @classmethod
+    def build(cls, session) -> "CountyColumns":
+        cols = [getattr(NriCounty, c) for c in SCORE_COLUMNS]
+        rows = session.execute(
+            select(NriCounty.county_fips, NriCounty.county, NriCounty.state, *cols)
+            .order_by(NriCounty.county_fips)
+        ).all()
+        matrix = np.array(
+            [[np.nan if v is None else v for v in r[3:]] for r in rows], dtype=np.float64
+        ).reshape(len(rows), len(SCORE_COLUMNS))
+        return cls([r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows], matrix)
+
+    def __len__(self):
+        return len(self.fips)
+
+    def scope_mask(self, state_code=None, fips_prefix=None) -> np.ndarray:
+        """Boolean row mask using the same scoping as /api/search."""
+        if fips_prefix:
+            return self.state_fips == fips_prefix
+        if state_code:
+            return np.array([(s or "").upper() == state_code for s in self.state], dtype=bool)
+        return np.ones(len(self), dtype=bool)
+
+    def score(self, weights=None, mask=None, p10=None, p90=None):
+        """Normalized (N, K) matrix and composite risk for the selected rows."""
+        matrix = self.matrix if mask is None else self.matrix[mask]
+        return score_matrix(
+            matrix, self.columns,
+            self.p10 if p10 is None else p10,
+            self.p90 if p90 is None else p90,
+            weights,
+        )
+
+    def top_k(self, weights: np.ndarray, k: int, mask=None, riskiest: bool = False):
+        """
+        Row indices of the k lowest (or highest) weighted composite risks within
+        `mask`, best first, plus the composite for those rows. Uses the
+        precomputed normalized matrix and argpartition: O(N) plus O(k log k).
+        """
+        rows = np.flatnonzero(mask) if mask is not None else np.arange(len(self))
+        if rows.size == 0 or k <= 0:
+            return rows[:0], np.empty(0)
+
+        nonzero = np.flatnonzero(weights)
+        if nonzero.size == 1 and not riskiest:
+            # Single hazard: walk its presorted order instead of scoring
+            order = self.order[self.columns[nonzero[0]]]
+            if mask is not None:
+                order = order[mask[order]]
+            picked = order[:k]
+            return picked, self.normalized[picked, nonzero[0]]
+
+        comp = composite_scores(self.normalized[rows], weights)
+        key = np.where(np.isnan(comp), np.inf, -comp if riskiest else comp)
+        k = min(k, rows.size)
+        part = np.argpartition(key, k - 1)[:k]
+        part = part[np.lexsort((rows[part], key[part]))]
+        return rows[part], comp[part]
+
+
+columns_snapshot = register(VersionedSnapshot("county_columns", CountyColumns.build))
+
+
+def get_county_columns(session=None) -> CountyColumns:
+    return columns_snapshot.get(session)
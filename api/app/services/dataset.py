@@ -0,0 +1,200 @@
+import threading
+import time
+
+from sqlalchemy import select
+
+from app.services.db import SessionLocal, reload_snapshot
+from app.models.models import DatasetVersion
+
+# Dataset name the ETL bumps whenever nri_county changes
+NRI_DATASET = "nri_county"
+# ... and whenever the ZIP/tract crosswalks in geo_unit change
+GEO_DATASET = "geo_unit"
+# ... and whenever city_county_xwalk is reloaded
+CITY_DATASET = "city_county_xwalk"
+
+
+def get_version(session, name: str = NRI_DATASET) -> int:
+    """Current version of a dataset (0 if it was never loaded)."""
+    v = session.execute(
+        select(DatasetVersion.version).where(DatasetVersion.name == name)
+    ).scalar_one_or_none()
+    return int(v or 0)
+
+
+# Last version each dataset was seen at by this process (filled by snapshot builds/polls)
+_observed: dict[str, int] = {}
+
+
+def known_version(name: str = NRI_DATASET) -> int:
+    """Dataset version as of the last poll; never queries."""
+    return _observed.get(name, 0)
+
+
+def observed_versions() -> dict:
+    """Every dataset this process has seen, with its last known version."""
+    return dict(_observed)
+
+
+def bump_version(session, name: str = NRI_DATASET) -> int:
+    """
+    Increment the dataset version inside the caller's transaction.
+    ETL scripts call this right before commit so API processes notice the reload.
+    """
+    row = session.get(DatasetVersion, name, with_for_update=True)
+    if row is None:
+        row = DatasetVersion(name=name, version=1)
+        session.add(row)
+    else:
+        row.version = (row.version or 0) + 1
+    session.flush()
+    return row.version
+
+
+def state_dataset(state_fips: str) -> str:
+    """Per-state entry: the NRI_DATASET version at which that state's rows last changed."""
+    return f"{NRI_DATASET}/{state_fips}"
+
+
+def mark_states_changed(session, states, version: int):
+    """Stamp each state FIPS in `states` with `version` (call alongside bump_version)."""
+    for fips in sorted(set(states)):
+        row = session.get(DatasetVersion, state_dataset(fips), with_for_update=True)
+        if row is None:
+            session.add(DatasetVersion(name=state_dataset(fips), version=version))
+        else:
+            row.version = version
+    session.flush()
+
+
+class VersionedSnapshot:
+    """
+    In-memory value built from the DB and rebuilt when the dataset version moves.
+
+    `get()` never queries once the value is loaded; freshness is handled by
+    `refresh()`, which the background poller (or an in-process ETL run) calls.
+    `dataset` may be a tuple when the value is built from several datasets;
+    it is then rebuilt when any of them moves.
+    """
+
+    def __init__(self, name: str, builder, dataset=NRI_DATASET):
+        self.name = name
+        self.datasets = (dataset,) if isinstance(dataset, str) else tuple(dataset)
+        self._builder = builder      # builder(session) -> value
+        self._lock = threading.Lock()
+        self._value = None
+        self.version = None
+        self.built_at = None
+
+    def _versions(self, session) -> tuple:
+        return tuple(get_version(session, d) for d in self.datasets)
+
+    def _build(self, session, version: tuple):
+        value = self._builder(session)
+        self._value = value
+        self.version = version
+        _observed.update(zip(self.datasets, version))
+        self.built_at = time.time()
+        return value
+
+    def get(self, session=None):
+        value = self._value
+        if value is not None:
+            return value
+        with self._lock:
+            if self._value is not None:
+                return self._value
+            own = session is None
+            s = session or SessionLocal()
+            try:
+                return self._build(s, self._versions(s))
+            finally:
+                if own:
+                    s.close()
+
+    def refresh(self, session, force: bool = False) -> bool:
+        """Rebuild if the stored version differs from ours. Returns True if rebuilt."""
+        version = self._versions(session)
+        if not force and self._value is not None and version == self.version:
+            return False
+        with self._lock:
+            self._build(session, version)
+        return True
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+            self.version = None
+
+
+_registry: dict[str, VersionedSnapshot] = {}
+
+
+def register(snapshot: VersionedSnapshot) -> VersionedSnapshot:
+    _registry[snapshot.name] = snapshot
+    return snapshot
+
+
+def refresh_all(force: bool = False) -> list[str]:
+    """Refresh every registered snapshot; returns the names that were rebuilt."""
+    rebuilt = []
+    s = SessionLocal()
+    try:
+        for snap in list(_registry.values()):
+            if snap.refresh(s, force=force):
+                rebuilt.append(snap.name)
+    finally:
+        s.close()
+    return rebuilt
+
+
+def invalidate_all():
+    for snap in list(_registry.values()):
+        snap.invalidate()
+
+
+def _state_versions(session) -> dict:
+    prefix = state_dataset("")
+    rows = session.execute(
+        select(DatasetVersion.name, DatasetVersion.version).where(DatasetVersion.name.like(f"{prefix}%"))
+    )
+    return {name[len(prefix):]: int(v or 0) for name, v in rows}
+
+
+state_versions = register(VersionedSnapshot("state_versions", _state_versions))
+
+
+def state_version(state_fips: str) -> int:
+    """
+    Version that state-scoped results depend on: when this state's rows last
+    changed. States the ETL never stamped fall back to the dataset version.
+    """
+    v = state_versions.get().get(state_fips)
+    return known_version() if v is None else v
+
+
+_poller = None
+
+
+def start_poller(interval: float):
+    """
+    Start a daemon thread that polls dataset versions every `interval` seconds,
+    so ETL runs in other processes (or newly published snapshot files) show up
+    without touching the request path.
+    """
+    global _poller
+    if interval <= 0 or (_poller is not None and _poller.is_alive()):
+        return _poller
+
+    def _loop():
+        while True:
+            time.sleep(interval)
+            try:
+                reload_snapshot()   # snapshot mode: pick up a newly published file
+                refresh_all()
+            except Exception as e:  # keep polling; DB may be restarting
+                print(f"[dataset] refresh failed: {e}")
+
+    _poller = threading.Thread(target=_loop, name="dataset-poller", daemon=True)
+    _poller.start()
+    return _poller
@@ -1,11 +1,179 @@
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from app.config import Settings
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+psycopg://airisk:airisk@db:5432/airisk")
 
-# Engine: connection pool to Postgres
-engine = create_engine(DATABASE_URL, echo=False, future=True)
+
+class PoolStats:
+    """Process-wide counters for connection checkouts; survives engine.dispose()."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.slow_waits = 0     # acquisitions that took longer than 10 ms
+
+    def record(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if seconds > 0.010:
+                self.slow_waits += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            n = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "slow_waits": self.slow_waits,
+                "wait_avg_ms": round(self.wait_total / n * 1000, 3) if n else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+
+
+pool_stats = PoolStats()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeout:
+            pool_stats.record(time.perf_counter() - t0, timed_out=True)
+            raise
+        pool_stats.record(time.perf_counter() - t0)
+        return conn
+
+
+def engine_options(url: str, settings: Settings, statement_timeout_ms: int = 0) -> dict:
+    """create_engine() kwargs for the configured pool size, recycling and timeouts."""
+    opts = {"echo": False, "future": True, "pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/") == "sqlite:"):
+        return opts     # in-memory SQLite keeps its single-connection pool
+
+    opts.update(
+        poolclass=TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    if url.startswith("postgresql") and statement_timeout_ms > 0:
+        # Server-side cap, so one pathological query can't hold a connection forever
+        opts["connect_args"] = {"options": f"-c statement_timeout={statement_timeout_ms}"}
+    return opts
+
+
+def snapshot_engine(path: str):
+    """
+    Read-only engine over a published SQLite snapshot. The file is never
+    modified in place (publishing swaps in a new file), so it is opened
+    immutable: no locking, and pages are memory-mapped.
+    """
+    url = f"sqlite+pysqlite:///file:{os.path.abspath(path)}?mode=ro&immutable=1&uri=true"
+    eng = create_engine(url, **engine_options(url, Settings()))
+
+    @event.listens_for(eng, "connect")
+    def _pragmas(dbapi_conn, record):
+        cur = dbapi_conn.cursor()
+        cur.execute(f"PRAGMA mmap_size={Settings().SNAPSHOT_MMAP_BYTES}")
+        cur.execute("PRAGMA query_only=1")
+        cur.close()
+
+    return eng
+
+
+def _file_id(path: str):
+    st = os.stat(path)
+    return st.st_ino, st.st_mtime_ns
+
+
+# SNAPSHOT_PATH set: serve reads from the local snapshot file instead of Postgres
+SNAPSHOT_PATH = Settings().SNAPSHOT_PATH
+_snapshot_id = None
+
+# Engine: connection pool to Postgres (or the snapshot file)
+if SNAPSHOT_PATH:
+    _snapshot_id = _file_id(SNAPSHOT_PATH)
+    engine = snapshot_engine(SNAPSHOT_PATH)
+else:
+    engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL, Settings()))
 
 # Session factory
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+
+def reload_snapshot() -> bool:
+    """
+    Rebind SessionLocal to a newly published snapshot file, if there is one.
+    Sessions already open keep reading the old file (its inode stays alive
+    until they close). Returns True if the engine was swapped.
+    """
+    global engine, _snapshot_id
+    if not SNAPSHOT_PATH:
+        return False
+    try:
+        current = _file_id(SNAPSHOT_PATH)
+    except FileNotFoundError:
+        return False
+    if current == _snapshot_id:
+        return False
+
+    old, engine = engine, snapshot_engine(SNAPSHOT_PATH)
+    _snapshot_id = current
+    SessionLocal.configure(bind=engine)
+    old.dispose(close=False)     # checked-out connections finish on the old file
+    return True
+
+
+def limit_statement_time(ms: int) -> bool:
+    """
+    Rebind SessionLocal to an engine whose connections carry a Postgres
+    statement_timeout of `ms`. Only the API opts in (create_app, after its
+    startup migrations); ETL, migrate and publish keep the uncapped engine,
+    so a long COPY or index build is never killed partway through.
+    Returns True if the engine was swapped.
+    """
+    global engine
+    if SNAPSHOT_PATH or ms <= 0 or not DATABASE_URL.startswith("postgresql"):
+        return False
+    old, engine = engine, create_engine(DATABASE_URL, **engine_options(DATABASE_URL, Settings(), ms))
+    SessionLocal.configure(bind=engine)
+    old.dispose()
+    return True
+
+
+def pool_status() -> dict:
+    """Current pool occupancy plus cumulative checkout wait stats (for /healthz)."""
+    pool = engine.pool
+    out = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        out.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+        )
+    out.update(pool_stats.snapshot())
+    if SNAPSHOT_PATH:
+        out["snapshot"] = SNAPSHOT_PATH
+    return out
@@ -0,0 +1,295 @@
+"""
+Per-request timing, DB query accounting and an on-demand sampling profiler.
+
+Everything is kept in process memory and rendered in the Prometheus text
+format by /metrics. Under gunicorn each worker reports its own numbers;
+scrape every worker (or aggregate by pod) rather than expecting totals.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import Settings
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+ROW_BUCKETS = (0, 1, 10, 25, 100, 500, 1000, 5000, 50000)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a label tuple."""
+
+    def __init__(self, name: str, help_text: str, labels: tuple, buckets: tuple):
+        self.name, self.help, self.labels, self.buckets = name, help_text, labels, buckets
+        self._lock = threading.Lock()
+        self._series = {}   # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, label_values: tuple, value: float):
+        with self._lock:
+            s = self._series.get(label_values)
+            if s is None:
+                s = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    s[i] += 1
+            s[len(self.buckets)] += 1
+            s[-1] += value
+
+    def render(self) -> list:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for values, s in sorted(series.items()):
+            base = _labels(self.labels, values)
+            for i, b in enumerate(self.buckets):
+                out.append(f'{self.name}_bucket{_labels(self.labels, values, le=_num(b))} {s[i]}')
+            out.append(f'{self.name}_bucket{_labels(self.labels, values, le="+Inf")} {s[len(self.buckets)]}')
+            out.append(f"{self.name}_sum{base} {_num(s[-1])}")
+            out.append(f"{self.name}_count{base} {s[len(self.buckets)]}")
+        return out
+
+
+class CounterFamily:
+    def __init__(self, name: str, help_text: str, labels: tuple):
+        self.name, self.help, self.labels = name, help_text, labels
+        self._lock = threading.Lock()
+        self._values = Counter()
+
+    def inc(self, label_values: tuple, amount: float = 1):
+        with self._lock:
+            self._values[label_values] += amount
+
+    def render(self) -> list:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        out += [f"{self.name}{_labels(self.labels, k)} {_num(v)}" for k, v in items]
+        return out
+
+
+def _num(v) -> str:
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+def _esc(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, **extra) -> str:
+    pairs = [f'{n}="{_esc(v)}"' for n, v in zip(names, values)]
+    pairs += [f'{n}="{_esc(v)}"' for n, v in extra.items()]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def gauge(name: str, help_text: str, samples: list) -> list:
+    """samples: [(labels dict, value)]"""
+    out = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        out.append(f"{name}{_labels(labels.keys(), labels.values())} {_num(value)}")
+    return out
+
+
+REQUEST_LATENCY = Histogram(
+    "api_request_duration_seconds", "Request latency by endpoint", ("endpoint", "method"), LATENCY_BUCKETS)
+REQUEST_QUERIES = Histogram(
+    "api_request_db_queries", "DB queries executed per request", ("endpoint",), QUERY_COUNT_BUCKETS)
+REQUEST_DB_TIME = Histogram(
+    "api_request_db_seconds", "Time spent in DB queries per request", ("endpoint",), LATENCY_BUCKETS)
+REQUEST_ROWS = Histogram(
+    "api_response_rows", "Result rows returned per request", ("endpoint",), ROW_BUCKETS)
+REQUESTS = CounterFamily(
+    "api_requests_total", "Requests by endpoint and status", ("endpoint", "method", "status"))
+QUERIES = CounterFamily(
+    "db_queries_total", "DB queries by caller (request endpoint or background)", ("endpoint",))
+
+METRICS = [REQUEST_LATENCY, REQUEST_QUERIES, REQUEST_DB_TIME, REQUEST_ROWS, REQUESTS, QUERIES]
+
+
+# ---------- DB query hooks (every Engine, including swapped snapshot engines) ----------
+# The start time lives on the execution context, so a query that raises
+# (after_cursor_execute never fires) leaves nothing behind on the connection
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_start", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    if has_request_context():
+        g.db_queries = g.get("db_queries", 0) + 1
+        g.db_seconds = g.get("db_seconds", 0.0) + elapsed
+        QUERIES.inc((_endpoint(),))
+    else:
+        QUERIES.inc(("background",))
+
+
+def _endpoint() -> str:
+    # The route pattern, not the raw path, keeps label cardinality bounded
+    rule = request.url_rule
+    return rule.rule if rule is not None else "unmatched"
+
+
+def _observe(endpoint, method, elapsed):
+    REQUEST_LATENCY.observe((endpoint, method), elapsed)
+    REQUEST_QUERIES.observe((endpoint,), g.get("db_queries", 0))
+    REQUEST_DB_TIME.observe((endpoint,), g.get("db_seconds", 0.0))
+    if "rows_returned" in g:
+        REQUEST_ROWS.observe((endpoint,), g.rows_returned)
+
+
+def start_stream():
+    """
+    For streamed bodies: the queries and rows happen after after_request, so
+    the latency/query/row observations wait for finish_stream() instead.
+    """
+    if has_request_context() and "request_started" in g:
+        g.stream_metrics = True
+
+
+def finish_stream(rows: int):
+    """Call when a streamed body is done (inside stream_with_context)."""
+    if not (has_request_context() and g.get("stream_metrics")):
+        return
+    g.rows_returned = rows
+    _observe(_endpoint(), request.method, time.perf_counter() - g.request_started)
+
+
+def record_rows(n: int):
+    """Routes call this with the number of result rows they return (cache hits included)."""
+    if has_request_context():
+        g.rows_returned = n
+
+
+# ---------- Sampling profiler ----------
+class StackSampler:
+    """
+    Samples one thread's Python stack every `interval` seconds and writes the
+    counts in collapsed-stack format (flamegraph.pl / speedscope input).
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id, self.interval = thread_id, interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self, path: str):
+        self._stop.set()
+        self._thread.join()
+        with open(path, "w") as f:
+            for stack, n in self.stacks.most_common():
+                f.write(f"{stack} {n}\n")
+
+
+def _wants_profile(settings: Settings) -> bool:
+    if not settings.PROFILE_ENABLED:
+        return False
+    return request.headers.get("X-Profile") == "1" or request.args.get("_profile") == "1"
+
+
+# ---------- Flask wiring ----------
+def init_app(app):
+    settings = Settings()
+    if not settings.METRICS_ENABLED:
+        return
+
+    @app.before_request
+    def _start_timer():
+        g.request_started = time.perf_counter()
+        g.db_queries, g.db_seconds = 0, 0.0
+        if _wants_profile(settings):
+            os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+            g.profile_path = os.path.join(
+                settings.PROFILE_DIR,
+                f"{time.strftime('%Y%m%dT%H%M%S')}-{request.endpoint or 'unmatched'}-{os.getpid()}.folded",
+            )
+            g.sampler = StackSampler(threading.get_ident(), settings.PROFILE_INTERVAL_MS / 1000.0).start()
+
+    @app.after_request
+    def _record(response):
+        started = g.get("request_started")
+        if started is None:
+            return response
+        endpoint, method = _endpoint(), request.method
+        elapsed = time.perf_counter() - started
+        REQUESTS.inc((endpoint, method, str(response.status_code)))
+        if not g.get("stream_metrics"):
+            _observe(endpoint, method, elapsed)
+
+        response.headers["Server-Timing"] = (
+            f"app;dur={elapsed * 1000:.2f}, db;dur={g.get('db_seconds', 0.0) * 1000:.2f};desc=\"{g.get('db_queries', 0)} queries\""
+        )
+        if "profile_path" in g:
+            response.headers["X-Profile"] = g.profile_path
+        return response
+
+    @app.teardown_request
+    def _stop_sampler(exc):
+        # Teardown runs after streamed bodies finish, so the profile covers them too
+        sampler = g.pop("sampler", None)
+        if sampler is not None:
+            sampler.stop(g.profile_path)
+
+
+def render_metrics() -> str:
+    """Every metric in the Prometheus text exposition format."""
+    from app.services.cache import search_cache
+    from app.services.dataset import observed_versions
+    from app.services.db import pool_status
+
+    lines = []
+    for m in METRICS:
+        lines += m.render()
+
+    cache = search_cache.stats()
+    events = ("hits_local", "hits_redis", "misses", "redis_errors")
+    lines += [
+        "# HELP result_cache_events_total Result cache lookups by outcome",
+        "# TYPE result_cache_events_total counter",
+    ]
+    lines += [f'result_cache_events_total{{cache="search",event="{e}"}} {cache[e]}' for e in events]
+    lines += gauge("result_cache_entries", "Entries in the in-process result cache",
+                   [({"cache": "search"}, cache["local_size"])])
+
+    pool = pool_status()
+    for key in ("size", "checked_out", "idle", "overflow"):
+        if key in pool:     # absent for non-queue pools (in-memory SQLite)
+            lines += gauge(f"db_pool_{key}", f"Connection pool {key.replace('_', ' ')}", [({}, pool[key])])
+    lines += [
+        "# HELP db_pool_checkouts_total Connection checkouts", "# TYPE db_pool_checkouts_total counter",
+        f"db_pool_checkouts_total {pool['checkouts']}",
+        "# HELP db_pool_timeouts_total Checkouts that timed out", "# TYPE db_pool_timeouts_total counter",
+        f"db_pool_timeouts_total {pool['timeouts']}",
+    ]
+    lines += gauge("db_pool_wait_max_seconds", "Longest checkout wait so far",
+                   [({}, pool["wait_max_ms"] / 1000.0)])
+
+    lines += gauge("dataset_version", "Dataset version this process serves",
+                   [({"dataset": name}, v) for name, v in sorted(observed_versions().items())])
+    return "\n".join(lines) + "\n"
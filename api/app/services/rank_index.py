@@ -0,0 +1,76 @@
+from sqlalchemy import select
+
+from app.models.models import NriCounty
+from app.services.dataset import VersionedSnapshot, register
+
+# Scope key for ranks across every loaded county
+NATIONAL = ""
+
+
+def _dense_ranks(rows):
+    """
+    rows: iterable of (county_fips, risk_score)
+    Returns {county_fips: dense rank} with 1 = lowest risk; None risk sorts last.
+    """
+    rows_sorted = sorted(
+        rows,
+        key=lambda r: (r[1] is None, float(r[1]) if r[1] is not None else 0.0)
+    )
+    rank_map = {}
+    rank = 0
+    prev = object()
+    for fips, risk in rows_sorted:
+        # dense-rank: same risk score => same rank
+        curr = None if risk is None else float(risk)
+        if curr != prev:
+            rank += 1
+            prev = curr
+        rank_map[fips] = rank
+    return rank_map
+
+
+class RankIndex:
+    """
+    Dense risk ranks per state (keyed by 2-digit state FIPS) plus a national scope.
+    Built once per dataset version; lookups are plain dict hits.
+    """
+
+    def __init__(self, ranks: dict, totals: dict):
+        self.ranks = ranks      # scope -> {county_fips: rank}
+        self.totals = totals    # scope -> number of counties in scope
+
+    @classmethod
+    def build(cls, session) -> "RankIndex":
+        rows = session.execute(
+            select(NriCounty.county_fips, NriCounty.risk_score)
+        ).all()
+
+        by_state = {}
+        for fips, risk in rows:
+            by_state.setdefault((fips or "")[:2], []).append((fips, risk))
+
+        ranks = {scope: _dense_ranks(group) for scope, group in by_state.items()}
+        ranks[NATIONAL] = _dense_ranks(rows)
+        totals = {scope: len(m) for scope, m in ranks.items()}
+        return cls(ranks, totals)
+
+    @staticmethod
+    def scope_for(county_fips, state_code, fips_prefix):
+        """Same scoping as the search filter: state FIPS, else the row's own state, else national."""
+        if fips_prefix:
+            return fips_prefix
+        if state_code:
+            return (county_fips or "")[:2]
+        return NATIONAL
+
+    def lookup(self, county_fips, state_code=None, fips_prefix=None):
+        """Returns (rank, total) for a county within the search scope."""
+        scope = self.scope_for(county_fips, state_code, fips_prefix)
+        return self.ranks.get(scope, {}).get(county_fips), self.totals.get(scope, 0)
+
+
+rank_snapshot = register(VersionedSnapshot("rank_index", RankIndex.build))
+
+
+def get_rank_index(session=None) -> RankIndex:
+    return rank_snapshot.get(session)
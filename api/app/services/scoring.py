@@ -1,5 +1,19 @@
-from sqlalchemy import func
-from sqlalchemy.sql import literal_column
+import warnings
+
+import numpy as np
+
+# NriCounty score columns the engine understands, in matrix column order
+SCORE_COLUMNS = [
+    "risk_score",
+    "flood_score", "heat_score", "wildfire_score", "tornado_score",
+    "winter_score", "hurricane_score",
+    "sovi_score", "resilience_score",
+]
+# Higher is better for these, so they are flipped to stay "higher = riskier"
+INVERSE_COLUMNS = {"resilience_score"}
+# Default composite: every hazard/social component equally; risk_score is
+# itself FEMA's composite, so it only counts when a caller weights it
+DEFAULT_WEIGHTS = {c: 1.0 for c in SCORE_COLUMNS if c != "risk_score"}
 
 
 def normalize(value, p10, p90, inverse=False):
@@ -13,24 +27,116 @@ def normalize(value, p10, p90, inverse=False):
 
 
 
+# Metrics column -> short name used in the get_percentiles() keys
+METRIC_KEYS = {
+    "median_price": "price",
+    "median_rent": "rent",
+    "crime_index": "crime",
+    "school_index": "school",
+    "flood_risk": "flood",
+    "income_median": "income",
+}
+
+
 def get_percentiles(session):
-    # Using percentile_cont for robust ranges
+    """
+    National p10/p90 for each Metrics column, e.g. P["p10_price"].
+    Served from the score_stat cache (recomputed at ingest), not per-call aggregates.
+    """
+    from app.services.stats import get_stats   # stats imports this module
+
+    stats = get_stats(session)
     P = {}
-    q = session.query(
-        func.percentile_cont(0.10).within_group(Metrics.median_price).label("p10_price"),
-        func.percentile_cont(0.90).within_group(Metrics.median_price).label("p90_price"),
-        func.percentile_cont(0.10).within_group(Metrics.median_rent).label("p10_rent"),
-        func.percentile_cont(0.90).within_group(Metrics.median_rent).label("p90_rent"),
-        func.percentile_cont(0.10).within_group(Metrics.crime_index).label("p10_crime"),
-        func.percentile_cont(0.90).within_group(Metrics.crime_index).label("p90_crime"),
-        func.percentile_cont(0.10).within_group(Metrics.school_index).label("p10_school"),
-        func.percentile_cont(0.90).within_group(Metrics.school_index).label("p90_school"),
-        func.percentile_cont(0.10).within_group(Metrics.flood_risk).label("p10_flood"),
-        func.percentile_cont(0.90).within_group(Metrics.flood_risk).label("p90_flood"),
-        func.percentile_cont(0.10).within_group(Metrics.income_median).label("p10_income"),
-        func.percentile_cont(0.90).within_group(Metrics.income_median).label("p90_income"),
-    )
-    row = q.one()
-    for k in row._mapping:
-        P[k] = float(row._mapping[k]) if row._mapping[k] is not None else 0.0
+    for col, key in METRIC_KEYS.items():
+        r = stats.get("metrics", col) or {}
+        P[f"p10_{key}"] = float(r["p10"]) if r.get("p10") is not None else 0.0
+        P[f"p90_{key}"] = float(r["p90"]) if r.get("p90") is not None else 0.0
     return P
+
+
+# ---------- Vectorized engine ----------
+def column_percentiles(matrix: np.ndarray, lo: float = 10, hi: float = 90):
+    """Per-column (p10, p90) ignoring NaN; all-NaN columns give NaN."""
+    if matrix.shape[0] == 0:
+        nan = np.full(matrix.shape[1], np.nan)
+        return nan, nan.copy()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)   # all-NaN columns
+        p = np.nanpercentile(matrix, [lo, hi], axis=0)
+    return p[0], p[1]
+
+
+def normalize_matrix(matrix: np.ndarray, p10, p90, inverse=None) -> np.ndarray:
+    """
+    Vectorized normalize() over an (N, K) matrix in one pass: column k is
+    scaled against p10[k]..p90[k], clipped to 0..100, flipped where inverse[k],
+    rounded to 0.1. Degenerate ranges give 50; NaN inputs stay NaN.
+    """
+    p10 = np.asarray(p10, dtype=np.float64)
+    p90 = np.asarray(p90, dtype=np.float64)
+    span = p90 - p10
+    degenerate = ~(span > 0)
+    with np.errstate(all="ignore"):
+        x = (matrix - p10) / np.where(degenerate, 1.0, span)
+    np.clip(x, 0.0, 1.0, out=x)
+    if inverse is not None:
+        inv = np.asarray(inverse, dtype=bool)
+        x[:, inv] = 1.0 - x[:, inv]
+    out = 100.0 * x
+    out[:, degenerate] = 50.0
+    out[np.isnan(matrix)] = np.nan
+    return np.round(out, 1)
+
+
+def inverse_mask(columns) -> np.ndarray:
+    return np.array([c in INVERSE_COLUMNS for c in columns], dtype=bool)
+
+
+def parse_weights(raw, columns=SCORE_COLUMNS) -> np.ndarray:
+    """
+    {'flood': 2, 'heat_score': 1} -> weight vector aligned with `columns`.
+    Keys may omit the '_score' suffix. Missing/empty input uses DEFAULT_WEIGHTS.
+    """
+    raw = raw or DEFAULT_WEIGHTS
+    if not isinstance(raw, dict):
+        raise ValueError("weights must be an object of {hazard: weight}")
+    w = np.zeros(len(columns), dtype=np.float64)
+    pos = {c: i for i, c in enumerate(columns)}
+    for key, val in raw.items():
+        name = key if str(key).endswith("_score") else f"{key}_score"
+        if name not in pos:
+            raise ValueError(f"Unknown hazard {key!r}; expected one of {sorted(c[:-6] for c in columns)}")
+        try:
+            val = float(val)
+        except (TypeError, ValueError):
+            raise ValueError(f"Weight for {key!r} must be a number")
+        if not np.isfinite(val) or val < 0:
+            raise ValueError(f"Weight for {key!r} must be >= 0")
+        w[pos[name]] = val
+    if not w.any():
+        raise ValueError("At least one weight must be > 0")
+    return w
+
+
+def composite_scores(normalized: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Weighted mean across columns, skipping NaN components per row (their weight
+    is redistributed). Rows with no scored component give NaN.
+    """
+    present = ~np.isnan(normalized)
+    w = np.where(present, weights, 0.0)
+    total = w.sum(axis=1)
+    with np.errstate(all="ignore"):
+        out = np.where(present, normalized, 0.0) @ weights / total
+    out[total == 0] = np.nan
+    return np.round(out, 1)
+
+
+def score_matrix(matrix: np.ndarray, columns, p10, p90, weights=None):
+    """
+    Normalize every column against the given p10/p90 and combine them.
+    Returns (normalized (N, K), composite risk (N,), higher = riskier).
+    """
+    normalized = normalize_matrix(matrix, p10, p90, inverse_mask(columns))
+    w = weights if isinstance(weights, np.ndarray) else parse_weights(weights, columns)
+    return normalized, composite_scores(normalized, w)
@@ -0,0 +1,28 @@
+from sqlalchemy import text
+
+# Name-matching indexes for /api/search. Postgres gets pg_trgm GIN indexes
+# (serve LIKE '%x%') plus lower() btree indexes with text_pattern_ops (serve
+# LIKE 'x%'); SQLite has neither, so it only gets plain lower() expression indexes.
+# City names are matched in memory (services.city_index) and need none.
+PG_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS ix_nri_county_county_lower '
+    'ON nri_county (lower(county) text_pattern_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_nri_county_county_trgm '
+    'ON nri_county USING gin (lower(county) gin_trgm_ops)',
+]
+
+FALLBACK_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS ix_nri_county_county_lower ON nri_county (lower(county))',
+]
+
+
+def ensure_search_indexes(engine) -> list:
+    """Create the name-matching indexes for this dialect; safe to run repeatedly."""
+    if engine.dialect.name == "postgresql":
+        stmts = ["CREATE EXTENSION IF NOT EXISTS pg_trgm"] + PG_INDEXES
+    else:
+        stmts = FALLBACK_INDEXES
+    with engine.begin() as conn:
+        for stmt in stmts:
+            conn.execute(text(stmt))
+    return stmts
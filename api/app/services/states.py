@@ -0,0 +1,46 @@
+# US states, DC and territories: (abbreviation, 2-digit FIPS, name)
+STATES = [
+    ("AL", "01", "Alabama"), ("AK", "02", "Alaska"), ("AZ", "04", "Arizona"),
+    ("AR", "05", "Arkansas"), ("CA", "06", "California"), ("CO", "08", "Colorado"),
+    ("CT", "09", "Connecticut"), ("DE", "10", "Delaware"), ("DC", "11", "District of Columbia"),
+    ("FL", "12", "Florida"), ("GA", "13", "Georgia"), ("HI", "15", "Hawaii"),
+    ("ID", "16", "Idaho"), ("IL", "17", "Illinois"), ("IN", "18", "Indiana"),
+    ("IA", "19", "Iowa"), ("KS", "20", "Kansas"), ("KY", "21", "Kentucky"),
+    ("LA", "22", "Louisiana"), ("ME", "23", "Maine"), ("MD", "24", "Maryland"),
+    ("MA", "25", "Massachusetts"), ("MI", "26", "Michigan"), ("MN", "27", "Minnesota"),
+    ("MS", "28", "Mississippi"), ("MO", "29", "Missouri"), ("MT", "30", "Montana"),
+    ("NE", "31", "Nebraska"), ("NV", "32", "Nevada"), ("NH", "33", "New Hampshire"),
+    ("NJ", "34", "New Jersey"), ("NM", "35", "New Mexico"), ("NY", "36", "New York"),
+    ("NC", "37", "North Carolina"), ("ND", "38", "North Dakota"), ("OH", "39", "Ohio"),
+    ("OK", "40", "Oklahoma"), ("OR", "41", "Oregon"), ("PA", "42", "Pennsylvania"),
+    ("RI", "44", "Rhode Island"), ("SC", "45", "South Carolina"), ("SD", "46", "South Dakota"),
+    ("TN", "47", "Tennessee"), ("TX", "48", "Texas"), ("UT", "49", "Utah"),
+    ("VT", "50", "Vermont"), ("VA", "51", "Virginia"), ("WA", "53", "Washington"),
+    ("WV", "54", "West Virginia"), ("WI", "55", "Wisconsin"), ("WY", "56", "Wyoming"),
+    # Territories
+    ("AS", "60", "American Samoa"), ("GU", "66", "Guam"),
+    ("MP", "69", "Northern Mariana Islands"), ("PR", "72", "Puerto Rico"),
+    ("VI", "78", "U.S. Virgin Islands"),
+]
+
+ABBR_TO_FIPS = {abbr: fips for abbr, fips, _ in STATES}
+FIPS_TO_ABBR = {fips: abbr for abbr, fips, _ in STATES}
+NAME_TO_ABBR = {name.upper(): abbr for abbr, _, name in STATES}
+NAME_TO_ABBR["US VIRGIN ISLANDS"] = "VI"
+NAME_TO_ABBR["VIRGIN ISLANDS"] = "VI"
+
+# Any spelling we accept (abbreviation or full name, upper-cased) -> abbreviation
+STATE_KEYS = {**{abbr: abbr for abbr in ABBR_TO_FIPS}, **NAME_TO_ABBR}
+
+
+def to_abbr(raw):
+    """'va', 'Virginia', 'VIRGINIA' -> 'VA'; None if unknown."""
+    if raw is None:
+        return None
+    return STATE_KEYS.get(str(raw).strip().upper())
+
+
+def to_fips(raw):
+    """State abbreviation or name -> 2-digit FIPS; None if unknown."""
+    abbr = to_abbr(raw)
+    return ABBR_TO_FIPS.get(abbr) if abbr else None
@@ -0,0 +1,125 @@
+import warnings
+
+import numpy as np
+from sqlalchemy import delete, select
+
+from app.models.models import GeoUnit, Metrics, NriCounty, ScoreStat
+from app.services.dataset import VersionedSnapshot, get_version, register
+from app.services.scoring import SCORE_COLUMNS
+from app.services.states import ABBR_TO_FIPS
+
+NATIONAL = "US"
+METRIC_COLUMNS = [
+    "median_price", "median_rent", "crime_index",
+    "school_index", "flood_risk", "income_median",
+]
+QUANTILES = (10, 50, 90)
+
+
+def _summaries(source, scope, columns, matrix, version) -> list:
+    """One ScoreStat-shaped dict per column of an (N, K) matrix."""
+    out = []
+    n = (~np.isnan(matrix)).sum(axis=0) if matrix.size else np.zeros(len(columns), dtype=int)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)   # all-NaN columns
+        if matrix.shape[0]:
+            q = np.nanpercentile(matrix, QUANTILES, axis=0)
+            lo, hi, mean = np.nanmin(matrix, axis=0), np.nanmax(matrix, axis=0), np.nanmean(matrix, axis=0)
+        else:
+            q = np.full((len(QUANTILES), len(columns)), np.nan)
+            lo = hi = mean = np.full(len(columns), np.nan)
+
+    def f(v):
+        return None if np.isnan(v) else float(v)
+
+    for k, col in enumerate(columns):
+        out.append({
+            "source": source, "scope": scope, "column": col,
+            "dataset_version": version, "n": int(n[k]),
+            "p10": f(q[0, k]), "p50": f(q[1, k]), "p90": f(q[2, k]),
+            "min": f(lo[k]), "max": f(hi[k]), "mean": f(mean[k]),
+        })
+    return out
+
+
+def _grouped(source, columns, scopes, rows, version) -> list:
+    matrix = np.array(
+        [[np.nan if v is None else v for v in r] for r in rows], dtype=np.float64
+    ).reshape(len(rows), len(columns))
+    scopes = np.asarray(scopes, dtype=object)
+
+    out = _summaries(source, NATIONAL, columns, matrix, version)
+    for scope in sorted(set(scopes)):
+        if scope:
+            out += _summaries(source, scope, columns, matrix[scopes == scope], version)
+    return out
+
+
+def compute_stats(session, version: int) -> list:
+    """Per-state and national summaries for every NriCounty and Metrics score column."""
+    nri = session.execute(
+        select(NriCounty.county_fips, *[getattr(NriCounty, c) for c in SCORE_COLUMNS])
+    ).all()
+    out = _grouped("nri_county", SCORE_COLUMNS,
+                   [(r[0] or "")[:2] for r in nri], [r[1:] for r in nri], version)
+
+    metrics = session.execute(
+        select(GeoUnit.state, *[getattr(Metrics, c) for c in METRIC_COLUMNS])
+        .outerjoin(GeoUnit, GeoUnit.id == Metrics.geo_id)
+    ).all()
+    out += _grouped("metrics", METRIC_COLUMNS,
+                    [ABBR_TO_FIPS.get((r[0] or "").upper(), "") for r in metrics],
+                    [r[1:] for r in metrics], version)
+    return out
+
+
+def recompute_stats(session, version: int) -> int:
+    """
+    Replace the persisted stats with a fresh computation stamped with `version`.
+    Called by the ETL inside its load transaction, right after bump_version().
+    """
+    rows = compute_stats(session, version)
+    session.execute(delete(ScoreStat))
+    if rows:
+        session.execute(ScoreStat.__table__.insert(), rows)
+    return len(rows)
+
+
+class StatsTable:
+    """In-memory view of score_stat: (source, scope, column) -> summary dict."""
+
+    def __init__(self, rows: list, version: int):
+        self.version = version
+        self.rows = {(r["source"], r["scope"], r["column"]): r for r in rows}
+
+    @classmethod
+    def build(cls, session) -> "StatsTable":
+        version = get_version(session)
+        stored = session.execute(
+            select(ScoreStat).where(ScoreStat.dataset_version == version)
+        ).scalars().all()
+        if stored:
+            rows = [{c.name: getattr(r, c.name) for c in ScoreStat.__table__.columns} for r in stored]
+        else:
+            # Not persisted for this version yet (e.g. rows loaded outside the ETL)
+            rows = compute_stats(session, version)
+        return cls(rows, version)
+
+    def get(self, source, column, scope=NATIONAL):
+        return self.rows.get((source, scope, column))
+
+    def percentiles(self, source, columns, scope=NATIONAL):
+        """(p10, p90) arrays aligned with `columns`; NaN where unknown."""
+        p10, p90 = [], []
+        for c in columns:
+            r = self.get(source, c, scope) or {}
+            p10.append(np.nan if r.get("p10") is None else r["p10"])
+            p90.append(np.nan if r.get("p90") is None else r["p90"])
+        return np.array(p10, dtype=np.float64), np.array(p90, dtype=np.float64)
+
+
+stats_snapshot = register(VersionedSnapshot("score_stats", StatsTable.build))
+
+
+def get_stats(session=None) -> StatsTable:
+    return stats_snapshot.get(session)
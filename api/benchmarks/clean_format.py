@@ -0,0 +1,105 @@
+"""
+Compare clean-data hand-off formats (CSV vs Parquet vs Arrow IPC) at national scale.
+
+    python -m benchmarks.clean_format --rows 85000
+
+Each read runs in a fresh subprocess so peak RSS is attributable to one format.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCORE_COLS = [
+    "risk_score", "flood_score", "heat_score", "wildfire_score", "tornado_score",
+    "winter_score", "hurricane_score", "sovi_score", "resilience_score",
+]
+
+
+def synthetic_clean_frame(rows: int, seed: int = 7):
+    import numpy as np
+    import pandas as pd
+    from app.services.states import STATES
+
+    rng = np.random.default_rng(seed)
+    state_idx = rng.integers(0, len(STATES), rows)
+    frame = pd.DataFrame({
+        "county_fips": [f"{STATES[i][1]}{n % 1000:03d}" for n, i in enumerate(state_idx)],
+        "county": [f"County {n}" for n in range(rows)],
+        "state": [STATES[i][0] for i in state_idx],
+    })
+    for c in SCORE_COLS:
+        vals = rng.uniform(0, 100, rows)
+        vals[rng.random(rows) < 0.05] = np.nan   # some missing scores
+        frame[c] = vals
+    return frame
+
+
+def peak_rss_mb() -> float:
+    """High-water RSS of this process image (VmHWM resets on exec; ru_maxrss may not)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def read_once(path: Path) -> dict:
+    """Parse every row and coerce scores to float, as the ingest does."""
+    from app.etl.clean_format import iter_rows
+
+    started = time.perf_counter()
+    n = 0
+    for row in iter_rows(path):
+        for c in SCORE_COLS:
+            v = row.get(c)
+            row[c] = float(v) if v not in ("", None) else None
+        n += 1
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": n,
+        "seconds": round(elapsed, 4),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--rows", type=int, default=85_000)
+    ap.add_argument("--read", help=argparse.SUPPRESS)   # child mode
+    args = ap.parse_args(argv)
+
+    if args.read:
+        print(json.dumps(read_once(Path(args.read))))
+        return
+
+    from app.etl.clean_format import SUFFIXES, write_clean
+
+    frame = synthetic_clean_frame(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'format':<8} {'MB':>7} {'write s':>8} {'read s':>8} {'peak RSS MB':>12}")
+        for fmt, suffix in SUFFIXES.items():
+            path = Path(tmp) / f"clean{suffix}"
+            t0 = time.perf_counter()
+            write_clean(frame, path)
+            write_s = time.perf_counter() - t0
+
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.clean_format", "--read", str(path)],
+                check=True, capture_output=True, text=True, env=os.environ.copy(),
+            )
+            res = json.loads(out.stdout.strip().splitlines()[-1])
+            size_mb = path.stat().st_size / 1e6
+            print(f"{fmt:<8} {size_mb:>7.1f} {write_s:>8.2f} {res['seconds']:>8.2f} {res['peak_rss_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Closed-loop HTTP load generator for a running API.
+
+    python -m benchmarks.loadtest --url http://localhost:8000 --concurrency 32 --duration 20
+
+Each client thread keeps one keep-alive connection and replays the chosen
+scenario until the duration ends. Compare e.g. `python -m wsgi` (dev server)
+with `gunicorn -c gunicorn.conf.py wsgi:app` on the same data.
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+SUGGEST_PREFIXES = ["fa", "ar", "ri", "alex", "nor", "bea", "ches", "lou", "pr", "wa"]
+SEARCH_QUERIES = ["", "fair", "arl", "rich", "norfolk", "beach", "city", "prince"]
+
+
+def scenario_requests(name: str, state: str):
+    """Infinite generator of (method, path, body) tuples for a scenario."""
+    rnd = random.Random(42)
+    while True:
+        pick = name if name != "mixed" else rnd.choice(["search", "search", "suggest", "suggest", "suggest", "rank"])
+        if pick == "search":
+            body = {"state": state, "q": rnd.choice(SEARCH_QUERIES), "limit": 25}
+            yield "POST", "/api/search", json.dumps(body)
+        elif pick == "suggest":
+            yield "GET", f"/api/suggest?state={state}&q={rnd.choice(SUGGEST_PREFIXES)}", None
+        elif pick == "rank":
+            weights = {"flood": rnd.randint(0, 3), "heat": rnd.randint(0, 3), "risk": 1}
+            yield "POST", "/api/rank", json.dumps({"state": state, "weights": weights, "k": 10})
+        else:
+            yield "GET", "/healthz", None
+
+
+def percentile(sorted_vals, p):
+    if not sorted_vals:
+        return 0.0
+    idx = min(len(sorted_vals) - 1, int(round(p / 100.0 * (len(sorted_vals) - 1))))
+    return sorted_vals[idx]
+
+
+def run(url, concurrency, duration, scenario, state):
+    target = urlparse(url)
+    deadline = time.perf_counter() + duration
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def client(seed):
+        conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+        reqs = scenario_requests(scenario, state)
+        for _ in range(seed):   # de-synchronize threads
+            next(reqs)
+        local, failed = [], 0
+        while time.perf_counter() < deadline:
+            method, path, body = next(reqs)
+            headers = {"Content-Type": "application/json"} if body else {}
+            t0 = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status >= 500:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+                continue
+            local.append(time.perf_counter() - t0)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", default="http://localhost:8000")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--duration", type=float, default=10.0)
+    ap.add_argument("--scenario", choices=["search", "suggest", "rank", "health", "mixed"], default="mixed")
+    ap.add_argument("--state", default="VA")
+    args = ap.parse_args(argv)
+    print(json.dumps(run(args.url, args.concurrency, args.duration, args.scenario, args.state)))
+
+
+if __name__ == "__main__":
+    main()
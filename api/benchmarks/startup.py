@@ -0,0 +1,82 @@
+"""
+Import-time and time-to-ready budget for the API (and cheap ETL imports).
+
+    python -m benchmarks.startup --runs 5 --budget-ms 1000
+
+Every measurement runs in a fresh interpreter. Exits non-zero when the median
+time-to-ready exceeds the budget, or when a heavy ETL-only dependency
+(pandas, pyarrow, openpyxl) is imported by the app or by importing an ETL module.
+Run `python -m app.migrate` first; boot is measured with AUTO_MIGRATE=0.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY = ("pandas", "pyarrow", "openpyxl")
+
+APP_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+create_app(start_background=False)
+t2 = time.perf_counter()
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "ready_ms": (t2 - t0) * 1000,
+                  "heavy": [m for m in %r if m in sys.modules]}))
+"""
+
+ETL_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import app.etl.clean_nri_va, app.etl.ingest_nri_va, app.etl.ingest_acs5_va
+print(json.dumps({"import_ms": (time.perf_counter() - t0) * 1000,
+                  "heavy": [m for m in %r if m in sys.modules]}))
+"""
+
+
+def probe(code: str, env: dict) -> dict:
+    out = subprocess.run([sys.executable, "-c", code % (HEAVY,)], env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", "1000")))
+    args = ap.parse_args(argv)
+
+    env = dict(os.environ, AUTO_MIGRATE="0", DATASET_POLL_SECONDS="0")
+    # ETL modules must import even when no data files exist
+    etl_env = dict(env, NRI_VA_XLSX="/nonexistent", ACS5_VA_PATH="/nonexistent")
+
+    app_runs = [probe(APP_PROBE, env) for _ in range(args.runs)]
+    etl_runs = [probe(ETL_PROBE, etl_env) for _ in range(args.runs)]
+
+    report = {
+        "runs": args.runs,
+        "budget_ms": args.budget_ms,
+        "app_import_ms": round(statistics.median(r["import_ms"] for r in app_runs), 1),
+        "app_ready_ms": round(statistics.median(r["ready_ms"] for r in app_runs), 1),
+        "etl_import_ms": round(statistics.median(r["import_ms"] for r in etl_runs), 1),
+        "app_heavy_imports": sorted({m for r in app_runs for m in r["heavy"]}),
+        "etl_heavy_imports": sorted({m for r in etl_runs for m in r["heavy"]}),
+    }
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if report["app_ready_ms"] > args.budget_ms:
+        failures.append(f"time to ready {report['app_ready_ms']} ms > budget {args.budget_ms} ms")
+    if report["app_heavy_imports"] or report["etl_heavy_imports"]:
+        failures.append("ETL-only dependencies imported eagerly")
+    if failures:
+        print("FAIL: " + "; ".join(failures), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
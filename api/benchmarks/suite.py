@@ -0,0 +1,361 @@
+"""
+End-to-end benchmark suite on synthetic data: ETL runs, /api/search,
+/api/suggest and the scoring engine, at VA, national-county and
+national-tract scale.
+
+    python -m benchmarks.suite --scale county
+    python -m benchmarks.suite --scale all --save-baseline
+    python -m benchmarks.suite --scale county --max-regression 0.25   # CI gate
+
+Each stage runs in a fresh interpreter, so peak RSS (VmHWM) belongs to that
+stage alone. API stages drive the Flask app in-process through its test
+client with the result cache disabled: latencies are app + DB time, without
+network or HTTP server overhead (use benchmarks.loadtest for that).
+
+Data goes into a throwaway SQLite file unless --database-url points at a
+local Postgres. Results are compared against benchmarks/baselines.json;
+baselines are machine-specific, so refresh them on the machine that gates.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.clean_format import peak_rss_mb
+from benchmarks.synthetic import SCALES
+
+STAGES = [
+    "etl_clean", "etl_ingest_nri", "etl_ingest_acs", "etl_refresh_noop", "seed_xwalk", "etl_geo_xwalk",
+    "scoring", "api_search", "api_suggest",
+]
+BASELINES = Path(__file__).with_name("baselines.json")
+TIMING_KEYS = ("seconds", "p50_ms", "p99_ms")
+REPORT_KEYS = ("rows", "seconds", "boot_ms", "p50_ms", "p99_ms", "rps", "peak_rss_mb")
+
+
+# ---------- helpers (child side) ----------
+def latency_stats(samples: list) -> dict:
+    samples = sorted(samples)
+    n = len(samples)
+
+    def pct(p):
+        return samples[min(n - 1, int(round(p / 100.0 * (n - 1))))] * 1000
+
+    total = sum(samples)
+    return {
+        "requests": n,
+        "p50_ms": round(pct(50), 3),
+        "p99_ms": round(pct(99), 3),
+        "rps": round(n / total, 1) if total else 0.0,
+    }
+
+
+def timed(fn, calls: list, warmup: int = 10) -> dict:
+    for args in calls[:warmup]:
+        fn(*args)
+    samples = []
+    for args in calls:
+        t0 = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - t0)
+    return latency_stats(samples)
+
+
+def _manifest(work: Path) -> dict:
+    return json.loads((work / "manifest.json").read_text())
+
+
+def _boot_app():
+    t0 = time.perf_counter()
+    from app import create_app
+    app = create_app(start_background=False)
+    return app.test_client(), round((time.perf_counter() - t0) * 1000, 1)
+
+
+# ---------- stages ----------
+def stage_etl_clean(work: Path, n: int) -> dict:
+    from app.etl.clean_nri_va import run
+
+    m = _manifest(work)
+    t0 = time.perf_counter()
+    run()       # NRI_RAW_PATHS from stage_env
+    return {"rows": m["counties"] + m["tracts"], "seconds": round(time.perf_counter() - t0, 3)}
+
+
+def stage_etl_ingest_nri(work: Path, n: int) -> dict:
+    from app.etl.ingest_nri_va import run
+
+    t0 = time.perf_counter()
+    rows = run()
+    return {"rows": rows, "seconds": round(time.perf_counter() - t0, 3)}
+
+
+def stage_etl_ingest_acs(work: Path, n: int) -> dict:
+    from app.etl.ingest_acs5_va import run
+
+    t0 = time.perf_counter()
+    rows = run()
+    return {"rows": rows, "seconds": round(time.perf_counter() - t0, 3)}
+
+
+def stage_etl_refresh_noop(work: Path, n: int) -> dict:
+    """A refresh right after the full runs above: every stage should be skipped."""
+    os.environ["ETL_INCREMENTAL"] = "1"     # read at import
+    from app.etl.refresh import run
+
+    t0 = time.perf_counter()
+    res = run()
+    return {"rows": sum(r["rows"] for r in res.values()), "seconds": round(time.perf_counter() - t0, 3)}
+
+
+def stage_seed_xwalk(work: Path, n: int) -> dict:
+    from app.etl.ingest_city_xwalk import run
+
+    t0 = time.perf_counter()
+    rows = run()
+    return {"rows": rows, "seconds": round(time.perf_counter() - t0, 3)}
+
+
+def stage_etl_geo_xwalk(work: Path, n: int) -> dict:
+    from app.etl.ingest_geo_xwalk import run
+
+    t0 = time.perf_counter()
+    res = run()
+    return {"rows": sum(r["total"] for r in res.values()), "seconds": round(time.perf_counter() - t0, 3)}
+
+
+def stage_scoring(work: Path, n: int) -> dict:
+    import numpy as np
+    from app.services.county_columns import CountyColumns
+    from app.services.scoring import DEFAULT_WEIGHTS, SCORE_COLUMNS, score_matrix
+    from app.services.states import STATES
+
+    m = _manifest(work)
+    rows = max(m["counties"], m["tracts"])     # tract scale scores the tract-sized matrix
+    rng = np.random.default_rng(11)
+    matrix = rng.uniform(0, 100, (rows, len(SCORE_COLUMNS)))
+    matrix[rng.random(matrix.shape) < 0.03] = np.nan
+    states = [s for s, fips, _ in STATES if fips <= "56"]
+    st = rng.integers(0, len(states), rows)
+    fips = [f"{i:011d}" for i in range(rows)]
+
+    t0 = time.perf_counter()
+    cols = CountyColumns(fips, fips, [states[i] for i in st], matrix)
+    build_s = time.perf_counter() - t0
+
+    weights = np.array([DEFAULT_WEIGHTS.get(c, 0.0) for c in SCORE_COLUMNS], dtype=np.float64)
+    weights[1], weights[2] = 2.0, 1.5
+    masks = [cols.scope_mask(state_code=states[i % len(states)]) for i in range(20)]
+    calls = [(weights, 25, masks[i % len(masks)]) for i in range(n)]
+    out = timed(lambda w, k, mask: cols.top_k(w, k, mask), calls)
+
+    t0 = time.perf_counter()
+    score_matrix(matrix, SCORE_COLUMNS, cols.p10, cols.p90, weights)
+    out.update(rows=rows, seconds=round(build_s, 3),
+               full_score_ms=round((time.perf_counter() - t0) * 1000, 3))
+    return out
+
+
+def _search_calls(scale: str, n: int) -> list:
+    import random
+    from benchmarks.synthetic import counties, xwalk_rows
+
+    rnd = random.Random(5)
+    cs, cities = counties(scale), xwalk_rows(scale)
+    calls = []
+    for i in range(n):
+        abbr, _, _, _, county = rnd.choice(cs)
+        pick = i % 20
+        if pick < 4:
+            body = {"state": abbr, "q": ""}
+        elif pick < 10:
+            body = {"state": abbr, "q": county[:4].lower()}
+        elif pick < 14:
+            body = {"state": "", "q": county[1:5].lower()}
+        elif pick < 18:
+            city = rnd.choice(cities)
+            body = {"state": city["state"], "q": city["city"]}
+        elif pick < 19:
+            body = {"state": "", "q": "", "limit": 25}
+        else:
+            body = {"state": "", "q": ""}              # full national list
+        calls.append((body,))
+    return calls
+
+
+def stage_api_search(work: Path, n: int) -> dict:
+    client, boot_ms = _boot_app()
+    rows = []
+
+    def call(body):
+        r = client.post("/api/search", json=body)
+        assert r.status_code == 200, r.get_data(as_text=True)
+        data = r.get_json()
+        rows.append(len(data["items"] if isinstance(data, dict) else data))
+
+    out = timed(call, _search_calls(_manifest(work)["scale"], n))
+    out.update(boot_ms=boot_ms, rows=sum(rows))
+    return out
+
+
+def stage_api_suggest(work: Path, n: int) -> dict:
+    import random
+    from benchmarks.synthetic import counties, xwalk_rows
+
+    scale = _manifest(work)["scale"]
+    rnd = random.Random(6)
+    names = [c[4] for c in counties(scale)] + [x["city"] for x in xwalk_rows(scale)]
+    calls = [(rnd.choice(names)[: rnd.randint(2, 5)].lower(), rnd.choice(["", "VA", "TX"])) for _ in range(n)]
+
+    client, boot_ms = _boot_app()
+    rows = []
+
+    def call(q, state):
+        r = client.get("/api/suggest", query_string={"q": q, "state": state})
+        assert r.status_code == 200
+        rows.append(len(r.get_json()))
+
+    out = timed(call, calls)
+    out.update(boot_ms=boot_ms, rows=sum(rows))
+    return out
+
+
+# ---------- orchestration (parent side) ----------
+def stage_env(work: Path, database_url: str) -> dict:
+    clean = work / "clean"
+    raw = [work / "raw" / name for name in ("nri_county.csv", "nri_tract.csv") if (work / "raw" / name).exists()]
+    return dict(
+        os.environ,
+        NRI_RAW_PATHS=os.pathsep.join(map(str, raw)),
+        DATABASE_URL=database_url or f"sqlite:///{work / 'bench.db'}",
+        NRI_VA_CLEAN_CSV=str(clean / "nri_clean.csv"),
+        NRI_TRACT_CLEAN_CSV=str(clean / "nri_tract_clean.csv"),
+        NRI_CLEAN_FORMATS="parquet,csv",
+        ACS5_VA_PATH=str(work / "raw" / "acs5_2024.csv"),
+        ZIP_COUNTY_PATH=str(work / "raw" / "zip_county.csv"),
+        CITY_XWALK_PATH=str(work / "raw" / "place_county.txt"),
+        ETL_MANIFEST_PATH=str(work / "etl_manifest.json"),
+        ETL_INCREMENTAL="0",    # ETL stages time full runs; etl_refresh_noop times the skip path
+        DATASET_POLL_SECONDS="0",
+        RESULT_CACHE_SIZE="0",
+        REDIS_URL="",
+        SNAPSHOT_PATH="",
+        SNAPSHOT_PUBLISH_PATH="",
+        AUTO_MIGRATE="1",
+    )
+
+
+def generate(work: Path, scale: str) -> dict:
+    from benchmarks.synthetic import write_acs, write_nri, write_place_county, write_zip_county
+
+    t0 = time.perf_counter()
+    m = {
+        "scale": scale,
+        "counties": write_nri(work / "raw" / "nri_county.csv", scale),
+        "tracts": write_nri(work / "raw" / "nri_tract.csv", scale, level="tract") if SCALES[scale]["tracts"] else 0,
+    }
+    write_acs(work / "raw" / "acs5_2024.csv", scale)
+    write_zip_county(work / "raw" / "zip_county.csv", scale)
+    write_place_county(work / "raw" / "place_county.txt", scale)
+    (work / "manifest.json").write_text(json.dumps(m))
+    print(f"[bench] {scale}: generated {m['counties']} counties, {m['tracts']} tracts "
+          f"in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    return m
+
+
+def run_stage(stage: str, work: Path, n: int, env: dict) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.suite", "--child", stage, "--workdir", str(work), "--requests", str(n)],
+        env=env, capture_output=True, text=True,
+    )
+    if out.returncode != 0:
+        raise RuntimeError(f"stage {stage} failed:\n{out.stderr[-4000:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def compare(results: dict, baselines: dict, max_regression) -> list:
+    """Print current vs baseline; return the regressions beyond max_regression."""
+    regressions = []
+    for scale, stages in results.items():
+        print(f"\n== {scale} ==")
+        print(f"{'stage':<16}" + "".join(f"{k:>12}" for k in REPORT_KEYS) + f"{'vs base':>26}")
+        for stage, res in stages.items():
+            base = baselines.get(scale, {}).get(stage, {})
+            deltas = []
+            for k in TIMING_KEYS + ("peak_rss_mb",):
+                if k in res and base.get(k):
+                    ratio = res[k] / base[k] - 1
+                    deltas.append(f"{k.split('_')[0]} {ratio:+.0%}")
+                    if max_regression is not None and k in TIMING_KEYS and ratio > max_regression:
+                        regressions.append(f"{scale}/{stage} {k}: {base[k]} -> {res[k]} ({ratio:+.0%})")
+            cells = "".join(f"{res.get(k, ''):>12}" for k in REPORT_KEYS)
+            print(f"{stage:<16}{cells}   {', '.join(deltas) or '(no baseline)'}")
+    return regressions
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scale", choices=[*SCALES, "all"], default="county")
+    ap.add_argument("--stages", default=",".join(STAGES), help="comma-separated subset (ETL stages seed the DB)")
+    ap.add_argument("--requests", type=int, default=300, help="timed calls per latency stage")
+    ap.add_argument("--workdir", help="keep generated data here instead of a temp dir")
+    ap.add_argument("--database-url", help="load into this database (e.g. a local Postgres) instead of SQLite")
+    ap.add_argument("--baseline", default=str(BASELINES))
+    ap.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    ap.add_argument("--max-regression", type=float, help="fail if a timing exceeds baseline by this fraction")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.child:
+        # ETL progress lines go to stderr; stdout carries only the JSON result
+        with contextlib.redirect_stdout(sys.stderr):
+            res = globals()[f"stage_{args.child}"](Path(args.workdir), args.requests)
+        res["peak_rss_mb"] = peak_rss_mb()
+        print(json.dumps(res))
+        return 0
+
+    scales = list(SCALES) if args.scale == "all" else [args.scale]
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    results = {}
+    for scale in scales:
+        with contextlib.ExitStack() as stack:
+            if args.workdir:
+                work = Path(args.workdir) / scale
+                work.mkdir(parents=True, exist_ok=True)
+            else:
+                work = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix=f"bench-{scale}-")))
+            if not (work / "manifest.json").exists():
+                generate(work, scale)
+            env = stage_env(work, args.database_url)
+            results[scale] = {}
+            for stage in stages:
+                results[scale][stage] = run_stage(stage, work, args.requests, env)
+                print(f"[bench] {scale}/{stage}: {results[scale][stage]}", file=sys.stderr)
+
+    baseline_path = Path(args.baseline)
+    baselines = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    regressions = compare(results, baselines, args.max_regression)
+
+    if args.save_baseline:
+        baselines.update(results)
+        baselines["_host"] = {
+            "python": platform.python_version(), "machine": platform.machine(),
+            "cpus": os.cpu_count(), "database": args.database_url and "postgresql" or "sqlite",
+        }
+        baseline_path.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"\n[bench] baselines written to {baseline_path}")
+
+    if regressions:
+        print("\nREGRESSIONS:\n  " + "\n  ".join(regressions), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+Synthetic NRI / city crosswalk / ACS inputs at benchmark scales.
+
+    va       133 counties in one state (today's real data size)
+    county   ~3,140 counties across the 50 states + DC (national county export)
+    tract    ~85,000 tracts over the national counties (national tract export)
+
+plus a HUD-style ZIP -> county crosswalk (~13 ZIPs per county, some spanning two).
+
+Files use the same headers as the real FEMA/CDC exports, so they go through
+the unmodified ETL. Generation is seeded and deterministic.
+"""
+import csv
+from pathlib import Path
+
+SCALES = {
+    "va": {"states": ["VA"], "counties": 133, "tracts": 0},
+    "county": {"states": None, "counties": 3143, "tracts": 0},
+    "tract": {"states": None, "counties": 3143, "tracts": 85_000},
+}
+
+# Real exports carry hundreds of EAL/ALR columns the clean step never keeps
+FILLER_COLUMNS = 60
+ACS_INDICATORS = 40
+CITIES_PER_COUNTY = 4
+ZIPS_PER_COUNTY = 13
+
+HAZARD_HEADERS = {
+    "RFLD_RISK_SCORE": "flood", "HWAV_RISK_SCORE": "heat", "WFIR_RISK_SCORE": "wildfire",
+    "TRND_RISK_SCORE": "tornado", "WNTR_RISK_SCORE": "winter", "HRCN_RISK_SCORE": "hurricane",
+}
+SYLLABLES = [
+    "al", "an", "ar", "ash", "bel", "ber", "bro", "cal", "car", "ches", "clar", "dal", "den",
+    "el", "fair", "fal", "field", "glen", "gran", "ham", "har", "hen", "kent", "lan", "lee",
+    "lin", "mad", "mar", "mont", "nor", "ol", "ox", "pen", "pres", "ran", "rich", "ro",
+    "sal", "sha", "stan", "ton", "val", "ver", "wash", "wes", "win", "york",
+]
+
+
+def _rng(seed):
+    import numpy as np
+    return np.random.default_rng(seed)
+
+
+def _name(rng, used: set) -> str:
+    while True:
+        parts = rng.choice(SYLLABLES, size=int(rng.integers(2, 4)))
+        name = "".join(parts).capitalize()
+        if name not in used:
+            used.add(name)
+            return name
+
+
+def counties(scale: str, seed: int = 7) -> list:
+    """[(state_abbr, state_name, state_fips, county_fips, county_name)] for a scale."""
+    from app.services.states import STATES
+
+    spec = SCALES[scale]
+    rng = _rng(seed)
+    states = [s for s in STATES if s[1] <= "56"]          # 50 states + DC
+    if spec["states"]:
+        states = [s for s in states if s[0] in spec["states"]]
+    per_state = rng.multinomial(spec["counties"] - len(states), [1 / len(states)] * len(states)) + 1
+
+    out, used = [], set()
+    for (abbr, fips, name, *_), n in zip(states, per_state):
+        for i in range(int(n)):
+            out.append((abbr, name, fips, f"{fips}{2 * i + 1:03d}", _name(rng, used)))
+    return out
+
+
+def write_nri(path: Path, scale: str, level: str = "county", seed: int = 7) -> int:
+    """Raw NRI export (county or tract level) in the FEMA column layout."""
+    rng = _rng(seed + 1)
+    rows = counties(scale, seed)
+    if level == "tract":
+        picks = rng.integers(0, len(rows), SCALES[scale]["tracts"])
+        units = [(rows[i], f"{rows[i][3]}{n:06d}") for n, i in enumerate(picks)]
+    else:
+        units = [(r, None) for r in rows]
+
+    filler = [f"X{i:02d}_EALB" for i in range(FILLER_COLUMNS)]
+    header = ["OID_", "STATE", "STATEABBRV", "STATEFIPS", "COUNTY", "COUNTYTYPE", "COUNTYFIPS", "STCOFIPS"]
+    if level == "tract":
+        header.append("TRACTFIPS")
+    header += ["RISK_SCORE", "SOVI_SCORE", "RESL_SCORE", *HAZARD_HEADERS, *filler]
+
+    scores = rng.uniform(0, 100, (len(units), 3 + len(HAZARD_HEADERS)))
+    missing = rng.random(scores.shape) < 0.03                  # some hazards missing
+    missing[:, 0] = False                                      # RISK_SCORE is always present
+    scores[missing] = float("nan")
+    extra = rng.uniform(0, 1e6, (len(units), len(filler)))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(header)
+        for n, ((abbr, name, sfips, cfips, county), tract) in enumerate(units):
+            row = [n + 1, name, abbr, sfips, county, "County", cfips[2:], cfips]
+            if level == "tract":
+                row.append(tract)
+            row += ["" if v != v else f"{v:.2f}" for v in scores[n]]
+            row += [f"{v:.1f}" for v in extra[n]]
+            w.writerow(row)
+    return len(units)
+
+
+def write_acs(path: Path, scale: str, seed: int = 7) -> int:
+    """County-level ACS/SVI extract (FIPS, ST, COUNTY, AREA_SQMI, E_*...)."""
+    rng = _rng(seed + 2)
+    rows = counties(scale, seed)
+    indicators = [f"E_IND{i:02d}" for i in range(ACS_INDICATORS)]
+    values = rng.uniform(0, 5e4, (len(rows), len(indicators)))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["FIPS", "ST", "COUNTY", "AREA_SQMI", *indicators])
+        for (abbr, _, _, cfips, county), vals in zip(rows, values):
+            w.writerow([cfips, abbr, f"{county} County", f"{rng.uniform(10, 2000):.1f}",
+                        *(f"{v:.0f}" for v in vals)])
+    return len(rows)
+
+
+def xwalk_rows(scale: str, seed: int = 7) -> list:
+    """City -> county crosswalk dicts; city names are unique nationally."""
+    rng = _rng(seed + 3)
+    used = set()
+    out = []
+    for abbr, _, _, cfips, county in counties(scale, seed):
+        used.add(county)
+        for _ in range(CITIES_PER_COUNTY):
+            out.append({"city": _name(rng, used), "state": abbr, "county": county, "county_fips": cfips})
+    return out
+
+
+def write_place_county(path: Path, scale: str, seed: int = 7) -> int:
+    """xwalk_rows() as a Census national_place_by_county file (pipe-delimited)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rows = xwalk_rows(scale, seed)
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f, delimiter="|")
+        w.writerow(["STATE", "STATEFP", "COUNTYFP", "COUNTYNAME", "PLACEFP", "PLACENS",
+                    "PLACENAME", "TYPE", "CLASSFP", "FUNCSTAT"])
+        for i, r in enumerate(rows):
+            incorporated = i % 3 != 0
+            w.writerow([r["state"], r["county_fips"][:2], r["county_fips"][2:], f"{r['county']} County",
+                        f"{i % 100000:05d}", f"{i:08d}",
+                        f"{r['city']} {'city' if incorporated else 'CDP'}",
+                        "INCORPORATED PLACE" if incorporated else "CENSUS DESIGNATED PLACE",
+                        "C1" if incorporated else "U1", "A" if incorporated else "S"])
+    return len(rows)
+
+
+def write_zip_county(path: Path, scale: str, seed: int = 7) -> int:
+    """HUD USPS ZIP_COUNTY layout; ~10% of ZIPs also cover the next county."""
+    rng = _rng(seed + 4)
+    rows = counties(scale, seed)
+    zips = rng.choice(100_000, size=len(rows) * ZIPS_PER_COUNTY, replace=False)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    n = 0
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["ZIP", "COUNTY", "USPS_ZIP_PREF_CITY", "USPS_ZIP_PREF_STATE", "RES_RATIO", "TOT_RATIO"])
+        for i, z in enumerate(zips):
+            abbr, _, _, cfips, county = rows[i // ZIPS_PER_COUNTY]
+            share = 1.0 if rng.random() > 0.1 else round(float(rng.uniform(0.5, 0.95)), 4)
+            w.writerow([f"{z:05d}", cfips, county.upper(), abbr, share, share])
+            n += 1
+            if share < 1.0:
+                nxt = rows[(i // ZIPS_PER_COUNTY + 1) % len(rows)]
+                w.writerow([f"{z:05d}", nxt[3], county.upper(), abbr, round(1 - share, 4), round(1 - share, 4)])
+                n += 1
+    return n
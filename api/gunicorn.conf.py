@@ -0,0 +1,52 @@
+# gunicorn.conf.py — production serving for the API
+#
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# The app is preloaded in the master: tables, search indexes and the in-memory
+# snapshots (rank index, suggest catalog, county columns) are built once and
+# shared copy-on-write by every worker.
+#
+# Reloads:
+#   kill -HUP  <master>   graceful: new workers replace old ones after in-flight
+#                         requests finish (data reloads need nothing: workers poll
+#                         dataset_version themselves)
+#   kill -USR2 <master>   start a new master for a code upgrade, then
+#   kill -QUIT <old>      stop the old one once the new one is ready
+import gc
+import multiprocessing
+import os
+
+os.environ["API_PRELOAD"] = "1"
+
+bind = f"{os.getenv('API_HOST', '0.0.0.0')}:{os.getenv('API_PORT', '8000')}"
+workers = int(os.getenv("GUNICORN_WORKERS", str(min(multiprocessing.cpu_count() * 2 + 1, 9))))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_class = "gthread" if threads > 1 else "sync"
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+# Recycle workers now and then so slow leaks never accumulate
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+
+accesslog = os.getenv("GUNICORN_ACCESSLOG", "-")
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far out of GC tracking, so collections in the
+    # workers don't touch (and copy) the shared snapshot pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from app.config import Settings
+    from app.services.db import engine
+    from app.services.dataset import start_poller
+
+    # Never reuse connections the master opened while preloading
+    engine.dispose(close=False)
+    start_poller(Settings().DATASET_POLL_SECONDS)
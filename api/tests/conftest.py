@@ -0,0 +1,78 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# The engine and caches are configured at import time, so the environment
+# has to point at a scratch database before anything under app/ is imported
+_TMP = Path(tempfile.mkdtemp(prefix="api-tests-"))
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{_TMP / 'test.db'}",
+    ETL_MANIFEST_PATH=str(_TMP / "etl_manifest.json"),
+    DATASET_POLL_SECONDS="0",
+    RESULT_CACHE_SIZE="256",
+    REDIS_URL="",
+    SNAPSHOT_PATH="",
+    SNAPSHOT_PUBLISH_PATH="",
+    AUTO_MIGRATE="0",
+)
+
+# (fips, county, state, risk, flood, heat): two Fairfaxes, and a risk tie (51013 / 51510)
+COUNTIES = [
+    ("51059", "Fairfax", "VA", 30.0, 40.0, 10.0),
+    ("51600", "Fairfax", "VA", 20.0, 90.0, 50.0),
+    ("51013", "Arlington", "VA", 25.0, 10.0, 80.0),
+    ("51510", "Alexandria", "VA", 25.0, 60.0, 30.0),
+    ("51107", "Loudoun", "VA", 15.0, 20.0, 20.0),
+    ("51153", "Prince William", "VA", 35.0, 30.0, 70.0),
+    ("51810", "Virginia Beach", "VA", 60.0, 95.0, 40.0),
+    ("24031", "Montgomery", "MD", 40.0, 50.0, 60.0),
+    ("51121", "Montgomery", "VA", 45.0, 15.0, 35.0),
+]
+CITIES = [("Reston", "VA", "Fairfax", "51059"), ("Blacksburg", "VA", "Montgomery", "51121")]
+ZIPS = [("20190", "51059"), ("22301", "51510")]
+
+
+@pytest.fixture(scope="session")
+def seeded():
+    from app.migrate import migrate
+    from app.models.models import CityCountyXwalk, GeoUnit, NriCounty
+    from app.services.dataset import CITY_DATASET, GEO_DATASET, bump_version, invalidate_all
+    from app.services.db import SessionLocal
+    from app.services.stats import recompute_stats
+
+    migrate()
+    s = SessionLocal()
+    try:
+        for fips, county, state, risk, flood, heat in COUNTIES:
+            s.add(NriCounty(county_fips=fips, county=county, state=state, risk_score=risk,
+                            flood_score=flood, heat_score=heat))
+        for city, state, county, fips in CITIES:
+            s.add(CityCountyXwalk(city=city, state=state, county=county, county_fips=fips))
+        for code, fips in ZIPS:
+            s.add(GeoUnit(geo_type="ZIP", code=code, name=code, state="VA", county="",
+                          county_fips=fips, weight=1.0))
+        s.flush()
+        version = bump_version(s)
+        recompute_stats(s, version)
+        bump_version(s, CITY_DATASET)
+        bump_version(s, GEO_DATASET)
+        s.commit()
+    finally:
+        s.close()
+    invalidate_all()
+    return COUNTIES
+
+
+@pytest.fixture(scope="session")
+def app(seeded):
+    from app import create_app
+    return create_app(start_background=False)
+
+
+@pytest.fixture
+def client(app):
+    from app.services.cache import search_cache
+    search_cache.local.clear()
+    return app.test_client()
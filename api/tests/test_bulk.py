@@ -0,0 +1,52 @@
+from app.routes.bulk import Resolver
+
+
+def _resolve(app, item, state="VA"):
+    from app.routes.search import normalize_state
+    with app.app_context():
+        return Resolver(*normalize_state(state)).resolve(item)
+
+
+def test_loaded_fips_wins_over_zip(app):
+    r = _resolve(app, "51059")
+    assert (r["match"], r["geo_id"]) == ("fips", "51059")
+
+
+def test_unknown_five_digits_fall_through_to_zip(app):
+    r = _resolve(app, "20190")
+    assert (r["match"], r["geo_id"]) == ("zip", "51059")
+
+
+def test_tract_resolves_to_its_county(app):
+    from app.services.dataset import GEO_DATASET, bump_version, invalidate_all
+    from app.models.models import GeoUnit
+    from app.services.db import SessionLocal
+
+    s = SessionLocal()
+    s.add(GeoUnit(geo_type="TRACT", code="51510200100", name="tract", state="VA", county="",
+                  county_fips="51510", weight=1.0))
+    bump_version(s, GEO_DATASET)
+    s.commit()
+    s.close()
+    invalidate_all()
+    r = _resolve(app, "51510200100")
+    assert (r["match"], r["geo_id"]) == ("tract", "51510")
+
+
+def test_exact_name_before_fuzzy(app):
+    r = _resolve(app, "Loudoun")
+    assert (r["match"], r["geo_id"]) == ("county", "51107")
+    r = _resolve(app, "Reston, VA")
+    assert (r["match"], r["geo_id"]) == ("city", "51059")
+    r = _resolve(app, "Loudon")
+    assert r["match"] == "county_fuzzy" and r["geo_id"] == "51107"
+
+
+def test_same_name_reports_other_matches(app):
+    r = _resolve(app, "Fairfax")
+    assert r["match"] == "county"
+    assert {r["geo_id"], *r["other_matches"]} == {"51059", "51600"}
+
+
+def test_not_found(app):
+    assert _resolve(app, "zzzzqqq")["status"] == "not_found"
@@ -0,0 +1,37 @@
+import csv
+
+from app.etl import ingest_nri_va
+from app.etl.ingest_nri_va import FIELDS
+from app.etl.manifest import Manifest
+
+COLS = ["county_fips", "county", "state", "risk_score", "flood_score", "heat_score"]
+
+
+def _write_clean(path, rows):
+    with open(path, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=FIELDS)
+        w.writeheader()
+        for row in rows:
+            w.writerow(dict(zip(COLS, row)))
+
+
+def test_unchanged_input_is_skipped_and_edits_load_one_row(seeded, tmp_path, monkeypatch, capsys):
+    clean = tmp_path / "nri_clean.csv"
+    monkeypatch.setenv("NRI_VA_CLEAN", str(clean))
+    monkeypatch.setenv("ETL_MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    rows = list(seeded)
+    _write_clean(clean, rows)
+
+    assert ingest_nri_va.run(mode="upsert", incremental=True) == len(rows)
+    assert ingest_nri_va.run(mode="upsert", incremental=True) == 0
+    assert "unchanged" in capsys.readouterr().out
+    assert Manifest.load().stage(ingest_nri_va.STAGE)["rows"].keys() == {r[0] for r in rows}
+
+    edited = [rows[0][:3] + (99.0,) + rows[0][4:]] + rows[1:]
+    _write_clean(clean, edited)
+    assert ingest_nri_va.run(mode="upsert", incremental=True) == 1
+    assert "changed states: 51" in capsys.readouterr().out
+
+    # Leave the shared database as seeded
+    _write_clean(clean, rows)
+    assert ingest_nri_va.run(mode="upsert", incremental=True) == 1
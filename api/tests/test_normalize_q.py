@@ -0,0 +1,21 @@
+from app.routes.search import normalize_q
+
+
+def test_state_name_alone_is_a_place_name():
+    assert normalize_q("Washington") == "washington"
+    assert normalize_q("Delaware") == "delaware"
+
+
+def test_trailing_state_part_is_dropped():
+    assert normalize_q("Washington, VA") == "washington"
+    assert normalize_q("Fairfax, Virginia") == "fairfax"
+
+
+def test_non_empty_query_never_normalizes_to_empty():
+    assert normalize_q("County") == "county"
+    assert normalize_q("") == ""
+
+
+def test_state_words_inside_a_name_are_kept():
+    assert normalize_q("Virginia Beach") == "virginia beach"
+    assert normalize_q("Virginia Beach, VA") == "virginia beach"
@@ -0,0 +1,35 @@
+import pytest
+
+
+def _rank(client, **body):
+    return client.post("/api/rank", json={"state": "VA", "weights": {"flood": 1}, **body})
+
+
+def test_top_k_orders_by_composite(client):
+    safest = _rank(client, k=3).json["items"]
+    riskiest = _rank(client, k=3, order="riskiest").json["items"]
+
+    risks = [r["composite_risk"] for r in safest]
+    assert risks == sorted(risks)
+    assert [r["composite_risk"] for r in riskiest] == sorted((r["composite_risk"] for r in riskiest), reverse=True)
+    assert safest[0]["geo_id"] == "51013"      # lowest flood score in VA
+    assert riskiest[0]["geo_id"] == "51810"
+    assert [r["rank"] for r in safest] == [1, 2, 3]
+
+
+def test_top_k_scope_and_default_k(client):
+    res = _rank(client).json
+    assert res["total"] == 8
+    assert len(res["items"]) == 8 and all(r["geo_id"].startswith("51") for r in res["items"])
+
+
+@pytest.mark.parametrize("k", [0, -1, "x"])
+def test_top_k_rejects_bad_k(client, k):
+    res = _rank(client, k=k)
+    assert res.status_code == 400
+    assert res.json["code"] == "BAD_REQUEST"
+
+
+def test_top_k_rejects_bad_weights(client):
+    res = client.post("/api/rank", json={"state": "VA", "weights": {"nope": 1}})
+    assert res.status_code == 400
@@ -0,0 +1,81 @@
+import pytest
+
+
+def _ids(items):
+    return [r["geo_id"] for r in items]
+
+
+def test_cursor_pages_match_offset_pages(client):
+    full = client.post("/api/search", json={"state": "VA"}).json
+
+    by_cursor, cursor = [], None
+    while True:
+        body = {"state": "VA", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.post("/api/search", json=body).json
+        by_cursor += page["items"]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    by_page = []
+    for n in range(1, len(full) // 2 + 2):
+        by_page += client.post("/api/search", json={"state": "VA", "limit": 2, "page": n}).json["items"]
+
+    assert _ids(by_cursor) == _ids(by_page) == _ids(full)
+    assert [r["rank"] for r in by_cursor] == list(range(1, len(full) + 1))
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30"])   # "e30" is base64 "{}"
+def test_bad_cursor_is_400(client, cursor):
+    res = client.post("/api/search", json={"state": "VA", "limit": 2, "cursor": cursor})
+    assert res.status_code == 400
+    assert res.json["code"] == "BAD_REQUEST"
+
+
+def test_cursor_is_tied_to_its_query(client):
+    first = client.post("/api/search", json={"state": "VA", "limit": 2}).json
+    res = client.post("/api/search", json={"state": "VA", "q": "fairfax", "limit": 2,
+                                           "cursor": first["next_cursor"]})
+    assert res.status_code == 400
+    res = client.post("/api/search", json={"state": "VA", "limit": 3, "cursor": first["next_cursor"]})
+    assert res.status_code == 400
+
+
+def test_cache_miss_then_hit_with_same_etag(client):
+    first = client.post("/api/search", json={"state": "VA", "q": "fair"})
+    second = client.post("/api/search", json={"state": "VA", "q": "fair"})
+    assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("MISS", "HIT")
+    assert first.headers["ETag"] == second.headers["ETag"]
+    assert first.data == second.data
+
+
+def test_conditional_get_returns_304(client):
+    first = client.get("/api/search?state=VA&q=fair")
+    etag = first.headers["ETag"]
+    again = client.get("/api/search?state=VA&q=fair", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.data == b""
+    other = client.get("/api/search?state=VA&q=loudoun", headers={"If-None-Match": etag})
+    assert other.status_code == 200
+
+
+def test_post_ignores_if_none_match(client):
+    etag = client.post("/api/search", json={"state": "VA"}).headers["ETag"]
+    res = client.post("/api/search", json={"state": "VA"}, headers={"If-None-Match": etag})
+    assert res.status_code == 200 and res.json
+
+
+def _metric(client, name):
+    for line in client.get("/metrics").get_data(as_text=True).splitlines():
+        if line.startswith(name + '{endpoint="/api/search"}'):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_streamed_rows_and_queries_are_counted(client):
+    rows_before = _metric(client, "api_response_rows_sum")
+    queries_before = _metric(client, "api_request_db_queries_sum")
+    res = client.post("/api/search", json={"state": "VA", "stream": True})
+    lines = res.get_data(as_text=True).splitlines()
+    assert len(lines) == 8
+    assert _metric(client, "api_response_rows_sum") == rows_before + len(lines)
+    assert _metric(client, "api_request_db_queries_sum") > queries_before
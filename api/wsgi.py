@@ -1,6 +1,10 @@
+import os
 from app import create_app
-app = create_app()
+
+# gunicorn.conf.py sets API_PRELOAD=1: the app (and its snapshots) is built
+# once in the master, and background threads are started per worker in post_fork
+app = create_app(start_background=os.getenv("API_PRELOAD") != "1")
 
 if __name__ == "__main__":
-    # Dev server; later swap to gunicorn/uwsgi in prod
-    app.run(host="0.0.0.0", port=8000)
+    # Dev server only; production runs `gunicorn -c gunicorn.conf.py wsgi:app`
+    app.run(host="0.0.0.0", port=int(os.getenv("API_PORT", "8000")))
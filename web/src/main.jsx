@@ -1,6 +1,14 @@
 import React, { useEffect, useRef, useState } from "react";
 import { createRoot } from "react-dom/client";
 
+// Bounded memo: Map keeps insertion order, so the first key is the oldest
+const CACHE_MAX = 200;
+function remember(map, key, value) {
+  map.delete(key);
+  map.set(key, value);
+  if (map.size > CACHE_MAX) map.delete(map.keys().next().value);
+}
+
 function App() {
   const api = import.meta.env.VITE_API_URL || "http://localhost:8000";
 
@@ -14,6 +22,8 @@ function App() {
   const [activeIdx, setActiveIdx] = useState(-1);
   const abortRef = useRef(null);
   const debounceRef = useRef(null);
+  const suggestCacheRef = useRef(new Map()); // "VA|fair" -> names (at most CACHE_MAX)
+  const searchCacheRef = useRef(new Map());  // request URL -> { etag, data } (at most CACHE_MAX)
 
   const highlight = (text, q) => {
     if (!q) return text;
@@ -39,14 +49,27 @@ function App() {
     }
 
     try {
-      const res = await fetch(`${api}/api/search`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ state: sc, q: query || undefined }), // no default limit
-      });
+      // GET, so the server can answer If-None-Match with 304; no default limit
+      const params = new URLSearchParams({ state: sc });
+      if (query) params.set("q", query);
+      const url = `${api}/api/search?${params}`;
+      const cached = searchCacheRef.current.get(url);
+      const headers = cached ? { "If-None-Match": cached.etag } : {};
+
+      const res = await fetch(url, { headers });
+
+      // 304: our copy is still current (the ETag changes with the dataset); skip the payload
+      if (res.status === 304 && cached) {
+        remember(searchCacheRef.current, url, cached);
+        setResults(cached.data);
+        return;
+      }
       const data = await res.json().catch(() => ({}));
       if (!res.ok) throw new Error(data?.message || data?.error || `HTTP ${res.status}`);
-      setResults(Array.isArray(data) ? data : data.items ?? []);
+      const items = Array.isArray(data) ? data : data.items ?? [];
+      const etag = res.headers.get("ETag");
+      if (etag) remember(searchCacheRef.current, url, { etag, data: items });
+      setResults(items);
     } catch (e) {
       console.error(e);
       setError(String(e.message || e));
@@ -66,6 +89,15 @@ function App() {
       return;
     }
 
+    // Repeated prefixes (typing, then backspacing) never hit the API twice
+    const cacheKey = `${sc}|${q.toLowerCase()}`;
+    const cached = suggestCacheRef.current.get(cacheKey);
+    if (cached) {
+      setSuggestions(cached);
+      setActiveIdx(-1);
+      return;
+    }
+
     debounceRef.current = setTimeout(async () => {
       if (abortRef.current) abortRef.current.abort();
       const controller = new AbortController();
@@ -101,6 +133,7 @@ function App() {
           )
         ).slice(0, 7);
 
+        if (res.ok) remember(suggestCacheRef.current, cacheKey, names);
         setSuggestions(names);
         setActiveIdx(-1);
       } catch (e) {